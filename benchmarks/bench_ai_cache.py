@@ -0,0 +1,111 @@
+"""
+Replays extension-request traffic through the AI evaluation cache and
+reports hit rates, compared with the old per-process hash() keys.
+
+Traffic is a JSONL file with one request per line, taking the text from
+its "reason" field (or "body", or "title"). Without --traffic a skewed
+synthetic stream with case/whitespace variants is used. Requests are
+spread round-robin over simulated worker processes that share one Redis:
+
+    PYTHONPATH=. python benchmarks/bench_ai_cache.py --traffic requests.jsonl --workers 4
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+
+import redis
+
+from integrations.ai_cache import MISS, EvaluationCache
+
+REASONS = [
+    "I was sick with the flu",
+    "Laptop broke, waiting for repair",
+    "Need more time",
+    "Power outage in my area",
+    "Family emergency",
+    "Underestimated the scope",
+    "Waiting on client feedback",
+    "Internet is down",
+]
+
+def synthetic(count: int, vocabulary: int, rng: random.Random):
+    reasons = [f"{REASONS[i % len(REASONS)]} #{i // len(REASONS)}" if i >= len(REASONS) else REASONS[i]
+               for i in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    for reason in rng.choices(reasons, weights=weights, k=count):
+        variant = rng.random()
+        if variant < 0.2:
+            reason = reason.upper()
+        elif variant < 0.4:
+            reason = f"  {reason.replace(' ', '  ')} "
+        yield reason
+
+def load_traffic(path: str):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record.get("reason") or record.get("body") or record.get("title") or ""
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--traffic", help="JSONL file to replay")
+    parser.add_argument("--requests", type=int, default=20000, help="synthetic requests")
+    parser.add_argument("--vocabulary", type=int, default=400, help="distinct synthetic reasons")
+    parser.add_argument("--repeat", type=int, default=1, help="times to replay the traffic")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--local-size", type=int, default=256)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    if args.traffic:
+        traffic = [reason for reason in load_traffic(args.traffic)] * args.repeat
+    else:
+        traffic = list(synthetic(args.requests, args.vocabulary, rng))
+
+    # Old scheme: hash() differs per process, so entries never match across
+    # workers and only identical text matches within one
+    legacy_seen = [set() for _ in range(args.workers)]
+    legacy_calls = 0
+    for i, reason in enumerate(traffic):
+        seen = legacy_seen[i % args.workers]
+        if reason not in seen:
+            seen.add(reason)
+            legacy_calls += 1
+
+    client = redis.Redis.from_url(args.redis_url, decode_responses=True)
+    # A fresh prompt version keeps runs from seeing each other's entries
+    prompt_version = f"bench-{uuid.uuid4().hex[:8]}"
+    caches = [
+        EvaluationCache(client, "bench-model", prompt_version, local_size=args.local_size)
+        for _ in range(args.workers)
+    ]
+    calls = 0
+    started = time.perf_counter()
+    for i, reason in enumerate(traffic):
+        cache = caches[i % args.workers]
+        if cache.get(reason) is MISS:
+            calls += 1
+            cache.put(reason, {"approved": True, "reason": "ok", "confidence": 0.9})
+    elapsed = time.perf_counter() - started
+
+    totals = {}
+    for cache in caches:
+        for name, value in cache.stats().items():
+            totals[name] = totals.get(name, 0) + value
+    lookups = totals["lookups"]
+
+    print(f"{len(traffic)} requests, {len(set(traffic))} distinct texts, {args.workers} workers\n")
+    print(f"{'scheme':<34} {'model calls':>11} {'hit rate':>9} {'local':>7} {'redis':>7} {'lookup ms':>10}")
+    print(f"{'hash() per process (old)':<34} {legacy_calls:>11} {1 - legacy_calls / len(traffic):>9.1%} "
+          f"{'-':>7} {'-':>7} {'-':>10}")
+    print(f"{'BLAKE2 two-tier (new)':<34} {calls:>11} {1 - calls / len(traffic):>9.1%} "
+          f"{totals['local_hits'] / lookups:>7.1%} {totals['redis_hits'] / lookups:>7.1%} "
+          f"{totals['lookup_seconds'] / lookups * 1000:>10.3f}")
+    print(f"\nreplay took {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
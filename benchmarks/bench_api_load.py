@@ -0,0 +1,83 @@
+"""
+Load test for the task API: requests/sec and latency percentiles under
+concurrent clients.
+
+Needs the API running against a local Redis; run it on both sides of a
+change to compare:
+
+    uvicorn main:app --port 8000 &
+    PYTHONPATH=. python benchmarks/bench_api_load.py --url http://localhost:8000 --concurrency 64
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def worker(client, task_ids, deadline, write_ratio, latencies, errors, rng):
+    while time.perf_counter() < deadline:
+        if rng.random() < write_ratio:
+            name = "POST /tasks"
+            request = client.post("/tasks", json={"description": "load test", "required_skills": ["python"]})
+        else:
+            name = "GET /tasks/{id}"
+            request = client.get(f"/tasks/{rng.choice(task_ids)}")
+        started = time.perf_counter()
+        try:
+            response = await request
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        latencies[name].append(time.perf_counter() - started)
+        if not ok:
+            errors[name] += 1
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+        task_ids = []
+        for _ in range(args.seed):
+            response = await client.post("/tasks", json={"description": "seed", "required_skills": ["python"]})
+            response.raise_for_status()
+            task_ids.append(response.json()["task_id"])
+
+        latencies, errors = defaultdict(list), defaultdict(int)
+        rng = random.Random(42)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            worker(client, task_ids, deadline, args.write_ratio, latencies, errors, random.Random(rng.random()))
+            for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    print(f"{'endpoint':<18} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    total = 0
+    for name, samples in sorted(latencies.items()):
+        total += len(samples)
+        print(f"{name:<18} {len(samples):>9} {len(samples) / elapsed:>9.1f} "
+              f"{statistics.median(samples) * 1000:>8.2f} {percentile(samples, 0.99) * 1000:>8.2f} {errors[name]:>7}")
+    all_samples = [s for samples in latencies.values() for s in samples]
+    if all_samples:
+        print(f"{'total':<18} {total:>9} {total / elapsed:>9.1f} "
+              f"{statistics.median(all_samples) * 1000:>8.2f} {percentile(all_samples, 0.99) * 1000:>8.2f} "
+              f"{sum(errors.values()):>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=20, help="tasks created before measuring")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="share of POST /tasks requests")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
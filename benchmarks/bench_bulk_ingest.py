@@ -0,0 +1,78 @@
+"""
+Task ingestion throughput: one POST /tasks per task from concurrent
+clients versus POST /tasks/bulk with a JSON array or an NDJSON stream.
+
+Needs the API running against a local Redis (and a Celery broker for the
+assignment dispatch):
+
+    uvicorn main:app --port 8000 &
+    PYTHONPATH=. python benchmarks/bench_bulk_ingest.py --url http://localhost:8000 --tasks 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+def payload(i: int):
+    return {"description": f"bulk ingest {i}", "required_skills": ["python"]}
+
+async def single(client, tasks: int, concurrency: int) -> int:
+    created = 0
+
+    async def worker(offset: int):
+        nonlocal created
+        for i in range(offset, tasks, concurrency):
+            response = await client.post("/tasks", json=payload(i))
+            created += response.status_code < 400
+
+    await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    return created
+
+async def bulk_array(client, tasks: int, batch: int) -> int:
+    created = 0
+    for start in range(0, tasks, batch):
+        response = await client.post("/tasks/bulk", json=[payload(i) for i in range(start, min(tasks, start + batch))])
+        created += response.json()["created"]
+    return created
+
+async def bulk_ndjson(client, tasks: int, batch: int) -> int:
+    async def lines(start: int, stop: int):
+        for i in range(start, stop):
+            yield (json.dumps(payload(i)) + "\n").encode()
+
+    created = 0
+    for start in range(0, tasks, batch):
+        response = await client.post("/tasks/bulk", content=lines(start, min(tasks, start + batch)),
+                                     headers={"Content-Type": "application/x-ndjson"})
+        created += response.json()["created"]
+    return created
+
+async def main_async(args):
+    runs = [
+        (f"POST /tasks x{args.concurrency} clients", lambda client: single(client, args.tasks, args.concurrency)),
+        (f"bulk JSON array, {args.batch}/request", lambda client: bulk_array(client, args.tasks, args.batch)),
+        (f"bulk NDJSON, {args.batch}/request", lambda client: bulk_ndjson(client, args.tasks, args.batch)),
+    ]
+    print(f"{args.tasks} tasks against {args.url}\n")
+    print(f"{'path':<34} {'created':>8} {'seconds':>8} {'tasks/s':>9}")
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=300, limits=limits) as client:
+        for name, run in runs:
+            started = time.perf_counter()
+            created = await run(client)
+            elapsed = time.perf_counter() - started
+            print(f"{name:<34} {created:>8} {elapsed:>8.2f} {created / elapsed:>9.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64, help="clients for the one-task-per-request path")
+    parser.add_argument("--batch", type=int, default=5000, help="tasks per bulk request")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
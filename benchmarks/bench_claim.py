@@ -0,0 +1,79 @@
+"""
+Compares the legacy per-candidate claim loop with the single EVALSHA claim.
+
+Worst case: every candidate except the last one is busy, so both paths have
+to walk the whole list. Run against a disposable Redis:
+
+    PYTHONPATH=. REDIS_URL=redis://localhost:6379/15 python benchmarks/bench_claim.py
+"""
+import argparse
+import os
+import statistics
+import time
+
+import redis
+
+from domain.models import Talent
+from domain.models.indexes import AvailabilityIndex
+from domain.services.claim import ClaimEngine
+
+def legacy_claim(redis_client: redis.Redis, candidates: list) -> str:
+    """The pre-script claim path: one HGETALL plus a lock per candidate."""
+    for talent_id in candidates:
+        talent = Talent.from_redis(redis_client, talent_id)
+        if talent and talent.available:
+            with redis_client.lock(f"talent:{talent_id}:lock", timeout=5):
+                if talent.available:
+                    redis_client.hset(f"talent:{talent_id}", "available", "false")
+                    return talent_id
+    return None
+
+def seed(redis_client: redis.Redis, count: int) -> list:
+    candidates = [f"bench_talent_{i}" for i in range(count)]
+    with redis_client.pipeline(transaction=False) as pipe:
+        for i, talent_id in enumerate(candidates):
+            pipe.hset(f"talent:{talent_id}", mapping={
+                "available": "true" if i == count - 1 else "false",
+                "rating": "4.0",
+                "skills": "[]",
+                "last_assigned_at": "",
+            })
+        pipe.execute()
+    AvailabilityIndex.rebuild(redis_client)
+    return candidates
+
+def reset_last(redis_client: redis.Redis, candidates: list) -> None:
+    AvailabilityIndex.stage(redis_client, candidates[-1], True)
+
+def measure(fn, redis_client, candidates, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        reset_last(redis_client, candidates)
+        start = time.perf_counter()
+        assert fn(candidates) == candidates[-1]
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/15"))
+    parser.add_argument("--sizes", default="10,100,500,1000")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    redis_client = redis.Redis.from_url(args.redis_url, decode_responses=True)
+    engine = ClaimEngine(redis_client)
+
+    print(f"{'candidates':>10} {'legacy ms':>10} {'script ms':>10} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        candidates = seed(redis_client, size)
+        try:
+            legacy = measure(lambda c: legacy_claim(redis_client, c), redis_client, candidates, args.rounds)
+            script = measure(engine.claim_first, redis_client, candidates, args.rounds)
+            print(f"{size:>10} {legacy * 1000:>10.2f} {script * 1000:>10.2f} {legacy / script:>7.1f}x")
+        finally:
+            redis_client.delete(*[f"talent:{t}" for t in candidates])
+            AvailabilityIndex.rebuild(redis_client)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Event publishing from concurrent API requests: PUBLISH per event (the old
+pub/sub path) versus the Streams bus (AsyncEventPublisher writing shared
+pipelines, EventConsumer reading with blocking XREADGROUP).
+
+Reports publish throughput, end-to-end latency to the consumer, and how
+many events survive when nobody is listening at publish time:
+
+    PYTHONPATH=. python benchmarks/bench_event_bus.py --events 20000 --concurrency 200
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import redis.asyncio
+
+from integrations.redis_events import AsyncEventPublisher, EventConsumer, RedisEventStream
+
+def summary(latencies):
+    if not latencies:
+        return "-", "-"
+    ordered = sorted(latencies)
+    return f"{statistics.median(ordered) * 1000:.2f}", f"{ordered[int(len(ordered) * 0.99) - 1] * 1000:.2f}"
+
+async def publish_all(publish, events: int, concurrency: int) -> float:
+    async def worker(offset: int):
+        for i in range(offset, events, concurrency):
+            await publish({"n": i, "sent": time.perf_counter()})
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    return time.perf_counter() - started
+
+async def run_pubsub(client, events: int, concurrency: int):
+    channel = f"bench-{uuid.uuid4().hex[:8]}"
+    pubsub = client.pubsub()
+    await pubsub.subscribe(channel)
+    latencies = []
+
+    async def listen():
+        # None also comes back for skipped subscribe confirmations, so stop only after a quiet second
+        last = time.perf_counter()
+        while len(latencies) < events and time.perf_counter() - last < 1.0:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+            if message is not None:
+                last = time.perf_counter()
+                latencies.append(last - json.loads(message["data"])["sent"])
+
+    listener = asyncio.create_task(listen())
+    elapsed = await publish_all(lambda data: client.publish(channel, json.dumps(data)), events, concurrency)
+    await listener
+    await pubsub.unsubscribe(channel)
+    return elapsed, latencies
+
+async def run_streams(client, events: int, concurrency: int):
+    channel = f"bench-{uuid.uuid4().hex[:8]}"
+    latencies = []
+    consumer = EventConsumer(
+        "bench", {channel: lambda data: latencies.append(time.perf_counter() - data["sent"])},
+        redis_client=client, count=1000, block_ms=100
+    )
+    await consumer.ensure_groups()
+
+    async def consume():
+        idle = 0
+        while len(latencies) < events and idle < 10:
+            idle = 0 if await consumer.read_once() else idle + 1
+
+    reader = asyncio.create_task(consume())
+    publisher = AsyncEventPublisher(redis_client=client)
+    publisher.start()
+    elapsed = await publish_all(lambda data: publisher.publish(channel, data), events, concurrency)
+    await publisher.close()
+    await reader
+    return elapsed, latencies, publisher.counters["batches"]
+
+async def late_listener(client, events: int):
+    """Publishes with nobody listening, then counts what a listener still gets."""
+    channel = f"bench-{uuid.uuid4().hex[:8]}"
+    for i in range(events):
+        await client.publish(channel, json.dumps({"n": i}))
+    pubsub = client.pubsub()
+    await pubsub.subscribe(channel)
+    pubsub_received = 0
+    for _ in range(5):
+        if await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1):
+            pubsub_received += 1
+
+    for i in range(events):
+        await RedisEventStream.apublish(client, channel, {"n": i})
+    received = []
+    consumer = EventConsumer("late", {channel: received.append}, redis_client=client, count=1000, block_ms=100)
+    await consumer.ensure_groups()
+    while await consumer.read_once():
+        pass
+    return pubsub_received, len(received)
+
+async def main_async(args):
+    client = redis.asyncio.Redis.from_url(args.redis_url, decode_responses=True)
+    print(f"{args.events} events from {args.concurrency} concurrent publishers\n")
+    print(f"{'path':<28} {'events/s':>10} {'round trips':>12} {'delivered':>10} {'p50 ms':>8} {'p99 ms':>8}")
+
+    elapsed, latencies = await run_pubsub(client, args.events, args.concurrency)
+    p50, p99 = summary(latencies)
+    print(f"{'PUBLISH per event':<28} {args.events / elapsed:>10.0f} {args.events:>12} "
+          f"{len(latencies):>10} {p50:>8} {p99:>8}")
+
+    elapsed, latencies, batches = await run_streams(client, args.events, args.concurrency)
+    p50, p99 = summary(latencies)
+    print(f"{'XADD pipelines + XREADGROUP':<28} {args.events / elapsed:>10.0f} {batches:>12} "
+          f"{len(latencies):>10} {p50:>8} {p99:>8}")
+
+    pubsub_received, stream_received = await late_listener(client, args.late)
+    print(f"\nlistener connecting after {args.late} events: pub/sub got {pubsub_received}, streams got {stream_received}")
+    await client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=200, help="concurrent publishing requests")
+    parser.add_argument("--late", type=int, default=1000, help="events published before the listener connects")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
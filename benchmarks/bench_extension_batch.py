@@ -0,0 +1,61 @@
+"""
+Model calls and per-item latency for extension evaluation with one prompt
+per request versus requests packed into shared prompts under a token
+budget, against the offline fake model. --drop-rate leaves items out of
+batched answers to exercise the single-item fallback.
+
+No Redis or API key needed:
+
+    PYTHONPATH=. python benchmarks/bench_extension_batch.py --requests 300 --budgets 0,1000,4000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from integrations.gemini import AsyncExtensionEvaluator
+from integrations.mock.gemini import FakeGenerativeModel
+
+REASONS = [
+    "I was sick with the flu and could not work for three days",
+    "Laptop broke, waiting for repair",
+    "Need more time",
+    "Power outage in my area since Monday",
+    "Family emergency",
+    "Underestimated the scope of the data migration",
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--budgets", default="0,1000,4000", help="batch token budgets; 0 is one prompt per request")
+    parser.add_argument("--max-items", type=int, default=25)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of items the fake model leaves out of batches")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    contexts = [f"{rng.choice(REASONS)} (task {i})" for i in range(args.requests)]
+    labels = [f"task-{i}" for i in range(args.requests)]
+
+    print(f"{args.requests} distinct requests, concurrency {args.concurrency}, latency {args.latency}s\n")
+    print(f"{'budget':>7} {'calls':>6} {'batches':>8} {'fallback':>9} {'saved':>6} {'item ms':>8} {'seconds':>8} {'approved':>9}")
+    for budget in (int(b) for b in args.budgets.split(",")):
+        model = FakeGenerativeModel(latency=args.latency, jitter=0, batch_drop_rate=args.drop_rate, seed=1)
+        evaluator = AsyncExtensionEvaluator(
+            model=model, max_concurrency=args.concurrency,
+            batch_token_budget=budget, batch_max_items=args.max_items
+        )
+        started = time.perf_counter()
+        results = asyncio.run(evaluator.evaluate_many(contexts, labels=labels))
+        elapsed = time.perf_counter() - started
+        stats = evaluator.stats()
+        approved = sum(1 for result in results if result and result.approved)
+        # Without batching every item waits for its own call
+        item_ms = stats["mean_item_latency_ms"] if budget else args.latency * 1000
+        print(f"{budget:>7} {stats['calls']:>6} {stats['batch_calls']:>8} {stats['fallback_items']:>9} "
+              f"{stats['calls_saved']:>6} {item_ms:>8.1f} {elapsed:>8.2f} {approved:>9}")
+
+if __name__ == "__main__":
+    main()
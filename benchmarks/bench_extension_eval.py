@@ -0,0 +1,69 @@
+"""
+Extension evaluation throughput against the offline fake model: one
+blocking call at a time (the per-task Celery path) versus the async
+evaluator with a concurrency limit and request coalescing.
+
+No Redis or API key needed:
+
+    PYTHONPATH=. python benchmarks/bench_extension_eval.py --requests 200 --latency 0.5
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from integrations.gemini import (
+    GENERATION_CONFIG, SAFETY_SETTINGS, AsyncExtensionEvaluator, ExtensionEvaluation, GeminiAIClient
+)
+from integrations.mock.gemini import FakeGenerativeModel
+
+REASONS = [
+    "I was sick with the flu",
+    "Laptop broke, waiting for repair",
+    "Need more time",
+    "Power outage in my area",
+    "Family emergency",
+    "Underestimated the scope",
+]
+
+def make_contexts(count: int, distinct: int, rng: random.Random):
+    pool = [f"{REASONS[i % len(REASONS)]} (case {i})" for i in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+def run_sequential(model, contexts):
+    for context in contexts:
+        prompt = GeminiAIClient._build_evaluation_prompt(context)
+        response = model.generate_content(prompt, generation_config=GENERATION_CONFIG, safety_settings=SAFETY_SETTINGS)
+        ExtensionEvaluation(**GeminiAIClient._parse_ai_response(response))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=120, help="distinct request contexts among the requests")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model latency in seconds")
+    parser.add_argument("--concurrency", default="1,8,32,64")
+    parser.add_argument("--sequential-max", type=int, default=40, help="requests timed for the sequential baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    contexts = make_contexts(args.requests, args.distinct, rng)
+
+    print(f"{'mode':<22} {'requests':>9} {'calls':>6} {'seconds':>8} {'req/s':>8}")
+    model = FakeGenerativeModel(latency=args.latency, jitter=0, seed=1)
+    sample = contexts[:args.sequential_max]
+    started = time.perf_counter()
+    run_sequential(model, sample)
+    elapsed = time.perf_counter() - started
+    print(f"{'sequential (blocking)':<22} {len(sample):>9} {model.calls:>6} {elapsed:>8.2f} {len(sample) / elapsed:>8.1f}")
+
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        model = FakeGenerativeModel(latency=args.latency, jitter=0, seed=1)
+        evaluator = AsyncExtensionEvaluator(model=model, max_concurrency=concurrency)
+        started = time.perf_counter()
+        asyncio.run(evaluator.evaluate_many(contexts))
+        elapsed = time.perf_counter() - started
+        name = f"async, limit {concurrency}"
+        print(f"{name:<22} {len(contexts):>9} {model.calls:>6} {elapsed:>8.2f} {len(contexts) / elapsed:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Worker time spent on extension evaluations through a Gemini outage: the
+old path (three attempts with a fixed 1s-style sleep between them) versus
+the shared circuit breaker, against the offline fake model.
+
+Three phases run back to back: healthy, outage (every call fails after
+--hang seconds, standing in for a timeout) and recovered. Requests arrive
+every --interval seconds. Breaker state lives in Redis:
+
+    PYTHONPATH=. python benchmarks/bench_gemini_breaker.py --requests 60 --hang 0.2
+"""
+import argparse
+import time
+import uuid
+
+import redis
+
+from integrations.circuit_breaker import CircuitBreaker
+from integrations.mock.gemini import FakeGenerativeModel
+
+PROMPT = "CONTEXT: I was sick Provide JSON"
+
+def legacy(model, retries: int, delay: float):
+    for attempt in range(1, retries + 1):
+        try:
+            return model.generate_content(PROMPT)
+        except Exception:
+            if attempt == retries:
+                return None
+            time.sleep(delay)
+
+def guarded(model, breaker: CircuitBreaker):
+    if not breaker.allow():
+        return "deferred"
+    started = time.perf_counter()
+    try:
+        response = model.generate_content(PROMPT)
+    except Exception:
+        breaker.record(False, time.perf_counter() - started)
+        return None
+    breaker.record(True, time.perf_counter() - started)
+    return response
+
+def run_phase(call, model, requests: int, interval: float):
+    calls_before = model.calls
+    busy = 0.0
+    answered = deferred = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        result = call()
+        elapsed = time.perf_counter() - started
+        busy += elapsed
+        if result == "deferred":
+            deferred += 1
+        elif result is not None:
+            answered += 1
+        time.sleep(max(0.0, interval - elapsed))
+    return busy, model.calls - calls_before, answered, deferred
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=60, help="requests per phase")
+    parser.add_argument("--latency", type=float, default=0.02, help="healthy model latency in seconds")
+    parser.add_argument("--hang", type=float, default=0.2, help="time until a failing call errors out")
+    parser.add_argument("--delay", type=float, default=0.1, help="legacy retry sleep")
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--open-seconds", type=float, default=1.0)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    args = parser.parse_args()
+
+    client = redis.Redis.from_url(args.redis_url, decode_responses=True)
+    phases = [("healthy", args.latency, 0.0), ("outage", args.hang, 1.0), ("recovered", args.latency, 0.0)]
+
+    print(f"{'mode':<8} {'phase':<10} {'worker s':>9} {'calls':>6} {'answered':>9} {'deferred':>9}")
+    for mode in ("retry", "breaker"):
+        model = FakeGenerativeModel(latency=args.latency, jitter=0, seed=1)
+        breaker = CircuitBreaker(f"bench-{uuid.uuid4().hex[:8]}", client, window=50, min_calls=10,
+                                 open_seconds=args.open_seconds)
+        if mode == "retry":
+            call = lambda: legacy(model, 3, args.delay)
+        else:
+            call = lambda: guarded(model, breaker)
+        for phase, latency, failure_rate in phases:
+            model.latency, model.failure_rate = latency, failure_rate
+            busy, calls, answered, deferred = run_phase(call, model, args.requests, args.interval)
+            print(f"{mode:<8} {phase:<10} {busy:>9.2f} {calls:>6} {answered:>9} {deferred:>9}")
+
+if __name__ == "__main__":
+    main()
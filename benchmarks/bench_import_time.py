@@ -0,0 +1,81 @@
+"""
+Cold-start import time of the API app and the Celery worker, measured with
+`python -X importtime` in fresh interpreters.
+
+Reports the median total per process over several runs, whether any of the
+heavy optional dependencies got imported, and the slowest modules by
+cumulative time:
+
+    PYTHONPATH=. python benchmarks/bench_import_time.py --runs 5 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# What each process imports before it can serve: the worker also loads its task modules
+TARGETS = {
+    "api": "import main",
+    "worker": "from config.celery import app; app.loader.import_default_modules()",
+}
+# Imported on first use only; none of these should load at startup
+HEAVY_MODULES = ("google.generativeai", "numpy", "IPython")
+
+def profile(code: str, cwd=None) -> List[Tuple[str, int, int, int]]:
+    """Runs code in a fresh interpreter and returns (module, depth, self us, cumulative us) per import."""
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd or ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), depth, int(own), int(cumulative)))
+    return imports
+
+def total_ms(imports: List[Tuple[str, int, int, int]]) -> float:
+    # Top-level entries include everything imported beneath them
+    return sum(cumulative for _, depth, _, cumulative in imports if depth == 0) / 1000
+
+def heavy_imported(imports: List[Tuple[str, int, int, int]]) -> List[str]:
+    names = {name for name, _, _, _ in imports}
+    return [module for module in HEAVY_MODULES if module in names]
+
+def measure(code: str, runs: int) -> Dict:
+    totals, imports = [], []
+    for _ in range(runs):
+        imports = profile(code)
+        totals.append(total_ms(imports))
+    return {"median_ms": statistics.median(totals), "min_ms": min(totals), "imports": imports}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list per target")
+    args = parser.parse_args()
+
+    results = {target: measure(code, args.runs) for target, code in TARGETS.items()}
+    print(f"{'process':<8} {'median ms':>10} {'min ms':>8} {'modules':>8}  heavy imports")
+    for target, result in results.items():
+        heavy = ", ".join(heavy_imported(result["imports"])) or "-"
+        print(f"{target:<8} {result['median_ms']:>10.1f} {result['min_ms']:>8.1f} "
+              f"{len(result['imports']):>8}  {heavy}")
+
+    for target, result in results.items():
+        print(f"\n{target}: slowest modules by cumulative time (last run)")
+        print(f"{'module':<50} {'cumulative ms':>14} {'self ms':>8}")
+        slowest = sorted(result["imports"], key=lambda item: item[3], reverse=True)[:args.top]
+        for name, _, own, cumulative in slowest:
+            print(f"{name:<50} {cumulative / 1000:>14.1f} {own / 1000:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Per-call cost of a logger.info on the calling thread: the old synchronous
+JSON handler (datetime.now and json.dumps per record, file and console
+written inline) versus the faster formatter, the background queue handler,
+and the queue with the rate limit applied to a repeated message.
+
+Each mode writes to a rotating file in a temporary directory and a console
+stream on /dev/null. Queue modes also report how long the listener took to
+write out what was still queued when the calls returned:
+
+    PYTHONPATH=. python benchmarks/bench_logging.py --calls 20000
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime, timezone
+from logging.handlers import QueueListener, RotatingFileHandler
+
+from domain.utils.logging import BackgroundQueueHandler, JSONFormatter, RateLimitFilter, create_handlers
+
+class LegacyJSONFormatter(logging.Formatter):
+    """The formatter before this change, for comparison."""
+    def format(self, record):
+        log_entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno
+        }
+        if record.exc_info:
+            log_entry["exception"] = traceback.format_exc()
+        return json.dumps(log_entry)
+
+def legacy_handlers(log_dir, stream):
+    file_handler = RotatingFileHandler(os.path.join(log_dir, "legacy.log"), maxBytes=10 * 1024 * 1024, backupCount=5)
+    file_handler.setFormatter(LegacyJSONFormatter())
+    console_handler = logging.StreamHandler(stream)
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    return [file_handler, console_handler]
+
+def run(name, handlers, calls, structured, listener=None):
+    logger = logging.getLogger(f"bench.{name}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    for handler in handlers:
+        logger.addHandler(handler)
+    if listener is not None:
+        listener.start()
+
+    latencies = []
+    for i in range(calls):
+        task_id, talent_id = f"task_{i}", f"talent_{i % 50}"
+        started = time.perf_counter_ns()
+        if structured:
+            logger.info("Assigned task", extra={"task_id": task_id, "talent_id": talent_id})
+        else:
+            logger.info(f"Assigned {task_id} to {talent_id}")
+        latencies.append(time.perf_counter_ns() - started)
+
+    drained = time.perf_counter()
+    if listener is not None:
+        listener.stop()
+    drain_ms = (time.perf_counter() - drained) * 1000
+    for handler in handlers:
+        logger.removeHandler(handler)
+        handler.close()
+    latencies.sort()
+    return {
+        "mean": statistics.fmean(latencies) / 1000,
+        "p50": latencies[len(latencies) // 2] / 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] / 1000,
+        "drain_ms": drain_ms if listener is not None else None,
+    }
+
+def queued(log_dir, stream, queue_size, rate_limit=None):
+    handler = BackgroundQueueHandler(queue.Queue(queue_size))
+    if rate_limit is not None:
+        handler.addFilter(rate_limit)
+    previous = os.getcwd()
+    os.chdir(log_dir)
+    try:
+        targets = create_handlers("queued.log", stream)
+    finally:
+        os.chdir(previous)
+    return [handler], QueueListener(handler.queue, *targets, respect_handler_level=True), handler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--queue-size", type=int, default=100000)
+    parser.add_argument("--burst", type=int, default=50, help="rate limit: records per message per window")
+    parser.add_argument("--sample-every", type=int, default=100)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, "w") as stream:
+        results["sync, old formatter"] = run("legacy", legacy_handlers(log_dir, stream), args.calls, structured=False)
+
+        file_handler = RotatingFileHandler(os.path.join(log_dir, "sync.log"), maxBytes=10 * 1024 * 1024, backupCount=5)
+        file_handler.setFormatter(JSONFormatter())
+        console_handler = logging.StreamHandler(stream)
+        console_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        results["sync, JSONFormatter"] = run("sync", [file_handler, console_handler], args.calls, structured=True)
+
+        handlers, listener, handler = queued(log_dir, stream, args.queue_size)
+        results["queue"] = run("queue", handlers, args.calls, structured=True, listener=listener)
+        results["queue"]["dropped"] = handler.dropped
+
+        limit = RateLimitFilter(args.burst, window=60, sample_every=args.sample_every)
+        handlers, listener, handler = queued(log_dir, stream, args.queue_size, rate_limit=limit)
+        results["queue + rate limit"] = run("limited", handlers, args.calls, structured=True, listener=listener)
+        results["queue + rate limit"]["dropped"] = handler.dropped
+
+    print(f"{args.calls} logger.info calls, {sys.version.split()[0]}\n")
+    print(f"{'mode':<22} {'mean us':>8} {'p50 us':>8} {'p99 us':>8} {'drain ms':>9} {'dropped':>8}")
+    for mode, result in results.items():
+        drain = f"{result['drain_ms']:.1f}" if result["drain_ms"] is not None else "-"
+        print(f"{mode:<22} {result['mean']:>8.2f} {result['p50']:>8.2f} {result['p99']:>8.2f} "
+              f"{drain:>9} {result.get('dropped', '-'):>8}")
+
+if __name__ == "__main__":
+    main()
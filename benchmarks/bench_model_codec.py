@@ -0,0 +1,99 @@
+"""
+Per-object cost of Task/Talent hash encoding and decoding at schema
+version 1 (ISO timestamps, full pydantic validation, as records were
+loaded before the codec) and 2 (epoch millis, trusted construction).
+Reports microseconds per object and the memory allocated per object
+(tracemalloc, run separately from the timing).
+
+With --redis-url it also compares from_redis per id with the pipelined
+from_redis_many:
+
+    PYTHONPATH=. python benchmarks/bench_model_codec.py --objects 20000
+    PYTHONPATH=. python benchmarks/bench_model_codec.py --redis-url redis://localhost:6379/0
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from config import settings
+from domain.models import Talent, Task
+
+def sample_task(i: int) -> Task:
+    now = datetime.now()
+    return Task(task_id=f"task_{i}", status="assigned", assigned_to=f"talent_{i % 100}", claimed_at=now,
+                deadline=now + timedelta(hours=24), due_date=now + timedelta(hours=24),
+                required_skills=["python", "sql", "docker"], extension_status="pending",
+                extension_requested_at=now)
+
+def sample_talent(i: int) -> Talent:
+    return Talent(talent_id=f"talent_{i}", rating=4.5, skills=["python", "sql", "docker"],
+                  last_assigned_at=datetime.now())
+
+def encode_all(objects, version: int):
+    settings.MODEL_SCHEMA_VERSION = version
+    return [obj.changed_fields() for obj in objects]
+
+def per_object(run, count: int):
+    """Microseconds per object, and bytes allocated per object in a separate traced run."""
+    # Keeping thousands of new objects alive triggers collections that would dominate the timing
+    gc.collect()
+    gc.disable()
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    gc.enable()
+    tracemalloc.start()
+    result = run()
+    allocated = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return elapsed / count * 1e6, allocated / count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, default=20000)
+    parser.add_argument("--redis-url", help="also time from_redis against from_redis_many")
+    args = parser.parse_args()
+    n = args.objects
+
+    print(f"{n} objects per run\n")
+    print(f"{'model':<8} {'operation':<34} {'us/object':>10} {'bytes/object':>13}")
+    for name, make, load in (
+        ("Task", sample_task, lambda i, d: Task._from_hash(None, f"task_{i}", d)),
+        ("Talent", sample_talent, lambda i, d: Talent._from_hash(f"talent_{i}", d)),
+    ):
+        objects = [make(i) for i in range(n)]
+        rows = {}
+        for version in (1, 2):
+            us, allocated = per_object(lambda: encode_all(objects, version), n)
+            rows[version] = encode_all(objects, version)
+            print(f"{name:<8} {f'encode, schema {version}':<34} {us:>10.2f} {allocated:>13.0f}")
+        runs = (
+            ("decode, schema 1 (validated)", lambda: [load(i, d) for i, d in enumerate(rows[1])]),
+            ("decode, schema 2 (trusted)", lambda: [load(i, d) for i, d in enumerate(rows[2])]),
+        )
+        for label, run in runs:
+            us, allocated = per_object(run, n)
+            print(f"{name:<8} {label:<34} {us:>10.2f} {allocated:>13.0f}")
+    settings.MODEL_SCHEMA_VERSION = 2
+
+    if args.redis_url:
+        import redis
+        client = redis.Redis.from_url(args.redis_url, decode_responses=True)
+        count = min(n, 5000)
+        with client.pipeline(transaction=False) as pipe:
+            for i in range(count):
+                sample_task(i).stage_to_redis(pipe)
+            pipe.execute()
+        ids = [f"task_{i}" for i in range(count)]
+        print(f"\nloading {count} tasks from Redis")
+        for label, run in (("from_redis per id", lambda: [Task.from_redis(client, task_id) for task_id in ids]),
+                           ("from_redis_many", lambda: Task.from_redis_many(client, ids))):
+            started = time.perf_counter()
+            run()
+            print(f"{label:<20} {(time.perf_counter() - started) / count * 1e6:>10.2f} us/task")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Replays labelled extension requests through the local pre-classifier and
+reports, per confidence threshold, the fraction decided without the LLM,
+how often those decisions agree with the LLM's, and the time per request.
+
+Traffic is a JSONL file with "reason" and the LLM's "approved" decision on
+each line. Without --traffic a synthetic stream of paraphrased requests
+is used. The text model is trained on the first --train fraction and the
+rest is replayed:
+
+    PYTHONPATH=. python benchmarks/bench_preclassifier.py --traffic decisions.jsonl --thresholds 0.8,0.9,0.95
+"""
+import argparse
+import json
+import random
+import time
+
+from integrations.preclassifier import PreClassifier, TextClassifier
+
+APPROVED = [
+    "I was sick with the flu", "My laptop broke and is being repaired", "Power outage in my area",
+    "Family emergency, I had to travel", "In hospital since Monday", "Internet down for two days",
+    "My computer crashed and I lost the work", "Had surgery last week", "Doctor ordered bed rest",
+    "A relative passed away", "Flooding at home, no electricity", "Hard drive failed yesterday",
+]
+REJECTED = [
+    "Need more time", "I forgot about the deadline", "Too busy with other projects", "Just want extra time",
+    "Didn't get to it", "Was on vacation", "Underestimated the work", "Other tasks took priority",
+    "Not motivated this week", "Was procrastinating", "Wanted to watch the game", "Lost track of time",
+]
+PREFIXES = ["", "Hi, ", "Sorry, ", "Unfortunately ", "Hello team, "]
+SUFFIXES = ["", ".", " so I need a couple more days", ", please extend", " and could not finish", "!"]
+
+def synthetic(count: int, rng: random.Random, noise: float):
+    for _ in range(count):
+        approved = rng.random() < 0.5
+        reason = rng.choice(APPROVED if approved else REJECTED)
+        text = f"{rng.choice(PREFIXES)}{reason}{rng.choice(SUFFIXES)}"
+        # The LLM doesn't always agree with the obvious reading
+        yield text, approved if rng.random() >= noise else not approved
+
+def load_traffic(path: str):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if record.get("approved") is not None:
+                    yield record["reason"], bool(record["approved"])
+
+def replay(preclassifier: PreClassifier, examples):
+    decided = correct = 0
+    started = time.perf_counter()
+    for text, label in examples:
+        result = preclassifier.classify(text)
+        if result is not None:
+            decided += 1
+            correct += result["approved"] == label
+    elapsed = time.perf_counter() - started
+    return decided, correct, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--traffic", help="JSONL of reason/approved pairs to replay")
+    parser.add_argument("--requests", type=int, default=20000, help="synthetic requests")
+    parser.add_argument("--noise", type=float, default=0.03, help="synthetic share where the LLM disagrees")
+    parser.add_argument("--train", type=float, default=0.5, help="fraction used to train the text model")
+    parser.add_argument("--thresholds", default="0.7,0.8,0.9,0.95,0.99")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    examples = list(load_traffic(args.traffic)) if args.traffic else list(synthetic(args.requests, rng, args.noise))
+    split = int(len(examples) * args.train)
+    train, test = examples[:split], examples[split:]
+    started = time.perf_counter()
+    model = TextClassifier.train([text for text, _ in train], [label for _, label in train])
+    print(f"trained on {len(train)} requests in {time.perf_counter() - started:.2f}s, replaying {len(test)}\n")
+
+    print(f"{'tier':<20} {'threshold':>9} {'decided':>8} {'agree w/ LLM':>13} {'us/request':>11}")
+    for threshold in (float(t) for t in args.thresholds.split(",")):
+        for name, preclassifier in (("rules", PreClassifier(threshold=threshold)),
+                                    ("rules + classifier", PreClassifier(model=model, threshold=threshold))):
+            decided, correct, elapsed = replay(preclassifier, test)
+            agreement = f"{correct / decided:.1%}" if decided else "-"
+            print(f"{name:<20} {threshold:>9.2f} {decided / len(test):>8.1%} {agreement:>13} "
+                  f"{elapsed / len(test) * 1e6:>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Roster import/export throughput and memory: Talent.to_redis per talent
+(the only way to load talents before) versus the streaming roster import,
+validated and trusted, and the SCAN export.
+
+Each phase runs in a fresh process so its peak RSS is its own. Generates
+a synthetic CSV roster and needs a local Redis (the talent keys are
+overwritten):
+
+    PYTHONPATH=. python benchmarks/bench_roster.py --talents 500000 --baseline 20000
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import redis
+
+from domain.models import Talent
+from domain.services.roster import RosterService, peak_rss_mb
+
+SKILLS = [f"skill{i}" for i in range(200)]
+
+def write_roster(path: str, talents: int) -> None:
+    rng = random.Random(7)
+    with open(path, "w") as f:
+        f.write("talent_id,available,rating,skills,last_assigned_at\n")
+        for i in range(talents):
+            skills = ";".join(rng.sample(SKILLS, rng.randint(1, 6)))
+            f.write(f"talent{i},{str(rng.random() < 0.8).lower()},{rng.uniform(0, 5):.2f},{skills},\n")
+
+def baseline(client, path: str, limit: int):
+    rows = 0
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            if rows >= limit:
+                break
+            Talent(talent_id=row["talent_id"], available=row["available"] == "true", rating=float(row["rating"]),
+                   skills=row["skills"].split(";")).to_redis(client)
+            rows += 1
+    return rows
+
+def run_phase(name: str, redis_url: str, path: str, limit: int, queue) -> None:
+    client = redis.Redis.from_url(redis_url, decode_responses=True)
+    started = time.perf_counter()
+    if name == "to_redis per talent":
+        rows = baseline(client, path, limit)
+    elif name == "export (SCAN, NDJSON)":
+        with open(os.devnull, "w") as out:
+            rows = RosterService.export_roster(client, out, "ndjson")["rows"]
+    else:
+        with open(path, newline="") as f:
+            rows = RosterService.import_roster(client, f, "csv", trusted=name.startswith("trusted"))["rows"]
+    queue.put((rows, time.perf_counter() - started, peak_rss_mb()))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--talents", type=int, default=500000)
+    parser.add_argument("--baseline", type=int, default=20000, help="talents loaded one at a time")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "roster.csv")
+    write_roster(path, args.talents)
+    print(f"{args.talents} talents, {os.path.getsize(path) / 1e6:.1f} MB CSV\n")
+    print(f"{'phase':<24} {'rows':>8} {'seconds':>8} {'rows/s':>9} {'peak RSS MB':>12}")
+    context = multiprocessing.get_context("fork")
+    for name in ("to_redis per talent", "validated import", "trusted import", "export (SCAN, NDJSON)"):
+        queue = context.Queue()
+        process = context.Process(target=run_phase, args=(name, args.redis_url, path, args.baseline, queue))
+        process.start()
+        rows, elapsed, rss = queue.get()
+        process.join()
+        print(f"{name:<24} {rows:>8} {elapsed:>8.2f} {rows / elapsed:>9.0f} {rss:>12.1f}")
+    os.remove(path)
+
+if __name__ == "__main__":
+    main()
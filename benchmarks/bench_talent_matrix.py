@@ -0,0 +1,70 @@
+"""
+Measures TalentMatrix load and top-k scoring at 10k/100k/1M talents.
+
+Talents are synthetic (no Redis needed): each has a handful of skills drawn
+from a fixed vocabulary. A plain Python loop is timed alongside for the
+smaller sizes as a reference.
+
+    PYTHONPATH=. python benchmarks/bench_talent_matrix.py
+"""
+import argparse
+import random
+import statistics
+import time
+
+from domain.services.talent_matrix import TalentMatrix
+
+def python_top_k(talents, required, k, rating_weight=0.3):
+    required = set(required)
+    scored = []
+    for talent_id, skills, rating, available in talents:
+        overlap = len(required.intersection(skills))
+        if available and overlap:
+            scored.append((overlap / len(required) * (1 - rating_weight) + rating / 5 * rating_weight, talent_id))
+    scored.sort(reverse=True)
+    return scored[:k]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--vocabulary", type=int, default=500)
+    parser.add_argument("--skills-per-talent", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--python-max", type=int, default=100000, help="largest size for the pure Python reference")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = [f"skill_{i}" for i in range(args.vocabulary)]
+    queries = [rng.sample(vocabulary, 3) for _ in range(args.rounds)]
+
+    print(f"{'talents':>9} {'load s':>8} {'top-k ms':>9} {'python ms':>10} {'MB':>7}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        talents = [
+            (f"talent_{i}", rng.sample(vocabulary, args.skills_per_talent), rng.uniform(0, 5), rng.random() < 0.7)
+            for i in range(size)
+        ]
+        matrix = TalentMatrix()
+        started = time.perf_counter()
+        matrix.bulk_load(*zip(*talents))
+        load_time = time.perf_counter() - started
+
+        samples = []
+        for query in queries:
+            started = time.perf_counter()
+            matrix.top_k(query, args.top_k)
+            samples.append(time.perf_counter() - started)
+        vectorized = statistics.median(samples) * 1000
+
+        reference = "-"
+        if size <= args.python_max:
+            started = time.perf_counter()
+            for query in queries[:3]:
+                python_top_k(talents, query, args.top_k)
+            reference = f"{(time.perf_counter() - started) / 3 * 1000:.2f}"
+
+        megabytes = (matrix.skill_bits.nbytes + matrix.rating.nbytes + matrix.available.nbytes) / 1e6
+        print(f"{size:>9} {load_time:>8.2f} {vectorized:>9.2f} {reference:>10} {megabytes:>7.1f}")
+
+if __name__ == "__main__":
+    main()
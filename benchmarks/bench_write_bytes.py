@@ -0,0 +1,75 @@
+"""
+Bytes sent to Redis by the task writes behind common API calls, comparing
+the old full-hash rewrite with dirty-field partial writes.
+
+Counts the HSET payload (field names plus values); no Redis needed.
+
+    PYTHONPATH=. python benchmarks/bench_write_bytes.py --matches 500
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from domain.models import Task
+from domain.models.base import VERSION_FIELD
+
+def payload_bytes(mapping: dict) -> int:
+    return sum(len(k.encode()) + len(str(v).encode()) for k, v in mapping.items())
+
+def loaded_task(matches: int, extensions: int) -> Task:
+    """Builds a task in the state Task.from_redis would return it."""
+    task = Task(
+        task_id="task_bench",
+        assigned_to="talent_0",
+        status="assigned",
+        matches={f"talent_{i}": round(1 - i / matches, 4) for i in range(matches)},
+        extensions=[
+            {"requested_at": datetime.now().isoformat(), "reason": "Laptop broke, waiting for repair", "approved": False}
+            for _ in range(extensions)
+        ],
+        deadline=datetime.now() + timedelta(hours=24),
+        due_date=datetime.now() + timedelta(hours=24),
+    )
+    stored = {name: task.encode_field(name) for name in task._encoders}
+    task.mark_clean(stored)
+    return task
+
+def complete(task: Task) -> None:
+    task.status = "completed"
+
+def reject_extension(task: Task) -> None:
+    task.extension_status = "rejected"
+    task.extension_rejection_reason = "Rejected"
+
+def approve_extension(task: Task) -> None:
+    task.extension_status = "approved"
+    task.extension_rejection_reason = ""
+    task.deadline = datetime.now() + timedelta(hours=24)
+    task.due_date = task.deadline
+
+def mark_reassigning(task: Task) -> None:
+    task.status = "reassigning"
+
+CALLS = {
+    "POST /tasks/{id}/complete": complete,
+    "POST /tasks/{id}/process-extension (reject)": reject_extension,
+    "POST /tasks/{id}/process-extension (approve)": approve_extension,
+    "check_deadlines -> reassigning": mark_reassigning,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--matches", type=int, default=200)
+    parser.add_argument("--extensions", type=int, default=5)
+    args = parser.parse_args()
+
+    version_bytes = len(VERSION_FIELD) + 1
+    print(f"{'call':<46} {'full B':>8} {'partial B':>10} {'saved':>7}")
+    for name, apply in CALLS.items():
+        task = loaded_task(args.matches, args.extensions)
+        apply(task)
+        full = payload_bytes({field: task.encode_field(field) for field in task._encoders})
+        partial = payload_bytes(task.changed_fields()) + version_bytes
+        print(f"{name:<46} {full:>8} {partial:>10} {1 - partial / full:>6.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,27 @@
+import logging
 import os
-from venv import logger
+import time
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import (
+    setup_logging as celery_setup_logging, task_postrun, task_prerun, worker_init, worker_process_init,
+    worker_process_shutdown, worker_ready, worker_shutdown
+)
+from config.redis import get_redis, reset_pool
 from domain.utils.security import validate_task_payload
 from datetime import timedelta
+from config import settings
+from domain.utils.logging import logger, setup_logging
+from domain.utils.metrics import registry
 
-app = Celery('talent-match')
-app.config_from_object("config.settings", namespace="CELERY")
-
-# Autodiscover all task modules
-app.autodiscover_tasks([
+# Task modules are imported by the worker when it starts, not by every importer of the app
+app = Celery('talent-match', include=[
     "tasks.assignment",
-    "tasks.reassignment", 
+    "tasks.reassignment",
     "tasks.monitoring",
     "tasks.extensions"
 ])
+app.config_from_object("config.settings", namespace="CELERY")
 
 app.conf.update(
     # Broker and backend configuration
@@ -44,9 +51,9 @@ app.conf.update(
     
     # Scheduled tasks
     beat_schedule={
-        # Check for tasks needing reassignment every 10 minutes
+        # Fallback deadline sweep; skipped while a deadline scheduler holds its lock
         'check-expired-assignments': {
-            'task': 'tasks.reassignment.check_expired_assignments',
+            'task': 'tasks.monitoring.check_deadlines',
             'schedule': crontab(minute='*/10'),
             'options': {'queue': 'monitoring'}
         },
@@ -58,13 +65,20 @@ app.conf.update(
             'options': {'queue': 'monitoring'}
         },
         
-        # Process pending extensions every hour
+        # Evaluate pending extension requests in concurrent batches
         'process-pending-extensions': {
             'task': 'tasks.extensions.process_pending',
-            'schedule': crontab(minute=0, hour='*/1'),
+            'schedule': timedelta(seconds=settings.EXTENSION_DRAIN_INTERVAL),
             'options': {'queue': 'extensions'}
         },
         
+        # Drain the unassigned queue so no task waits longer than the batch latency
+        'assign-unassigned-batch': {
+            'task': 'tasks.assignment.assign_batch',
+            'schedule': timedelta(seconds=settings.ASSIGN_BATCH_MAX_LATENCY),
+            'options': {'queue': 'matching'}
+        },
+
         # Retry failed assignments every 15 minutes
         'retry-failed-assignments': {
             'task': 'tasks.assignment.retry_failed',
@@ -74,6 +88,59 @@ app.conf.update(
     }
 )
 
+@celery_setup_logging.connect
+def _setup_logging(loglevel=None, **kwargs):
+    # Replaces Celery's own logging setup, so workers log like the API
+    setup_logging(log_file="worker.log", level=loglevel or logging.INFO)
+
+@worker_process_init.connect
+def _reset_redis_pool(**kwargs):
+    # Each forked worker process opens its own connections
+    reset_pool()
+
+@worker_init.connect
+@worker_process_init.connect
+def _start_metrics_flusher(**kwargs):
+    # The main process (solo/threads pools) and each prefork child add their own counts to the totals
+    from integrations.metrics import start_flusher
+    start_flusher()
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def _stop_metrics_flusher(**kwargs):
+    from integrations.metrics import stop_flusher
+    stop_flusher()
+
+@worker_ready.connect
+def _build_availability_index(**kwargs):
+    # Talents saved before the availability indexes existed can't be matched until they are built
+    from domain.models.indexes import AvailabilityIndex
+    AvailabilityIndex.ensure_built(get_redis())
+
+@worker_ready.connect
+def _start_metrics_exporter(**kwargs):
+    if settings.METRICS_EXPORTER_PORT:
+        from integrations.metrics import start_exporter
+        start_exporter(settings.METRICS_EXPORTER_PORT)
+
+# Start times of the tasks running in this process, by task id
+_task_started = {}
+
+@task_prerun.connect
+def _task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+@task_postrun.connect
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    labels = {"task": task.name}
+    registry.counter("celery_tasks_total", "Celery tasks run, by final state",
+                     {**labels, "state": state or "UNKNOWN"}).inc()
+    if started is not None:
+        registry.histogram("celery_task_seconds", "Run time of Celery tasks", labels=labels).observe(
+            time.perf_counter() - started
+        )
+
 # Task with enhanced validation and error handling
 @app.task(
     bind=True,
@@ -1,11 +1,89 @@
 import redis
+import redis.asyncio
 import os
+from typing import Any, Dict, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_redis():
-    return redis.Redis.from_url(
-        os.getenv('REDIS_URL'),
-        decode_responses=True
-    )
\ No newline at end of file
+# One blocking pool per process: callers wait up to REDIS_POOL_TIMEOUT for a
+# free connection instead of opening more than REDIS_MAX_CONNECTIONS.
+_pool: Optional[redis.BlockingConnectionPool] = None
+_client: Optional[redis.Redis] = None
+_pool_pid: Optional[int] = None
+_async_pool: Optional[redis.asyncio.BlockingConnectionPool] = None
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+def pool_options() -> Dict[str, Any]:
+    """Connection pool settings shared by the sync and asyncio pools, from the environment."""
+    return {
+        "decode_responses": True,
+        "max_connections": int(os.getenv('REDIS_MAX_CONNECTIONS', '50')),
+        "timeout": float(os.getenv('REDIS_POOL_TIMEOUT', '5')),
+        "health_check_interval": int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', '30')),
+        "socket_keepalive": _env_flag('REDIS_SOCKET_KEEPALIVE', 'true'),
+        "socket_connect_timeout": float(os.getenv('REDIS_SOCKET_CONNECT_TIMEOUT', '5')),
+    }
+
+def redis_url() -> str:
+    return os.getenv('REDIS_URL', 'redis://redis:6379/0')
+
+def get_pool() -> redis.BlockingConnectionPool:
+    """Returns this process's connection pool, creating it on first use or after a fork."""
+    global _pool, _client, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = redis.BlockingConnectionPool.from_url(redis_url(), **pool_options())
+        _client = redis.Redis(connection_pool=_pool)
+        _pool_pid = os.getpid()
+    return _pool
+
+def reset_pool() -> None:
+    """Drops the pool inherited from a parent process (Celery worker_process_init).
+
+    The parent's sockets are left alone rather than closed, since the
+    parent still uses them.
+    """
+    global _pool, _client, _pool_pid
+    _pool = _client = _pool_pid = None
+
+def get_redis() -> redis.Redis:
+    """Returns the process-wide client; all callers share one connection pool."""
+    get_pool()
+    return _client
+
+def open_async_pool() -> redis.asyncio.BlockingConnectionPool:
+    """Creates the process-wide asyncio connection pool (called from the app lifespan)."""
+    global _async_pool
+    if _async_pool is None:
+        _async_pool = redis.asyncio.BlockingConnectionPool.from_url(redis_url(), **pool_options())
+    return _async_pool
+
+async def close_async_pool() -> None:
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.disconnect()
+        _async_pool = None
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """Returns a client on the shared asyncio pool; cheap, no connection is opened here."""
+    if _async_pool is None:
+        raise RuntimeError("Async Redis pool is not open; call open_async_pool() first")
+    return redis.asyncio.Redis(connection_pool=_async_pool)
+
+def _usage(pool) -> Dict[str, int]:
+    # Blocking pools pre-fill their queue with None slots; idle connections are the rest
+    queued = pool.pool.queue if hasattr(pool.pool, "queue") else pool.pool._queue
+    idle = sum(1 for connection in list(queued) if connection is not None)
+    created = len(pool._connections)
+    return {"max": pool.max_connections, "created": created, "in_use": created - idle, "idle": idle}
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """Connection usage of this process's pools."""
+    stats = {}
+    if _pool is not None and _pool_pid == os.getpid():
+        stats["sync"] = _usage(_pool)
+    if _async_pool is not None:
+        stats["async"] = _usage(_async_pool)
+    return stats
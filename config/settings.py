@@ -7,4 +7,90 @@ accept_content = ["json"]
 timezone = "UTC"
 enable_utc = True
 task_acks_late = True
-worker_prefetch_multiplier = 1
\ No newline at end of file
+worker_prefetch_multiplier = 1
+
+# Encoding of model hashes (domain.models.codec): 2 stores epoch-millis timestamps and marks
+# records for unvalidated loading; 1 keeps ISO timestamps for readers that predate it
+MODEL_SCHEMA_VERSION = int(os.getenv("MODEL_SCHEMA_VERSION", "2"))
+
+# Logging (domain.utils.logging): records are formatted and written on a background thread
+# through a queue of LOG_QUEUE_SIZE records (0 writes on the calling thread). A message logged
+# more than LOG_RATE_LIMIT_BURST times per LOG_RATE_LIMIT_WINDOW seconds is then sampled one in
+# LOG_SAMPLE_EVERY (0 drops the rest); a burst of 0 disables the limit. Warnings and errors always pass.
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_RATE_LIMIT_BURST = int(os.getenv("LOG_RATE_LIMIT_BURST", "50"))
+LOG_RATE_LIMIT_WINDOW = float(os.getenv("LOG_RATE_LIMIT_WINDOW", "10"))
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "100"))
+
+# Metrics (integrations.metrics): every process adds its counts to totals in Redis every
+# METRICS_FLUSH_INTERVAL seconds; GET /metrics and the worker exporter (on METRICS_EXPORTER_PORT,
+# 0 for none) serve those totals. Celery queue lengths are read from the broker, as in config/celery.py
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+METRICS_EXPORTER_PORT = int(os.getenv("METRICS_EXPORTER_PORT", "0"))
+METRICS_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+
+# Runtime type checks of @validate_input (domain.utils.decorators); false skips them everywhere
+VALIDATE_INPUT = os.getenv("VALIDATE_INPUT", "true").lower() in ("1", "true", "yes")
+
+# Batch assignment of the unassigned queue
+ASSIGN_BATCH_SIZE = int(os.getenv("ASSIGN_BATCH_SIZE", "500"))
+ASSIGN_BATCH_MAX_LATENCY = float(os.getenv("ASSIGN_BATCH_MAX_LATENCY", "5"))
+ASSIGN_BATCH_OPTIMAL_MAX_SIZE = int(os.getenv("ASSIGN_BATCH_OPTIMAL_MAX_SIZE", "50"))
+# Seconds a task that found no talent waits before it is matched again
+ASSIGN_BATCH_RETRY_DELAY = float(os.getenv("ASSIGN_BATCH_RETRY_DELAY", "30"))
+
+# Bulk task ingestion (POST /tasks/bulk): tasks per pipeline round trip and per request
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+BULK_MAX_TASKS = int(os.getenv("BULK_MAX_TASKS", "50000"))
+# Task listing (GET /tasks): index entries one filtered request may examine before returning a partial page
+TASK_LIST_MAX_EXAMINED = int(os.getenv("TASK_LIST_MAX_EXAMINED", "5000"))
+
+# Skill-based matching for tasks created without caller-supplied matches
+MATCHING_TOP_K = int(os.getenv("MATCHING_TOP_K", "50"))
+MATCHING_RATING_WEIGHT = float(os.getenv("MATCHING_RATING_WEIGHT", "0.3"))
+MATCHING_MAX_STALENESS = float(os.getenv("MATCHING_MAX_STALENESS", "300"))
+
+# Deadline processing: page size and the scheduler's leader lock lifetime
+DEADLINE_CHECK_CHUNK_SIZE = int(os.getenv("DEADLINE_CHECK_CHUNK_SIZE", "500"))
+DEADLINE_SCHEDULER_LOCK_TTL = float(os.getenv("DEADLINE_SCHEDULER_LOCK_TTL", "15"))
+# Seconds until a task sent for reassignment is checked again if it is still
+# reassigning; longer than reassign_task's own retries (3 x 120s)
+REASSIGN_RETRY_DELAY = float(os.getenv("REASSIGN_RETRY_DELAY", "600"))
+
+# Concurrent AI evaluation of pending extension requests (tasks.extensions.process_pending)
+EXTENSION_EVAL_CONCURRENCY = int(os.getenv("EXTENSION_EVAL_CONCURRENCY", "16"))
+EXTENSION_DRAIN_SIZE = int(os.getenv("EXTENSION_DRAIN_SIZE", "500"))
+EXTENSION_DRAIN_INTERVAL = float(os.getenv("EXTENSION_DRAIN_INTERVAL", "60"))
+# Requests packed into one prompt per call, up to this many estimated tokens; 0 disables batching
+EXTENSION_BATCH_TOKEN_BUDGET = int(os.getenv("EXTENSION_BATCH_TOKEN_BUDGET", "4000"))
+EXTENSION_BATCH_MAX_ITEMS = int(os.getenv("EXTENSION_BATCH_MAX_ITEMS", "25"))
+
+# AI evaluation cache (integrations.ai_cache): Redis and in-process tiers, in seconds
+AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", "3600"))
+AI_CACHE_NEGATIVE_TTL = int(os.getenv("AI_CACHE_NEGATIVE_TTL", "30"))
+AI_CACHE_LOCAL_SIZE = int(os.getenv("AI_CACHE_LOCAL_SIZE", "1024"))
+AI_CACHE_LOCAL_TTL = float(os.getenv("AI_CACHE_LOCAL_TTL", "300"))
+
+# Local pre-classifier in front of the LLM (integrations.preclassifier); the model file is optional
+PRECLASSIFIER_ENABLED = os.getenv("PRECLASSIFIER_ENABLED", "true").lower() in ("1", "true", "yes")
+PRECLASSIFIER_THRESHOLD = float(os.getenv("PRECLASSIFIER_THRESHOLD", "0.9"))
+PRECLASSIFIER_MODEL_PATH = os.getenv("PRECLASSIFIER_MODEL_PATH", "")
+
+# Gemini circuit breaker (integrations.circuit_breaker), shared by all processes through Redis
+GEMINI_BREAKER_WINDOW = int(os.getenv("GEMINI_BREAKER_WINDOW", "100"))
+GEMINI_BREAKER_MIN_CALLS = int(os.getenv("GEMINI_BREAKER_MIN_CALLS", "20"))
+GEMINI_BREAKER_ERROR_RATE = float(os.getenv("GEMINI_BREAKER_ERROR_RATE", "0.5"))
+GEMINI_BREAKER_SLOW_SECONDS = float(os.getenv("GEMINI_BREAKER_SLOW_SECONDS", "15"))
+GEMINI_BREAKER_OPEN_SECONDS = float(os.getenv("GEMINI_BREAKER_OPEN_SECONDS", "30"))
+# Adaptive call timeout: this multiple of the recent p99 latency, between the minimum and GEMINI_TIMEOUT
+GEMINI_TIMEOUT_MULTIPLIER = float(os.getenv("GEMINI_TIMEOUT_MULTIPLIER", "3"))
+GEMINI_MIN_TIMEOUT = float(os.getenv("GEMINI_MIN_TIMEOUT", "2"))
+
+# Event bus on Redis Streams (integrations.redis_events)
+EVENT_STREAM_MAXLEN = int(os.getenv("EVENT_STREAM_MAXLEN", "100000"))
+# Pending entries idle this long are reclaimed by another consumer of the group
+EVENT_CLAIM_IDLE_MS = int(os.getenv("EVENT_CLAIM_IDLE_MS", "60000"))
+EVENT_MAX_DELIVERIES = int(os.getenv("EVENT_MAX_DELIVERIES", "5"))
+# Live event endpoint: per-connection queue (oldest dropped when full) and keepalive interval in seconds
+EVENT_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE_SIZE", "256"))
+EVENT_SSE_HEARTBEAT = float(os.getenv("EVENT_SSE_HEARTBEAT", "15"))
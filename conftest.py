@@ -0,0 +1,27 @@
+import os
+import fakeredis
+import fakeredis.aioredis
+import pytest
+import redis
+import redis.asyncio
+import config.redis
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    """A client of an in-memory Redis (fakeredis, with Lua) that get_redis and get_async_redis also return.
+
+    The process-wide pools are replaced rather than get_redis, so modules that
+    imported it by name talk to the same server.
+    """
+    server = fakeredis.FakeServer()
+    pool = redis.BlockingConnectionPool(
+        connection_class=fakeredis.FakeRedisConnection, server=server, decode_responses=True
+    )
+    async_pool = redis.asyncio.BlockingConnectionPool(
+        connection_class=fakeredis.aioredis.FakeAsyncRedisConnection, server=server, decode_responses=True
+    )
+    monkeypatch.setattr(config.redis, "_pool", pool)
+    monkeypatch.setattr(config.redis, "_client", redis.Redis(connection_pool=pool))
+    monkeypatch.setattr(config.redis, "_pool_pid", os.getpid())
+    monkeypatch.setattr(config.redis, "_async_pool", async_pool)
+    return config.redis.get_redis()
@@ -0,0 +1,158 @@
+from typing import Any, Callable, ClassVar, Dict, Optional, Set, Tuple
+from pydantic import BaseModel, PrivateAttr
+import redis
+import redis.asyncio
+from config import settings
+from domain.models.codec import SCHEMA_FIELD, dumps
+
+VERSION_FIELD = "version"
+
+def encode_optional(value: Optional[str]) -> str:
+    return value or ""
+
+def encode_json(value: Any) -> str:
+    return dumps(value)
+
+def _default_maker(factory: Optional[Callable[[], Any]], default: Any) -> Callable[[], Any]:
+    if factory is not None:
+        return factory
+    if isinstance(default, (list, dict, set)):
+        return default.copy
+    return lambda: default
+
+_plans: Dict[type, Tuple] = {}
+
+def _construct_plan(cls: type) -> Tuple:
+    """(name, default maker) pairs for a model's fields and private attributes, cached per class."""
+    plan = _plans.get(cls)
+    if plan is None:
+        plan = _plans[cls] = (
+            [(name, _default_maker(info.default_factory, info.default)) for name, info in cls.model_fields.items()],
+            [(name, _default_maker(attr.default_factory, attr.default))
+             for name, attr in cls.__private_attributes__.items()],
+        )
+    return plan
+
+class ConcurrentUpdateError(Exception):
+    """Raised by to_redis(check_version=True) when the stored record changed since load."""
+
+class RedisModel(BaseModel):
+    """Base for models stored as Redis hashes that only write changed fields.
+
+    Assignments to persisted fields are tracked; containers that can be
+    mutated in place are compared against their serialized form at load time.
+    Every write bumps a version field used by the optional optimistic check.
+    """
+    _encoders: ClassVar[Dict[str, Callable[[Any], str]]] = {}
+    _mutable_fields: ClassVar[Tuple[str, ...]] = ()
+
+    _dirty: Set[str] = PrivateAttr(default_factory=set)
+    _persisted: bool = PrivateAttr(default=False)
+    _snapshot: Dict[str, str] = PrivateAttr(default_factory=dict)
+    _version: int = PrivateAttr(default=0)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in self._encoders:
+            self._dirty.add(name)
+        super().__setattr__(name, value)
+
+    @property
+    def version(self) -> int:
+        """The stored version this instance was loaded or last saved at."""
+        return self._version
+
+    def encode_field(self, name: str) -> str:
+        return self._encoders[name](getattr(self, name))
+
+    def changed_fields(self) -> Dict[str, str]:
+        """Returns the encoded fields that differ from what was loaded or last saved."""
+        if not self._persisted:
+            changed = {name: self.encode_field(name) for name in self._encoders}
+        else:
+            changed = {name: self.encode_field(name) for name in self._dirty if name in self._encoders}
+            for name in self._mutable_fields:
+                if name not in changed:
+                    encoded = self.encode_field(name)
+                    if encoded != self._snapshot.get(name):
+                        changed[name] = encoded
+        if changed:
+            # Every model write restamps the record with the codec version that wrote it
+            changed[SCHEMA_FIELD] = str(settings.MODEL_SCHEMA_VERSION)
+        return changed
+
+    @classmethod
+    def construct_trusted(cls, fields: Dict[str, Any]):
+        """Builds an instance from already well-typed values, without validation.
+
+        Cheaper than model_construct: defaults come from a per-class plan
+        worked out once, and only fields missing from `fields` use them.
+        """
+        field_defaults, private_defaults = _construct_plan(cls)
+        model = cls.__new__(cls)
+        object.__setattr__(model, "__dict__", {
+            name: fields[name] if name in fields else make() for name, make in field_defaults
+        })
+        object.__setattr__(model, "__pydantic_fields_set__", set(fields))
+        object.__setattr__(model, "__pydantic_extra__", None)
+        object.__setattr__(model, "__pydantic_private__", {name: make() for name, make in private_defaults})
+        return model
+
+    def mark_clean(self, stored: Dict[str, str]) -> None:
+        """Records the stored state after a load so later saves can diff against it."""
+        # Runs on every load: private attributes are read and set through
+        # pydantic's __getattr__/__setattr__, so update their storage directly
+        private = self.__pydantic_private__
+        private["_dirty"].clear()
+        private["_persisted"] = True
+        private["_snapshot"] = {name: stored[name] for name in self._mutable_fields if name in stored}
+        private["_version"] = int(stored.get(VERSION_FIELD) or 0)
+
+    def _write(self, redis_client: redis.Redis, key: str, changed: Dict[str, str],
+               stage: Callable, check_version: bool) -> None:
+        """Runs stage(pipe) and a version bump in one MULTI/EXEC.
+
+        With check_version the key is WATCHed and the stored version compared
+        to the loaded one, so a write racing ours raises ConcurrentUpdateError.
+        """
+        with redis_client.pipeline() as pipe:
+            if check_version:
+                pipe.watch(key)
+                self._check_version(key, pipe.hget(key, VERSION_FIELD))
+                pipe.multi()
+            stage(pipe)
+            pipe.hincrby(key, VERSION_FIELD, 1)
+            try:
+                results = pipe.execute()
+            except redis.WatchError as e:
+                raise ConcurrentUpdateError(f"{key} changed while saving") from e
+        self._mark_saved(changed, int(results[-1]))
+
+    async def _awrite(self, redis_client: redis.asyncio.Redis, key: str, changed: Dict[str, str],
+                      stage: Callable, check_version: bool) -> None:
+        """Async counterpart of _write; stage(pipe) only queues commands."""
+        async with redis_client.pipeline() as pipe:
+            if check_version:
+                await pipe.watch(key)
+                self._check_version(key, await pipe.hget(key, VERSION_FIELD))
+                pipe.multi()
+            stage(pipe)
+            pipe.hincrby(key, VERSION_FIELD, 1)
+            try:
+                results = await pipe.execute()
+            except redis.WatchError as e:
+                raise ConcurrentUpdateError(f"{key} changed while saving") from e
+        self._mark_saved(changed, int(results[-1]))
+
+    def _check_version(self, key: str, stored: Optional[str]) -> None:
+        stored_version = int(stored or 0)
+        if self._persisted and stored_version != self._version:
+            raise ConcurrentUpdateError(
+                f"{key} is at version {stored_version}, loaded at {self._version}"
+            )
+
+    def _mark_saved(self, changed: Dict[str, str], version: int) -> None:
+        """Records a completed write of the given encoded fields."""
+        self._dirty.clear()
+        self._persisted = True
+        self._snapshot.update({name: changed[name] for name in self._mutable_fields if name in changed})
+        self._version = version
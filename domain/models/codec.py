@@ -0,0 +1,51 @@
+from datetime import datetime
+import json
+from typing import Any, Dict, Optional
+from config import settings
+
+try:
+    import orjson
+except ImportError:  # optional speedup; the stdlib produces equivalent JSON
+    orjson = None
+
+# Hash field recording which codec wrote a record. Records at the current
+# version were encoded by the models themselves and are loaded without
+# validation; older or hand-written records go through full validation.
+SCHEMA_FIELD = "schema"
+SCHEMA_VERSION = 2
+
+def dumps(value: Any) -> str:
+    """Compact JSON text; kept text so it survives clients with decode_responses."""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, separators=(",", ":"))
+
+def loads(text: str) -> Any:
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+def encode_datetime(value: Optional[datetime]) -> str:
+    """Epoch milliseconds at schema version 2, ISO 8601 when writing for older readers."""
+    if not value:
+        return ""
+    if settings.MODEL_SCHEMA_VERSION >= 2:
+        return str(round(value.timestamp() * 1000))
+    return value.isoformat()
+
+def decode_datetime(text: Optional[str]) -> Optional[datetime]:
+    """Reads either encoding, since services also write timestamps into existing hashes."""
+    if not text:
+        return None
+    if text.isdigit():
+        return datetime.fromtimestamp(int(text) / 1000)
+    return datetime.fromisoformat(text)
+
+def decode_hash(data: Dict) -> Dict[str, str]:
+    """Returns the hash with str keys and values, whatever the client's decode_responses."""
+    if not data or isinstance(next(iter(data)), str):
+        return data
+    return {k.decode() if isinstance(k, bytes) else k: v.decode() if isinstance(v, bytes) else v
+            for k, v in data.items()}
+
+def is_trusted(decoded: Dict[str, str]) -> bool:
+    """Whether a record was written by the current codec and can skip validation."""
+    return decoded.get(SCHEMA_FIELD) == str(SCHEMA_VERSION)
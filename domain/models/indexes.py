@@ -0,0 +1,513 @@
+import math
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import redis
+import redis.asyncio
+from redis.commands.core import Script
+from domain.utils.logging import logger
+
+AVAILABLE_KEY = "talents:available"
+AVAILABLE_BY_RATING_KEY = "talents:available:by_rating"
+TALENT_CHANGES_CHANNEL = "talents:changes"
+# Suffix of the keys an availability rebuild in progress is writing, and the
+# mark left once the indexes have been built from the talent hashes
+AVAILABILITY_REBUILD_KEY = "talents:available:rebuild"
+AVAILABILITY_BUILT_KEY = "talents:available:built"
+# A rebuild that dies leaves its mark for at most this long
+AVAILABILITY_REBUILD_TTL = 3600
+DEADLINES_KEY = "assignments:active"
+DEADLINE_WAKEUP_CHANNEL = "deadlines:wakeup"
+# Task listing indexes: sorted sets with every score 0, so members are ordered
+# by task id (creation time for ULID ids) and paged with ZRANGEBYLEX
+TASKS_KEY = "tasks:all"
+
+def skill_key(skill: str) -> str:
+    return f"skill:{skill}:available"
+
+def task_status_key(status: str) -> str:
+    return f"tasks:status:{status}"
+
+def task_assignee_key(talent_id: str) -> str:
+    return f"tasks:assignee:{talent_id}"
+
+# Shared Lua helper that keeps the availability indexes in line with a talent
+# hash. Skill sets are derived from the hash's "skills" field, so callers only
+# need to know the talent id. Every call announces the talent on
+# TALENT_CHANGES_CHANNEL so in-memory views can refresh incrementally. While
+# AvailabilityIndex.rebuild runs, each change is applied to the indexes it is
+# building too, so a claim made during the rebuild isn't undone by its swap.
+INDEX_TALENT_LUA = """
+local function talent_index_fields(talent_key)
+    local fields = redis.call('HMGET', talent_key, 'rating', 'skills')
+    local ok, skills = pcall(cjson.decode, fields[2] or '[]')
+    if not ok or type(skills) ~= 'table' then
+        skills = {}
+    end
+    return tonumber(fields[1]) or 0, skills
+end
+local function index_into(suffix, available_key, rating_key, talent_id, available, rating, skills)
+    if available then
+        redis.call('SADD', available_key .. suffix, talent_id)
+        redis.call('ZADD', rating_key .. suffix, rating, talent_id)
+        for _, skill in ipairs(skills) do
+            redis.call('SADD', 'skill:' .. skill .. ':available' .. suffix, talent_id)
+        end
+        if suffix ~= '' and #skills > 0 then
+            redis.call('SADD', available_key .. suffix .. ':skills', unpack(skills))
+        end
+    else
+        redis.call('SREM', available_key .. suffix, talent_id)
+        redis.call('ZREM', rating_key .. suffix, talent_id)
+        for _, skill in ipairs(skills) do
+            redis.call('SREM', 'skill:' .. skill .. ':available' .. suffix, talent_id)
+        end
+    end
+end
+local function index_talent(talent_key, available_key, rating_key, talent_id, available)
+    local rating, skills = talent_index_fields(talent_key)
+    index_into('', available_key, rating_key, talent_id, available, rating, skills)
+    local rebuilding = redis.call('GET', '""" + AVAILABILITY_REBUILD_KEY + """')
+    if rebuilding then
+        index_into(rebuilding, available_key, rating_key, talent_id, available, rating, skills)
+    end
+    redis.call('PUBLISH', '""" + TALENT_CHANGES_CHANNEL + """', talent_id)
+end
+"""
+
+# KEYS[1] talent hash, KEYS[2] available set, KEYS[3] rating zset
+# ARGV[1] talent id, ARGV[2] one of:
+#   "true"/"false"  set the hash's available field and index accordingly
+#   "unindex"       drop the talent from every index, leaving the hash alone
+#   "reindex"       index from the hash's current available field
+SET_AVAILABILITY_SCRIPT = INDEX_TALENT_LUA + """
+local mode = ARGV[2]
+if mode == 'unindex' then
+    index_talent(KEYS[1], KEYS[2], KEYS[3], ARGV[1], false)
+    return 1
+end
+if mode == 'reindex' then
+    mode = redis.call('HGET', KEYS[1], 'available') or 'true'
+else
+    redis.call('HSET', KEYS[1], 'available', mode)
+end
+index_talent(KEYS[1], KEYS[2], KEYS[3], ARGV[1], mode == 'true')
+return 1
+"""
+
+# Passing the script as bytes lets the SHA be computed without a client, so a
+# single module-level Script can run on any client or pipeline.
+_set_availability = Script(None, SET_AVAILABILITY_SCRIPT.encode())
+
+# KEYS[1] available set, KEYS[2] rating zset, KEYS[3..] talent hashes with
+# their ids in ARGV[2..]; ARGV[1] rebuild suffix. Indexes each talent from its
+# hash into the rebuild's keys, reading and writing in one atomic step.
+REBUILD_BATCH_SCRIPT = INDEX_TALENT_LUA + """
+local count = 0
+for i = 3, #KEYS do
+    local available = redis.call('HGET', KEYS[i], 'available')
+    if available == 'true' or (not available and redis.call('EXISTS', KEYS[i]) == 1) then
+        local rating, skills = talent_index_fields(KEYS[i])
+        index_into(ARGV[1], KEYS[1], KEYS[2], ARGV[i - 1], true, rating, skills)
+        count = count + 1
+    end
+end
+return count
+"""
+
+# KEYS[1] available set, KEYS[2] rating zset; ARGV[1] rebuild suffix, ARGV[2..]
+# skill set keys found before the swap. Replaces the live indexes with the
+# rebuilt ones and returns the number of available talents, or -1 (dropping
+# the rebuilt keys) when the rebuild's mark expired or was taken over.
+SWAP_AVAILABILITY_SCRIPT = """
+local suffix = ARGV[1]
+local registry = KEYS[1] .. suffix .. ':skills'
+local built = {}
+for _, skill in ipairs(redis.call('SMEMBERS', registry)) do
+    built['skill:' .. skill .. ':available'] = true
+end
+if redis.call('GET', '""" + AVAILABILITY_REBUILD_KEY + """') ~= suffix then
+    for key in pairs(built) do
+        redis.call('DEL', key .. suffix)
+    end
+    redis.call('DEL', KEYS[1] .. suffix, KEYS[2] .. suffix, registry)
+    return -1
+end
+for i = 2, #ARGV do
+    if not built[ARGV[i]] then
+        redis.call('DEL', ARGV[i])
+    end
+end
+for key in pairs(built) do
+    if redis.call('EXISTS', key .. suffix) == 1 then
+        redis.call('RENAME', key .. suffix, key)
+    else
+        redis.call('DEL', key)
+    end
+end
+for i = 1, 2 do
+    if redis.call('EXISTS', KEYS[i] .. suffix) == 1 then
+        redis.call('RENAME', KEYS[i] .. suffix, KEYS[i])
+    else
+        redis.call('DEL', KEYS[i])
+    end
+end
+redis.call('DEL', registry, '""" + AVAILABILITY_REBUILD_KEY + """')
+redis.call('SET', '""" + AVAILABILITY_BUILT_KEY + """', 1)
+return redis.call('SCARD', KEYS[1])
+"""
+
+_rebuild_batch = Script(None, REBUILD_BATCH_SCRIPT.encode())
+_swap_availability = Script(None, SWAP_AVAILABILITY_SCRIPT.encode())
+
+def stage_script(pipe, script: Script, keys: List[str], args: List) -> None:
+    """Queues a script call on a sync or asyncio pipeline, or runs it on a sync client.
+
+    Both pipeline types load registered scripts before executing, so the
+    call can be staged without awaiting anything.
+    """
+    if not hasattr(pipe, "scripts"):
+        script(keys=keys, args=args, client=pipe)
+        return
+    pipe.scripts.add(script)
+    pipe.evalsha(script.sha, len(keys), *keys, *args)
+
+class AvailabilityIndex:
+    """Secondary indexes of available talents: global, per skill and by rating."""
+
+    @staticmethod
+    def _stage_mode(pipe, talent_id: str, mode: str) -> None:
+        stage_script(
+            pipe,
+            _set_availability,
+            keys=[f"talent:{talent_id}", AVAILABLE_KEY, AVAILABLE_BY_RATING_KEY],
+            args=[talent_id, mode]
+        )
+
+    @staticmethod
+    def stage(pipe, talent_id: str, available: bool) -> None:
+        """Queues an availability change (hash field plus indexes) on a pipeline."""
+        AvailabilityIndex._stage_mode(pipe, talent_id, str(available).lower())
+
+    @staticmethod
+    def stage_unindex(pipe, talent_id: str) -> None:
+        """Queues removal of a talent from all indexes, based on its stored skills."""
+        AvailabilityIndex._stage_mode(pipe, talent_id, "unindex")
+
+    @staticmethod
+    def stage_reindex(pipe, talent_id: str) -> None:
+        """Queues indexing of a talent from its stored hash."""
+        AvailabilityIndex._stage_mode(pipe, talent_id, "reindex")
+
+    @staticmethod
+    def available_candidates(redis_client: redis.Redis, candidates_key: str, limit: int = -1) -> List[str]:
+        """Returns the available talents in a scored candidate zset, best score first, intersected on the server."""
+        scratch = f"tmp:candidates:{uuid.uuid4().hex}"
+        with redis_client.pipeline() as pipe:
+            # The available set scores 1 per member; weight it 0 to keep match scores
+            pipe.zinterstore(scratch, {candidates_key: 1, AVAILABLE_KEY: 0})
+            pipe.zrevrange(scratch, 0, limit - 1 if limit > 0 else -1)
+            pipe.delete(scratch)
+            return pipe.execute()[1]
+
+    @staticmethod
+    def available_with_skills(redis_client: redis.Redis, skills: Iterable[str]) -> List[str]:
+        """Returns available talents that have every one of the given skills."""
+        keys = [skill_key(skill) for skill in skills]
+        return list(redis_client.sinter(keys)) if keys else list(redis_client.smembers(AVAILABLE_KEY))
+
+    @staticmethod
+    def rebuild(redis_client: redis.Redis, batch_size: int = 1000) -> Optional[int]:
+        """Regenerates all availability indexes from the talent hashes.
+
+        Talents are indexed into fresh keys that are swapped in atomically at
+        the end; availability changes made meanwhile are applied to both (see
+        INDEX_TALENT_LUA). Returns the number of available talents, or None
+        when another rebuild is already running.
+        """
+        suffix = f":rebuild:{uuid.uuid4().hex}"
+        if not redis_client.set(AVAILABILITY_REBUILD_KEY, suffix, nx=True, ex=AVAILABILITY_REBUILD_TTL):
+            logger.warning("Availability index rebuild already running, skipped")
+            return None
+
+        def flush(talent_ids: List[str]) -> None:
+            _rebuild_batch(
+                keys=[AVAILABLE_KEY, AVAILABLE_BY_RATING_KEY] + [f"talent:{talent_id}" for talent_id in talent_ids],
+                args=[suffix] + talent_ids,
+                client=redis_client
+            )
+
+        batch = []
+        for key in redis_client.scan_iter(match="talent:*", count=batch_size, _type="hash"):
+            key = key.decode() if isinstance(key, bytes) else key
+            batch.append(key.split(":", 1)[1])
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+        live_skill_keys = [
+            key.decode() if isinstance(key, bytes) else key
+            for key in redis_client.scan_iter(match=skill_key("*"), count=batch_size)
+        ]
+        indexed = _swap_availability(
+            keys=[AVAILABLE_KEY, AVAILABLE_BY_RATING_KEY], args=[suffix] + live_skill_keys, client=redis_client
+        )
+        if indexed < 0:
+            raise RuntimeError("Availability index rebuild lost its mark before the swap; run it again")
+        logger.info("Rebuilt availability indexes", extra={"talents": indexed})
+        return indexed
+
+    @staticmethod
+    def ensure_built(redis_client: redis.Redis, batch_size: int = 1000) -> Optional[int]:
+        """Builds the indexes if they never were, e.g. on the first start after upgrading.
+
+        Talents written before the indexes existed can't be matched or
+        claimed until then. Returns what rebuild returned, or None if the
+        indexes were already built.
+        """
+        if redis_client.exists(AVAILABILITY_BUILT_KEY):
+            return None
+        return AvailabilityIndex.rebuild(redis_client, batch_size=batch_size)
+
+# Shared Lua helper writing field/value pairs to a task hash. It moves the
+# task between the status and assignee indexes according to the stored
+# values before and after the write, so callers never read them first.
+UPDATE_TASK_LUA = """
+local function update_task(task_key, task_id, fields)
+    local before = redis.call('HMGET', task_key, 'status', 'assigned_to')
+    redis.call('HSET', task_key, unpack(fields))
+    local after = redis.call('HMGET', task_key, 'status', 'assigned_to')
+    redis.call('ZADD', 'tasks:all', 0, task_id)
+    local prefixes = {'tasks:status:', 'tasks:assignee:'}
+    for i = 1, 2 do
+        if before[i] and before[i] ~= '' and before[i] ~= after[i] then
+            redis.call('ZREM', prefixes[i] .. before[i], task_id)
+        end
+        if after[i] and after[i] ~= '' then
+            redis.call('ZADD', prefixes[i] .. after[i], 0, task_id)
+        end
+    end
+end
+"""
+
+# KEYS[1] task hash; ARGV[1] task id, ARGV[2..] field/value pairs to set.
+UPDATE_TASK_SCRIPT = UPDATE_TASK_LUA + """
+update_task(KEYS[1], ARGV[1], {unpack(ARGV, 2)})
+return 1
+"""
+
+_update_task = Script(None, UPDATE_TASK_SCRIPT.encode())
+
+class TaskIndex:
+    """Task ids by status and by assignee, plus all task ids, for cursor-paged listing."""
+
+    @staticmethod
+    def stage_update(pipe, task_id: str, fields: Dict[str, str]) -> None:
+        """Queues a task hash write that keeps the listing indexes in sync, on a pipeline."""
+        args = [task_id]
+        for name, value in fields.items():
+            args += [name, value]
+        stage_script(pipe, _update_task, keys=[f"task:{task_id}"], args=args)
+
+    @staticmethod
+    def key(status: Optional[str] = None, assigned_to: Optional[str] = None) -> str:
+        """The most selective index for the filters: assignee, then status, then all tasks."""
+        if assigned_to:
+            return task_assignee_key(assigned_to)
+        if status:
+            return task_status_key(status)
+        return TASKS_KEY
+
+    @staticmethod
+    async def apage(redis_client: redis.asyncio.Redis, key: str, after: Optional[str], count: int) -> List[str]:
+        """Returns up to count task ids of an index that sort after the given id."""
+        return await redis_client.zrangebylex(key, f"({after}" if after else "-", "+", start=0, num=count)
+
+    @staticmethod
+    def rebuild(redis_client: redis.Redis, batch_size: int = 1000) -> int:
+        """Regenerates the listing indexes from the task hashes."""
+        suffix = f":rebuild:{uuid.uuid4().hex}"
+        staged = set()
+        indexed = 0
+        batch = []
+
+        def flush(keys: List[str]) -> None:
+            with redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.hmget(key, "status", "assigned_to")
+                rows = pipe.execute()
+            with redis_client.pipeline(transaction=False) as pipe:
+                for key, (status, assigned_to) in zip(keys, rows):
+                    task_id = key.split(":", 1)[1]
+                    index_keys = [TASKS_KEY]
+                    if status:
+                        index_keys.append(task_status_key(status))
+                    if assigned_to:
+                        index_keys.append(task_assignee_key(assigned_to))
+                    for index_key in index_keys:
+                        staged.add(index_key)
+                        pipe.zadd(index_key + suffix, {task_id: 0})
+                pipe.execute()
+
+        # task:{id} hashes only; extensions and matches live in lists and sorted sets
+        for key in redis_client.scan_iter(match="task:*", count=batch_size, _type="hash"):
+            batch.append(key.decode() if isinstance(key, bytes) else key)
+            if len(batch) >= batch_size:
+                flush(batch)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            flush(batch)
+            indexed += len(batch)
+
+        stale = [
+            key.decode() if isinstance(key, bytes) else key
+            for pattern in (task_status_key("*"), task_assignee_key("*"))
+            for key in redis_client.scan_iter(match=pattern, count=batch_size)
+            if ":rebuild:" not in (key.decode() if isinstance(key, bytes) else key)
+        ]
+        # Swap the freshly built keys in atomically
+        with redis_client.pipeline() as pipe:
+            pipe.delete(TASKS_KEY, *stale)
+            for index_key in staged:
+                pipe.rename(index_key + suffix, index_key)
+            pipe.execute()
+
+        logger.info(f"Rebuilt task listing indexes for {indexed} tasks")
+        return indexed
+
+# Shared Lua helper (re)scheduling a task's deadline. The wakeup is published
+# only when the earliest deadline moves earlier; returns whether it was.
+TRACK_DEADLINE_LUA = """
+local function track_deadline(deadlines_key, task_id, due)
+    local earliest = redis.call('ZRANGE', deadlines_key, 0, 0, 'WITHSCORES')
+    redis.call('ZADD', deadlines_key, due, task_id)
+    if earliest[2] == nil or tonumber(due) < tonumber(earliest[2]) then
+        redis.call('PUBLISH', '""" + DEADLINE_WAKEUP_CHANNEL + """', due)
+        return 1
+    end
+    return 0
+end
+"""
+
+# KEYS[1] deadline index, KEYS[2] task hash, KEYS[3] event stream
+# ARGV[1] task id, ARGV[2] due score read by the caller, ARGV[3] task version
+# loaded by the caller ('' to skip the check), ARGV[4] event JSON ('' for
+# none), ARGV[5] stream max length, ARGV[6] score to re-track the entry at
+# ('' to remove it), ARGV[7..] task field/value pairs to set
+EXPIRE_DEADLINE_SCRIPT = UPDATE_TASK_LUA + TRACK_DEADLINE_LUA + """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not score or tonumber(score) ~= tonumber(ARGV[2]) then
+    return 0
+end
+if ARGV[3] ~= '' and (redis.call('HGET', KEYS[2], 'version') or '0') ~= ARGV[3] then
+    return 0
+end
+if ARGV[6] ~= '' then
+    track_deadline(KEYS[1], ARGV[1], ARGV[6])
+else
+    redis.call('ZREM', KEYS[1], ARGV[1])
+end
+if #ARGV > 6 then
+    update_task(KEYS[2], ARGV[1], {unpack(ARGV, 7)})
+    redis.call('HINCRBY', KEYS[2], 'version', 1)
+end
+if ARGV[4] ~= '' and tonumber(ARGV[5]) > 0 then
+    redis.call('XADD', KEYS[3], 'MAXLEN', '~', ARGV[5], '*', 'data', ARGV[4])
+elseif ARGV[4] ~= '' then
+    redis.call('XADD', KEYS[3], '*', 'data', ARGV[4])
+end
+return 1
+"""
+
+_expire_deadline = Script(None, EXPIRE_DEADLINE_SCRIPT.encode())
+
+# KEYS[1] deadline index; ARGV[1] task id, ARGV[2] due score
+TRACK_DEADLINE_SCRIPT = TRACK_DEADLINE_LUA + """
+return track_deadline(KEYS[1], ARGV[1], ARGV[2])
+"""
+
+_track_deadline = Script(None, TRACK_DEADLINE_SCRIPT.encode())
+
+class DeadlineIndex:
+    """Sorted set of tasks scored by due timestamp, read by check_deadlines."""
+
+    @staticmethod
+    def stage_track(pipe, task_id: str, due: datetime) -> None:
+        """Queues (re)scheduling of a task's deadline on a pipeline.
+
+        When it becomes the earliest deadline, the due timestamp is announced
+        on DEADLINE_WAKEUP_CHANNEL so a sleeping deadline scheduler can wake
+        up early for it; other deadlines don't concern the scheduler.
+        """
+        stage_script(pipe, _track_deadline, keys=[DEADLINES_KEY], args=[task_id, repr(due.timestamp())])
+
+    @staticmethod
+    def stage_untrack(pipe, *task_ids: str) -> None:
+        """Queues removal of tasks from the deadline index."""
+        if task_ids:
+            pipe.zrem(DEADLINES_KEY, *task_ids)
+
+    @staticmethod
+    def expired(redis_client: redis.Redis, now: datetime, limit: int) -> List[Tuple[str, float]]:
+        """Returns up to limit (task id, due timestamp) pairs whose deadline has passed, earliest first."""
+        return redis_client.zrangebyscore(
+            DEADLINES_KEY, "-inf", now.timestamp(), start=0, num=limit, withscores=True
+        )
+
+    @staticmethod
+    def stage_expire(pipe, task_id: str, due: float, version: Optional[int] = None,
+                     fields: Optional[Dict[str, str]] = None, event_stream: Optional[str] = None,
+                     event: Optional[str] = None, maxlen: int = 0, retrack: Optional[datetime] = None) -> None:
+        """Queues handling of an expired entry that only applies if nothing moved on since it was read.
+
+        The entry is removed, or moved to retrack when given, only while its
+        score is still the due timestamp read with it; a task re-tracked since
+        keeps its new deadline. With a version the task must also still be at
+        the version it was loaded at. fields are then written to the task
+        (bumping its version) and event added to event_stream. The script
+        returns 1 when applied, else 0.
+        """
+        args = [task_id, repr(float(due)), "" if version is None else str(version), event or "", maxlen,
+                "" if retrack is None else repr(retrack.timestamp())]
+        for name, value in (fields or {}).items():
+            args += [name, value]
+        stage_script(pipe, _expire_deadline, keys=[DEADLINES_KEY, f"task:{task_id}", event_stream or ""], args=args)
+
+    @staticmethod
+    async def aoverdue_page(redis_client: redis.asyncio.Redis, now: datetime, after: Optional[str],
+                            count: int) -> List[Tuple[str, str]]:
+        """Returns up to count (task id, cursor) pairs of overdue tasks, earliest due first.
+
+        A cursor is the due timestamp plus how many tasks with that exact
+        timestamp came before, since a batch assignment gives many tasks
+        the same deadline.
+        """
+        last, seen = DeadlineIndex.parse_cursor(after) if after else (None, 0)
+        rows = await redis_client.zrangebyscore(
+            DEADLINES_KEY, "-inf" if last is None else repr(last), now.timestamp(),
+            start=seen, num=count, withscores=True
+        )
+        page = []
+        for task_id, due in rows:
+            seen = seen + 1 if due == last else 1
+            last = due
+            page.append((task_id, f"{due!r}:{seen}"))
+        return page
+
+    @staticmethod
+    def parse_cursor(cursor: str) -> Tuple[float, int]:
+        """Splits an aoverdue_page cursor; raises ValueError when it isn't one."""
+        score, separator, skip = cursor.partition(":")
+        due, seen = float(score), int(skip) if separator else -1
+        if not math.isfinite(due) or seen < 0:
+            raise ValueError(f"invalid overdue cursor {cursor!r}")
+        return due, seen
+
+    @staticmethod
+    def next_due(redis_client: redis.Redis) -> Optional[float]:
+        """Returns the earliest due timestamp in the index, if any."""
+        earliest = redis_client.zrange(DEADLINES_KEY, 0, 0, withscores=True)
+        return earliest[0][1] if earliest else None
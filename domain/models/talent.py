@@ -1,49 +1,122 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import Field
+from typing import Callable, ClassVar, Dict, FrozenSet, List, Optional, Tuple
 import redis
+import redis.asyncio
 from datetime import datetime
+from domain.models.base import ConcurrentUpdateError, RedisModel, encode_json
+from domain.models.codec import decode_datetime, decode_hash, encode_datetime, is_trusted, loads
+from domain.models.indexes import AvailabilityIndex
 from domain.utils.logging import logger
-import json
 
-class Talent(BaseModel):
+class Talent(RedisModel):
     talent_id: str = Field(..., min_length=1)
     available: bool = True
     rating: float = Field(ge=0, le=5)
     last_assigned_at: Optional[datetime] = None
     skills: list[str] = []
 
+    _encoders = {
+        "available": lambda value: str(value).lower(),
+        "rating": str,
+        "skills": encode_json,
+        "last_assigned_at": encode_datetime,
+    }
+    _mutable_fields = ("skills",)
+    # Fields that feed the availability indexes
+    _indexed_fields: ClassVar[FrozenSet[str]] = frozenset({"available", "rating", "skills"})
+
     @classmethod
     def from_redis(cls, redis_client: redis.Redis, talent_id: str) -> Optional["Talent"]:
         try:
-            data = redis_client.hgetall(f"talent:{talent_id}")
-            if not data:
-                return None
-            decoded = {k.decode() if isinstance(k, bytes) else k:
-                   v.decode() if isinstance(v, bytes) else v
-                   for k, v in data.items()}
-            return cls(
-                talent_id=talent_id,
-                available=decoded.get("available", "true").lower() == "true",
-                rating=float(decoded.get("rating", 0)),
-                skills=json.loads(decoded.get("skills", "[]")),
-                last_assigned_at=datetime.fromisoformat(decoded["last_assigned_at"]) if decoded.get("last_assigned_at") else None
-            )
+            return cls._from_hash(talent_id, redis_client.hgetall(f"talent:{talent_id}"))
         except Exception as e:
             logger.error(f"Failed to load talent {talent_id}: {e}")
             return None
 
-    def to_redis(self, redis_client: redis.Redis) -> bool:
+    @classmethod
+    async def afrom_redis(cls, redis_client: redis.asyncio.Redis, talent_id: str) -> Optional["Talent"]:
+        try:
+            return cls._from_hash(talent_id, await redis_client.hgetall(f"talent:{talent_id}"))
+        except Exception as e:
+            logger.error(f"Failed to load talent {talent_id}: {e}")
+            return None
+
+    @classmethod
+    def from_redis_many(cls, redis_client: redis.Redis, talent_ids: List[str]) -> List[Optional["Talent"]]:
+        """Loads several talents in one pipeline, returned in the order of talent_ids."""
+        with redis_client.pipeline(transaction=False) as pipe:
+            for talent_id in talent_ids:
+                pipe.hgetall(f"talent:{talent_id}")
+            rows = pipe.execute()
+        talents = []
+        for talent_id, data in zip(talent_ids, rows):
+            try:
+                talents.append(cls._from_hash(talent_id, data))
+            except Exception as e:
+                logger.error(f"Failed to load talent {talent_id}: {e}")
+                talents.append(None)
+        return talents
+
+    @classmethod
+    def _from_hash(cls, talent_id: str, data: Dict) -> Optional["Talent"]:
+        if not data:
+            return None
+        decoded = decode_hash(data)
+        fields = dict(
+            talent_id=talent_id,
+            available=decoded.get("available", "true").lower() == "true",
+            rating=float(decoded.get("rating", 0)),
+            skills=loads(decoded.get("skills", "[]")),
+            last_assigned_at=decode_datetime(decoded.get("last_assigned_at"))
+        )
+        # Records written by the current codec are already well-typed, skip validation
+        talent = cls.construct_trusted(fields) if is_trusted(decoded) else cls(**fields)
+        talent.mark_clean(decoded)
+        return talent
+
+    def _pending_writes(self) -> Tuple[Dict[str, str], Callable]:
+        """Returns the changed fields and a function staging them, with index upkeep, on a pipeline."""
+        changed = self.changed_fields()
+        key = f"talent:{self.talent_id}"
+        reindex = not self._indexed_fields.isdisjoint(changed)
+
+        def stage(pipe):
+            if reindex:
+                # Drop index entries for the stored skills before they are overwritten
+                AvailabilityIndex.stage_unindex(pipe, self.talent_id)
+            pipe.hset(key, mapping=changed)
+            if reindex:
+                AvailabilityIndex.stage_reindex(pipe, self.talent_id)
+        return changed, stage
+
+    def to_redis(self, redis_client: redis.Redis, check_version: bool = False) -> bool:
+        """Writes the fields changed since load, keeping the availability indexes in sync.
+
+        With check_version=True a concurrent modification raises
+        ConcurrentUpdateError instead of being overwritten.
+        """
+        changed, stage = self._pending_writes()
+        if not changed:
+            return True
+        try:
+            self._write(redis_client, f"talent:{self.talent_id}", changed, stage, check_version)
+            return True
+        except ConcurrentUpdateError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to save talent {self.talent_id}: {e}")
+            return False
+
+    async def ato_redis(self, redis_client: redis.asyncio.Redis, check_version: bool = False) -> bool:
+        """Async counterpart of to_redis."""
+        changed, stage = self._pending_writes()
+        if not changed:
+            return True
         try:
-            redis_client.hset(
-                f"talent:{self.talent_id}",
-                mapping={
-                    "available": str(self.available).lower(),
-                    "rating": str(self.rating),
-                    "skills": json.dumps(self.skills),
-                    "last_assigned_at": self.last_assigned_at.isoformat() if self.last_assigned_at else ""
-                }
-            )
+            await self._awrite(redis_client, f"talent:{self.talent_id}", changed, stage, check_version)
             return True
+        except ConcurrentUpdateError:
+            raise
         except Exception as e:
             logger.error(f"Failed to save talent {self.talent_id}: {e}")
-            return False
\ No newline at end of file
+            return False
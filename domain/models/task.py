@@ -1,11 +1,53 @@
 from datetime import datetime
 import json
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from pydantic import PrivateAttr, model_serializer
+from domain.models.base import (
+    VERSION_FIELD, ConcurrentUpdateError, RedisModel, encode_json, encode_optional
+)
+from domain.models.codec import decode_datetime, decode_hash, encode_datetime, is_trusted, loads
+from domain.models.indexes import DeadlineIndex, TaskIndex, stage_script
 from domain.utils.logging import logger
-from pydantic import BaseModel
 import redis
+import redis.asyncio
+from redis.commands.core import Script
 
-class Task(BaseModel):
+# Stored outside the task hash in native structures and loaded on first access
+LAZY_FIELDS = ("extensions", "matches")
+
+# Tasks with an extension request awaiting AI evaluation
+PENDING_EXTENSIONS_KEY = "extensions:pending"
+
+def extensions_key(task_id: str) -> str:
+    """Redis list of JSON-encoded extension requests, oldest first."""
+    return f"task:{task_id}:extensions"
+
+def matches_key(task_id: str) -> str:
+    """Redis sorted set of candidate talents scored by match."""
+    return f"task:{task_id}:matches"
+
+# KEYS[1] task hash, KEYS[2] extensions list; ARGV[1] JSON-encoded request.
+# A task written before the native layout keeps its history in the hash's
+# "extensions" JSON field, which loads prefer over the list. That history is
+# moved to the front of the list first, so the request is appended after it
+# and no later save rebuilds the list without it. Returns the list length.
+APPEND_EXTENSION_SCRIPT = """
+local legacy = redis.call('HGET', KEYS[1], 'extensions')
+if legacy then
+    local ok, entries = pcall(cjson.decode, legacy)
+    if ok and type(entries) == 'table' then
+        for i = #entries, 1, -1 do
+            redis.call('LPUSH', KEYS[2], cjson.encode(entries[i]))
+        end
+    end
+    redis.call('HDEL', KEYS[1], 'extensions')
+end
+return redis.call('RPUSH', KEYS[2], ARGV[1])
+"""
+
+_append_extension = Script(None, APPEND_EXTENSION_SCRIPT.encode())
+
+class Task(RedisModel):
     task_id: str
     assigned_to: Optional[str] = None
     claimed_at: Optional[datetime] = None
@@ -13,11 +55,77 @@ class Task(BaseModel):
     status: str = "unassigned"
     extensions: List[Dict] = []
     matches: Dict[str, float] = {}
+    required_skills: List[str] = []
     due_date: Optional[datetime] = None
     extension_status: str = "none"  # "none", "pending", "approved", "rejected"
     extension_requested_at: Optional[datetime] = None
     extension_rejection_reason: Optional[str] = None
 
+    _encoders = {
+        "assigned_to": encode_optional,
+        "claimed_at": encode_datetime,
+        "deadline": encode_datetime,
+        "status": str,
+        "required_skills": encode_json,
+        "due_date": encode_datetime,
+        "extension_status": str,
+        "extension_requested_at": encode_datetime,
+        "extension_rejection_reason": encode_optional,
+    }
+    _mutable_fields = ("required_skills",)
+
+    _lazy_client: Optional[redis.Redis] = PrivateAttr(default=None)
+    _lazy_pending: Set[str] = PrivateAttr(default_factory=set)
+    # Legacy JSON hash fields still holding extensions/matches, removed on next save
+    _legacy_fields: Set[str] = PrivateAttr(default_factory=set)
+    _loaded_extensions: Optional[List[str]] = PrivateAttr(default=None)
+    _loaded_matches: Optional[Dict[str, float]] = PrivateAttr(default=None)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached when the field is missing from __dict__, i.e. still lazy
+        if name in LAZY_FIELDS and name in self.__pydantic_private__.get("_lazy_pending", ()):
+            self._load_lazy(name)
+            return self.__dict__[name]
+        return super().__getattr__(name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in LAZY_FIELDS:
+            self._dirty.add(name)
+            self._lazy_pending.discard(name)
+        super().__setattr__(name, value)
+
+    @model_serializer(mode="wrap")
+    def _serialize(self, handler):
+        self.load_lazy_fields()
+        return handler(self)
+
+    def _load_lazy(self, name: str) -> None:
+        if name == "extensions":
+            self._apply_lazy(name, self._lazy_client.lrange(extensions_key(self.task_id), 0, -1))
+        else:
+            self._apply_lazy(name, self._lazy_client.zrange(matches_key(self.task_id), 0, -1, withscores=True))
+
+    def _apply_lazy(self, name: str, raw: List) -> None:
+        """Fills a lazy field from its LRANGE (extensions) or ZRANGE WITHSCORES (matches) reply."""
+        if name == "extensions":
+            self._set_loaded_extensions([e.decode() if isinstance(e, bytes) else e for e in raw])
+        else:
+            self._set_loaded_matches({(k.decode() if isinstance(k, bytes) else k): v for k, v in raw})
+        self._lazy_pending.discard(name)
+
+    def _set_loaded_extensions(self, encoded: List[str]) -> None:
+        self.__dict__["extensions"] = [loads(entry) for entry in encoded]
+        self._loaded_extensions = encoded
+
+    def _set_loaded_matches(self, matches: Dict[str, float]) -> None:
+        self.__dict__["matches"] = matches
+        self._loaded_matches = dict(matches)
+
+    def load_lazy_fields(self) -> None:
+        """Loads any extensions/matches that have not been fetched yet."""
+        for name in list(self._lazy_pending):
+            self._load_lazy(name)
+
     def is_overdue(self) -> bool:
         # Use due_date if present, fallback to deadline for backward compatibility
         check_date = self.due_date or self.deadline
@@ -29,48 +137,269 @@ class Task(BaseModel):
 
     @classmethod
     def from_redis(cls, redis_client: redis.Redis, task_id: str) -> Optional["Task"]:
+        """Loads the task hash; extensions and matches are fetched on first access."""
+        try:
+            return cls._from_hash(redis_client, task_id, redis_client.hgetall(f"task:{task_id}"))
+        except Exception as e:
+            logger.error(f"Failed to load task {task_id}: {e}")
+            return None
+
+    @classmethod
+    async def afrom_redis(cls, redis_client: redis.asyncio.Redis, task_id: str) -> Optional["Task"]:
+        """Loads the task with its extensions and matches in a single round trip."""
         try:
-            data = redis_client.hgetall(f"task:{task_id}")
-            if not data:
-                return None
-            decoded = {k.decode() if isinstance(k, bytes) else k:
-                       v.decode() if isinstance(v, bytes) else v
-                       for k, v in data.items()}
-            return cls(
-                task_id=task_id,
-                assigned_to=decoded.get("assigned_to"),
-                claimed_at=datetime.fromisoformat(decoded["claimed_at"]) if decoded.get("claimed_at") else None,
-                deadline=datetime.fromisoformat(decoded["deadline"]) if decoded.get("deadline") else None,
-                status=decoded.get("status", "unassigned"),
-                extensions=json.loads(decoded.get("extensions", "[]")),
-                matches=json.loads(decoded.get("matches", "{}")),
-                due_date=datetime.fromisoformat(decoded["due_date"]) if decoded.get("due_date") else None,
-                extension_status=decoded.get("extension_status", "none"),
-                extension_requested_at=datetime.fromisoformat(decoded["extension_requested_at"]) if decoded.get("extension_requested_at") else None,
-                extension_rejection_reason=decoded.get("extension_rejection_reason")
-            )
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.hgetall(f"task:{task_id}")
+                pipe.lrange(extensions_key(task_id), 0, -1)
+                pipe.zrange(matches_key(task_id), 0, -1, withscores=True)
+                data, extensions, matches = await pipe.execute()
+            task = cls._from_hash(None, task_id, data)
+            if task:
+                for name, raw in (("extensions", extensions), ("matches", matches)):
+                    if name in task._lazy_pending:
+                        task._apply_lazy(name, raw)
+            return task
         except Exception as e:
             logger.error(f"Failed to load task {task_id}: {e}")
             return None
 
-    def to_redis(self, redis_client: redis.Redis) -> bool:
+    @classmethod
+    def from_redis_many(cls, redis_client: redis.Redis, task_ids: List[str]) -> List[Optional["Task"]]:
+        """Loads several task hashes in one pipeline, returned in the order of task_ids."""
+        with redis_client.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.hgetall(f"task:{task_id}")
+            rows = pipe.execute()
+        tasks = []
+        for task_id, data in zip(task_ids, rows):
+            try:
+                tasks.append(cls._from_hash(redis_client, task_id, data))
+            except Exception as e:
+                logger.error(f"Failed to load task {task_id}: {e}")
+                tasks.append(None)
+        return tasks
+
+    @classmethod
+    async def afrom_redis_many(cls, redis_client: redis.asyncio.Redis, task_ids: List[str]) -> List[Optional["Task"]]:
+        """Loads several tasks with their extensions and matches in one pipeline, in the order of task_ids."""
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.hgetall(f"task:{task_id}")
+                pipe.lrange(extensions_key(task_id), 0, -1)
+                pipe.zrange(matches_key(task_id), 0, -1, withscores=True)
+            rows = await pipe.execute()
+        tasks = []
+        for i, task_id in enumerate(task_ids):
+            data, extensions, matches = rows[3 * i:3 * i + 3]
+            try:
+                task = cls._from_hash(None, task_id, data)
+                if task:
+                    for name, raw in (("extensions", extensions), ("matches", matches)):
+                        if name in task._lazy_pending:
+                            task._apply_lazy(name, raw)
+                tasks.append(task)
+            except Exception as e:
+                logger.error(f"Failed to load task {task_id}: {e}")
+                tasks.append(None)
+        return tasks
+
+    @classmethod
+    def _from_hash(cls, redis_client: Optional[redis.Redis], task_id: str, data: Dict) -> Optional["Task"]:
+        if not data:
+            return None
+        decoded = decode_hash(data)
+        fields = dict(
+            task_id=task_id,
+            assigned_to=decoded.get("assigned_to"),
+            claimed_at=decode_datetime(decoded.get("claimed_at")),
+            deadline=decode_datetime(decoded.get("deadline")),
+            status=decoded.get("status", "unassigned"),
+            required_skills=loads(decoded.get("required_skills") or "[]"),
+            due_date=decode_datetime(decoded.get("due_date")),
+            extension_status=decoded.get("extension_status", "none"),
+            extension_requested_at=decode_datetime(decoded.get("extension_requested_at")),
+            extension_rejection_reason=decoded.get("extension_rejection_reason")
+        )
+        # Records written by the current codec are already well-typed, skip validation
+        task = cls.construct_trusted(fields) if is_trusted(decoded) else cls(**fields)
+        task.mark_clean(decoded)
+        task._attach_lazy(redis_client, decoded)
+        return task
+
+    def _attach_lazy(self, redis_client: redis.Redis, decoded: Dict[str, str]) -> None:
+        # On the load path, so private attributes are used straight from their storage
+        private = self.__pydantic_private__
+        private["_lazy_client"] = redis_client
+        legacy = private["_legacy_fields"]
+        # Records written before the native layout keep these as JSON hash fields
+        if "extensions" in decoded:
+            legacy.add("extensions")
+            self._set_loaded_extensions([json.dumps(e) for e in json.loads(decoded["extensions"] or "[]")])
+        if "matches" in decoded:
+            legacy.add("matches")
+            self._set_loaded_matches(json.loads(decoded["matches"] or "{}"))
+        for name in LAZY_FIELDS:
+            if name not in legacy:
+                del self.__dict__[name]
+                private["_lazy_pending"].add(name)
+
+    def _collection_writes(self) -> List[Callable]:
+        """Returns pipeline operations for extensions/matches changed since load."""
+        writes: List[Callable] = []
+        rewrite_all = not self._persisted
+
+        if "extensions" not in self._lazy_pending:
+            ext_key = extensions_key(self.task_id)
+            encoded = [json.dumps(entry) for entry in self.extensions]
+            loaded = self._loaded_extensions
+            if (rewrite_all or loaded is None or "extensions" in self._dirty
+                    or "extensions" in self._legacy_fields or len(encoded) < len(loaded)):
+                if self._persisted or encoded:
+                    writes.append(lambda pipe: pipe.delete(ext_key))
+                if encoded:
+                    writes.append(lambda pipe: pipe.rpush(ext_key, *encoded))
+            else:
+                for index, (old, new) in enumerate(zip(loaded, encoded)):
+                    if old != new:
+                        writes.append(lambda pipe, index=index, new=new: pipe.lset(ext_key, index, new))
+                if len(encoded) > len(loaded):
+                    appended = encoded[len(loaded):]
+                    writes.append(lambda pipe: pipe.rpush(ext_key, *appended))
+
+        if "matches" not in self._lazy_pending:
+            match_key = matches_key(self.task_id)
+            current = self.matches
+            loaded = self._loaded_matches
+            if (rewrite_all or loaded is None or "matches" in self._dirty
+                    or "matches" in self._legacy_fields):
+                if self._persisted or current:
+                    writes.append(lambda pipe: pipe.delete(match_key))
+                if current:
+                    writes.append(lambda pipe: pipe.zadd(match_key, dict(current)))
+            else:
+                removed = [talent_id for talent_id in loaded if talent_id not in current]
+                updated = {t: s for t, s in current.items() if loaded.get(t) != s}
+                if removed:
+                    writes.append(lambda pipe: pipe.zrem(match_key, *removed))
+                if updated:
+                    writes.append(lambda pipe: pipe.zadd(match_key, updated))
+
+        if self._legacy_fields:
+            legacy = list(self._legacy_fields)
+            writes.append(lambda pipe: pipe.hdel(f"task:{self.task_id}", *legacy))
+        return writes
+
+    def _deadline_writes(self, changed: Dict[str, str]) -> List[Callable]:
+        """Keeps the deadline index in line with due_date/deadline and completion."""
+        if self.status == "completed":
+            if "status" in changed:
+                return [lambda pipe: DeadlineIndex.stage_untrack(pipe, self.task_id)]
+            return []
+        if "deadline" not in changed and "due_date" not in changed:
+            return []
+        due = self.due_date or self.deadline
+        if due:
+            return [lambda pipe: DeadlineIndex.stage_track(pipe, self.task_id, due)]
+        if self._persisted:
+            return [lambda pipe: DeadlineIndex.stage_untrack(pipe, self.task_id)]
+        return []
+
+    def _extension_writes(self, changed: Dict[str, str]) -> List[Callable]:
+        """Keeps PENDING_EXTENSIONS_KEY in line with extension_status, so a decided request isn't evaluated."""
+        if "extension_status" not in changed:
+            return []
+        if self.extension_status == "pending":
+            return [lambda pipe: pipe.sadd(PENDING_EXTENSIONS_KEY, self.task_id)]
+        if self._persisted:
+            return [lambda pipe: pipe.srem(PENDING_EXTENSIONS_KEY, self.task_id)]
+        return []
+
+    def _pending_writes(self) -> Tuple[Dict[str, str], Callable]:
+        """Returns the changed hash fields and a function staging every write on a pipeline."""
+        changed = self.changed_fields()
+        writes = self._collection_writes() + self._deadline_writes(changed) + self._extension_writes(changed)
+        key = f"task:{self.task_id}"
+
+        def stage(pipe):
+            if "status" in changed or "assigned_to" in changed:
+                TaskIndex.stage_update(pipe, self.task_id, changed)
+            elif changed:
+                pipe.hset(key, mapping=changed)
+            for write in writes:
+                write(pipe)
+        return (changed, stage) if changed or writes else (changed, None)
+
+    def _mark_collections_saved(self) -> None:
+        if "extensions" not in self._lazy_pending:
+            self._loaded_extensions = [json.dumps(entry) for entry in self.extensions]
+        if "matches" not in self._lazy_pending:
+            self._loaded_matches = dict(self.matches)
+        self._legacy_fields.clear()
+
+    def to_redis(self, redis_client: redis.Redis, check_version: bool = False) -> bool:
+        """Writes the fields changed since load (all fields for a new task).
+
+        With check_version=True a concurrent modification raises
+        ConcurrentUpdateError instead of being overwritten.
+        """
+        changed, stage = self._pending_writes()
+        if stage is None:
+            return True
         try:
-            redis_client.hset(
-                f"task:{self.task_id}",
-                mapping={
-                    "assigned_to": self.assigned_to or "",
-                    "claimed_at": self.claimed_at.isoformat() if self.claimed_at else "",
-                    "deadline": self.deadline.isoformat() if self.deadline else "",
-                    "status": self.status,
-                    "extensions": json.dumps(self.extensions),
-                    "matches": json.dumps(self.matches),
-                    "due_date": self.due_date.isoformat() if self.due_date else "",
-                    "extension_status": self.extension_status,
-                    "extension_requested_at": self.extension_requested_at.isoformat() if self.extension_requested_at else "",
-                    "extension_rejection_reason": self.extension_rejection_reason or ""
-                }
-            )
+            self._write(redis_client, f"task:{self.task_id}", changed, stage, check_version)
+        except ConcurrentUpdateError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to save task {self.task_id}: {e}")
+            return False
+        self._mark_collections_saved()
+        return True
+
+    async def ato_redis(self, redis_client: redis.asyncio.Redis, check_version: bool = False) -> bool:
+        """Async counterpart of to_redis."""
+        changed, stage = self._pending_writes()
+        if stage is None:
             return True
+        try:
+            await self._awrite(redis_client, f"task:{self.task_id}", changed, stage, check_version)
+        except ConcurrentUpdateError:
+            raise
         except Exception as e:
             logger.error(f"Failed to save task {self.task_id}: {e}")
-            return False
\ No newline at end of file
+            return False
+        self._mark_collections_saved()
+        return True
+
+    def stage_to_redis(self, pipe) -> bool:
+        """Queues the pending writes on a caller's pipeline, for saving many tasks at once.
+
+        The caller executes the pipeline; the task counts as saved once staged.
+        Returns False when there was nothing to write.
+        """
+        changed, stage = self._pending_writes()
+        if stage is None:
+            return False
+        stage(pipe)
+        pipe.hincrby(f"task:{self.task_id}", VERSION_FIELD, 1)
+        self._mark_saved(changed, self._version + 1)
+        self._mark_collections_saved()
+        return True
+
+    @staticmethod
+    def stage_append_extension(pipe, task_id: str, request: Dict) -> None:
+        """Queues appending a request to a task's extension history, in O(1) once migrated."""
+        stage_script(pipe, _append_extension, keys=[f"task:{task_id}", extensions_key(task_id)],
+                     args=[json.dumps(request)])
+
+    @classmethod
+    def migrate_legacy_storage(cls, redis_client: redis.Redis, batch_size: int = 500) -> int:
+        """Moves JSON extensions/matches hash fields into their native list and zset."""
+        migrated = 0
+        for key in redis_client.scan_iter(match="task:*", count=batch_size, _type="hash"):
+            key = key.decode() if isinstance(key, bytes) else key
+            task = cls.from_redis(redis_client, key.split(":", 1)[1])
+            if task and task._legacy_fields:
+                if task.to_redis(redis_client):
+                    migrated += 1
+        logger.info(f"Migrated {migrated} tasks to native extensions/matches storage")
+        return migrated
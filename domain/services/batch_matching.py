@@ -0,0 +1,248 @@
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence, Tuple
+import redis
+import redis.asyncio
+from redis.commands.core import Script
+from config import settings
+from domain.models.base import VERSION_FIELD
+from domain.models.codec import encode_datetime
+from domain.models.task import matches_key
+from domain.models.indexes import (
+    AVAILABLE_KEY, AVAILABLE_BY_RATING_KEY, DEADLINES_KEY, INDEX_TALENT_LUA, TRACK_DEADLINE_LUA, UPDATE_TASK_LUA
+)
+from domain.services.matching import MatchingService
+from domain.utils.decorators import timed
+from domain.utils.logging import logger
+from integrations.redis_events import TASK_EVENTS_CHANNEL, stream_key
+
+UNASSIGNED_QUEUE = "tasks:unassigned"
+# Tasks that found no talent, scored by when they may rejoin the queue
+UNASSIGNED_RETRY_KEY = "tasks:unassigned:retry"
+
+# KEYS[1] retry zset, KEYS[2] unassigned queue; ARGV[1] now. Moves the retries
+# that are due to the tail of the queue in one step, so two workers never
+# both requeue the same task. Returns how many were moved.
+RELEASE_RETRIES_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+    redis.call('RPUSH', KEYS[2], unpack(due))
+end
+return #due
+"""
+
+_release_retries = Script(None, RELEASE_RETRIES_SCRIPT.encode())
+
+# Cost used for task/talent pairs that are not candidates of each other
+_FORBIDDEN = 1e9
+
+# KEYS[1] available set, KEYS[2] rating zset, KEYS[3] deadline index,
+# KEYS[4] event stream, then a talent hash and task hash per proposed pair.
+# ARGV[1] claimed_at, ARGV[2] due date (both encoded), ARGV[3] due score,
+# ARGV[4] stream max length, then task id, talent id and event JSON per pair.
+# A pair commits only while its task is still unassigned and its talent still
+# available: the talent is claimed and the task assigned, versioned, tracked
+# and announced in the same atomic step. Returns a 1/0 flag per pair.
+ASSIGN_MANY_SCRIPT = INDEX_TALENT_LUA + UPDATE_TASK_LUA + TRACK_DEADLINE_LUA + """
+local assigned = {}
+for i = 1, (#KEYS - 4) / 2 do
+    local talent_key, task_key = KEYS[3 + 2 * i], KEYS[4 + 2 * i]
+    local task_id, talent_id, event = ARGV[2 + 3 * i], ARGV[3 + 3 * i], ARGV[4 + 3 * i]
+    local ok = 0
+    if redis.call('HGET', task_key, 'status') == 'unassigned'
+            and redis.call('SISMEMBER', KEYS[1], talent_id) == 1 then
+        local available = redis.call('HGET', talent_key, 'available')
+        if available == 'true' or (not available and redis.call('EXISTS', talent_key) == 1) then
+            redis.call('HSET', talent_key, 'available', 'false')
+            update_task(task_key, task_id, {
+                'assigned_to', talent_id, 'claimed_at', ARGV[1], 'status', 'assigned',
+                'deadline', ARGV[2], 'due_date', ARGV[2], 'extension_status', 'none',
+                'extension_requested_at', '', 'extension_rejection_reason', ''
+            })
+            redis.call('HINCRBY', task_key, '""" + VERSION_FIELD + """', 1)
+            track_deadline(KEYS[3], task_id, ARGV[3])
+            redis.call('XADD', KEYS[4], 'MAXLEN', '~', ARGV[4], '*', 'data', event)
+            ok = 1
+        end
+        index_talent(talent_key, KEYS[1], KEYS[2], talent_id, false)
+    end
+    assigned[i] = ok
+end
+return assigned
+"""
+
+_assign_many = Script(None, ASSIGN_MANY_SCRIPT.encode())
+
+def solve_greedy(matches: Dict[str, Dict[str, float]]) -> Dict[str, str]:
+    """Assigns pairs in global descending score order, each talent at most once."""
+    edges = sorted(
+        ((score, order, task_id, talent_id)
+         for order, (task_id, candidates) in enumerate(matches.items())
+         for talent_id, score in candidates.items()),
+        key=lambda edge: (-edge[0], edge[1])
+    )
+    assignment: Dict[str, str] = {}
+    taken = set()
+    for _, _, task_id, talent_id in edges:
+        if task_id not in assignment and talent_id not in taken:
+            assignment[task_id] = talent_id
+            taken.add(talent_id)
+    return assignment
+
+def _hungarian(cost: List[List[float]]) -> List[Tuple[int, int]]:
+    """Minimum-cost assignment for a rows <= cols matrix (Kuhn-Munkres, O(n^2 m))."""
+    n, m = len(cost), len(cost[0])
+    inf = float("inf")
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = p[j0], inf, 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = cost[i0 - 1][j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j], way[j] = cur, j0
+                    if minv[j] < delta:
+                        delta, j1 = minv[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    return [(p[j] - 1, j - 1) for j in range(1, m + 1) if p[j]]
+
+def solve_optimal(matches: Dict[str, Dict[str, float]]) -> Dict[str, str]:
+    """Assigns pairs maximising the total match score (Hungarian method)."""
+    task_ids = [task_id for task_id, candidates in matches.items() if candidates]
+    talent_ids = sorted({talent_id for task_id in task_ids for talent_id in matches[task_id]})
+    if not task_ids:
+        return {}
+    cost = [[-matches[task_id].get(talent_id, -_FORBIDDEN) for talent_id in talent_ids] for task_id in task_ids]
+    transposed = len(task_ids) > len(talent_ids)
+    if transposed:
+        cost = [list(column) for column in zip(*cost)]
+    assignment = {}
+    for row, col in _hungarian(cost):
+        task_index, talent_index = (col, row) if transposed else (row, col)
+        task_id, talent_id = task_ids[task_index], talent_ids[talent_index]
+        if talent_id in matches[task_id]:
+            assignment[task_id] = talent_id
+    return assignment
+
+class BatchMatchingService:
+    @staticmethod
+    def enqueue(redis_client: redis.Redis, task_id: str) -> int:
+        """Adds a task to the unassigned queue and returns the queue length."""
+        return redis_client.rpush(UNASSIGNED_QUEUE, task_id)
+
+    @staticmethod
+    async def aenqueue(redis_client: redis.asyncio.Redis, task_id: str) -> int:
+        """Async counterpart of enqueue."""
+        return await redis_client.rpush(UNASSIGNED_QUEUE, task_id)
+
+    @staticmethod
+    def stage_enqueue(pipe, task_ids: Sequence[str]) -> None:
+        """Queues adding many tasks to the unassigned queue, in order, on a pipeline."""
+        pipe.rpush(UNASSIGNED_QUEUE, *task_ids)
+
+    @staticmethod
+    def defer(redis_client: redis.Redis, task_ids: Sequence[str], delay: float) -> None:
+        """Holds tasks back for delay seconds before they rejoin the unassigned queue."""
+        if task_ids:
+            ready = time.time() + delay
+            redis_client.zadd(UNASSIGNED_RETRY_KEY, {task_id: ready for task_id in task_ids})
+
+    @staticmethod
+    def release_due(redis_client: redis.Redis) -> int:
+        """Moves deferred tasks whose delay has passed back onto the unassigned queue."""
+        return int(_release_retries(keys=[UNASSIGNED_RETRY_KEY, UNASSIGNED_QUEUE], args=[repr(time.time())],
+                                    client=redis_client))
+
+    @staticmethod
+    def solve(matches: Dict[str, Dict[str, float]], optimal_max_size: int) -> Dict[str, str]:
+        """Solves the joint assignment, optimally when the problem is small enough."""
+        talents = {talent_id for candidates in matches.values() for talent_id in candidates}
+        if 0 < max(len(matches), len(talents)) <= optimal_max_size:
+            return solve_optimal(matches)
+        return solve_greedy(matches)
+
+    @staticmethod
+    @timed(name="batch_matching_assign_seconds")
+    def assign(redis_client: redis.Redis, task_ids: Sequence[str], optimal_max_size: int = 50) -> Tuple[Dict[str, str], List[str]]:
+        """Matches a batch of tasks jointly and commits the claims.
+
+        Returns the committed assignments and the task ids that should be
+        retried later. Tasks that stopped being unassigned since they were
+        read are left alone, and their talents are not claimed.
+        """
+        with redis_client.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.hmget(f"task:{task_id}", "status", "matches", "required_skills")
+                pipe.zrange(matches_key(task_id), 0, -1, withscores=True)
+            results = pipe.execute()
+
+        matches: Dict[str, Dict[str, float]] = {}
+        # Tasks matched by skills whose matching talents are all busy right now
+        waiting: List[str] = []
+        for task_id, (status, legacy_matches, raw_skills), scored in zip(task_ids, results[::2], results[1::2]):
+            if status != "unassigned":
+                continue
+            candidates = dict(scored) or (json.loads(legacy_matches) if legacy_matches else {})
+            required_skills = json.loads(raw_skills) if raw_skills else []
+            if not candidates and required_skills:
+                candidates = MatchingService.score_candidates(required_skills)
+                if not candidates:
+                    waiting.append(task_id)
+                    continue
+            if not candidates:
+                logger.warning("Dropping task from batch: no candidate matches", extra={"task_id": task_id})
+                continue
+            matches[task_id] = candidates
+
+        talent_ids = sorted({talent_id for candidates in matches.values() for talent_id in candidates})
+        if not talent_ids:
+            return {}, waiting
+        available = {
+            talent_id for talent_id, is_member in
+            zip(talent_ids, redis_client.smismember(AVAILABLE_KEY, talent_ids)) if is_member
+        }
+        matches = {
+            task_id: {t: s for t, s in candidates.items() if t in available}
+            for task_id, candidates in matches.items()
+        }
+
+        proposed = BatchMatchingService.solve(matches, optimal_max_size)
+        pairs = list(proposed.items())
+        assigned: Dict[str, str] = {}
+        if pairs:
+            now = datetime.now()
+            due = now + timedelta(seconds=30)
+            keys = [AVAILABLE_KEY, AVAILABLE_BY_RATING_KEY, DEADLINES_KEY, stream_key(TASK_EVENTS_CHANNEL)]
+            args = [encode_datetime(now), encode_datetime(due), repr(due.timestamp()), settings.EVENT_STREAM_MAXLEN]
+            for task_id, talent_id in pairs:
+                keys += [f"talent:{talent_id}", f"task:{task_id}"]
+                args += [task_id, talent_id,
+                         json.dumps({"event": "assigned", "task_id": task_id, "talent_id": talent_id})]
+            flags = _assign_many(keys=keys, args=args, client=redis_client)
+            assigned = {task_id: talent_id for (task_id, talent_id), ok in zip(pairs, flags) if int(ok)}
+
+        retry = [task_id for task_id in matches if task_id not in assigned] + waiting
+        return assigned, retry
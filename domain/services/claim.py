@@ -0,0 +1,50 @@
+from typing import Optional, Sequence
+import redis
+from redis.commands.core import Script
+from domain.models.indexes import AVAILABLE_KEY, AVAILABLE_BY_RATING_KEY, INDEX_TALENT_LUA
+from domain.utils.logging import logger
+
+# KEYS[1] available set, KEYS[2] rating zset, KEYS[3..] candidate talent hashes
+# (best match first) with their ids in ARGV. Busy talents are skipped through
+# the availability index without touching their hashes; the hash stays the
+# source of truth and stale index entries are dropped on the way. A hash
+# without an "available" field counts as available, mirroring
+# Talent.from_redis. Returns the 1-based index of the claimed talent, or 0.
+CLAIM_FIRST_SCRIPT = INDEX_TALENT_LUA + """
+for i = 3, #KEYS do
+    local talent_id = ARGV[i - 2]
+    if redis.call('SISMEMBER', KEYS[1], talent_id) == 1 then
+        local available = redis.call('HGET', KEYS[i], 'available')
+        if available == 'true' or (not available and redis.call('EXISTS', KEYS[i]) == 1) then
+            redis.call('HSET', KEYS[i], 'available', 'false')
+            index_talent(KEYS[i], KEYS[1], KEYS[2], talent_id, false)
+            return i - 2
+        end
+        index_talent(KEYS[i], KEYS[1], KEYS[2], talent_id, false)
+    end
+end
+return 0
+"""
+
+# The SHA is computed once per process; redis-py falls back to SCRIPT LOAD on NOSCRIPT
+_claim_first = Script(None, CLAIM_FIRST_SCRIPT.encode())
+
+class ClaimEngine:
+    """Atomically claims talents with a single server-side script call."""
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis = redis_client
+
+    def claim_first(self, talent_ids: Sequence[str]) -> Optional[str]:
+        """Claims the first available talent from an ordered candidate list."""
+        if not talent_ids:
+            return None
+        index = _claim_first(
+            keys=[AVAILABLE_KEY, AVAILABLE_BY_RATING_KEY] + [f"talent:{talent_id}" for talent_id in talent_ids],
+            args=list(talent_ids),
+            client=self.redis
+        )
+        if not index:
+            logger.info("No available talent among candidates", extra={"candidates": len(talent_ids)})
+            return None
+        return talent_ids[int(index) - 1]
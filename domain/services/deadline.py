@@ -1,9 +1,43 @@
 from datetime import datetime, timedelta
-from config.redis import get_redis
+from config.redis import get_async_redis, get_redis
 from domain.models import Task
+from domain.models.base import VERSION_FIELD
+from domain.models.codec import encode_datetime
+from domain.models.indexes import (
+    DEADLINES_KEY, TRACK_DEADLINE_LUA, UPDATE_TASK_LUA, DeadlineIndex, TaskIndex, stage_script
+)
+from domain.models.task import PENDING_EXTENSIONS_KEY, extensions_key
 from domain.utils.logging import logger
-from integrations.gemini import GeminiAIClient
+from integrations.gemini import ExtensionEvaluation, GeminiAIClient
+from integrations.redis_events import TASK_EVENTS_CHANNEL, stream_key
+from typing import Dict, Iterator, List, Tuple
+from config import settings
 import json
+import redis
+from redis.commands.core import Script
+
+# KEYS[1] task hash, KEYS[2] extensions history, KEYS[3] pending set,
+# KEYS[4] deadline index, KEYS[5] event stream
+# ARGV[1] task id, ARGV[2] history index of the evaluated request, ARGV[3] its
+# updated JSON, ARGV[4] new due score, ARGV[5] event JSON, ARGV[6] stream max
+# length, ARGV[7..] task field/value pairs. The outcome is only written while
+# the task is still pending on that very request, so a manual decision or a
+# newer request is never overwritten. Returns 1 when written, else 0.
+STORE_EVALUATION_SCRIPT = UPDATE_TASK_LUA + TRACK_DEADLINE_LUA + """
+if redis.call('HGET', KEYS[1], 'extension_status') ~= 'pending'
+        or redis.call('LLEN', KEYS[2]) - 1 ~= tonumber(ARGV[2]) then
+    return 0
+end
+update_task(KEYS[1], ARGV[1], {unpack(ARGV, 7)})
+redis.call('LSET', KEYS[2], ARGV[2], ARGV[3])
+redis.call('HINCRBY', KEYS[1], '""" + VERSION_FIELD + """', 1)
+redis.call('SREM', KEYS[3], ARGV[1])
+track_deadline(KEYS[4], ARGV[1], ARGV[4])
+redis.call('XADD', KEYS[5], 'MAXLEN', '~', ARGV[6], '*', 'data', ARGV[5])
+return 1
+"""
+
+_store_evaluation = Script(None, STORE_EVALUATION_SCRIPT.encode())
 
 class DeadlineService:
     @staticmethod
@@ -12,94 +46,173 @@ class DeadlineService:
         redis = get_redis()
         try:
             due = datetime.now() + timedelta(hours=24)
-            redis.hset(
-                f"task:{task_id}",
-                mapping={
-                    "deadline": due.isoformat(),
-                    "due_date": due.isoformat()
-                }
-            )
+            with redis.pipeline() as pipe:
+                pipe.hset(
+                    f"task:{task_id}",
+                    mapping={
+                        "deadline": encode_datetime(due),
+                        "due_date": encode_datetime(due)
+                    }
+                )
+                DeadlineIndex.stage_track(pipe, task_id, due)
+                pipe.execute()
             return True
         except Exception as e:
-            logger.error(f"Failed to set deadline for {task_id}: {e}")
+            logger.error("Failed to set deadline", extra={"task_id": task_id, "error": str(e)})
             return False
 
 class ExtensionService:
+    @staticmethod
+    def _stage_request(pipe, task_id: str, reason: str) -> None:
+        now = datetime.now()
+        TaskIndex.stage_update(pipe, task_id, {
+            "extension_status": "pending",
+            "extension_requested_at": encode_datetime(now),
+            "status": "extension_requested"
+        })
+        # Keeping history of extension requests
+        Task.stage_append_extension(pipe, task_id, {
+            "requested_at": now.isoformat(),
+            "reason": reason,
+            "approved": None
+        })
+        pipe.hincrby(f"task:{task_id}", VERSION_FIELD, 1)
+        pipe.sadd(PENDING_EXTENSIONS_KEY, task_id)
+
     @staticmethod
     def request_extension(task_id: str, reason: str) -> bool:
         """Submits an extension request and updates task fields."""
         redis = get_redis()
         try:
-            now = datetime.now()
-            redis.hset(
-                f"task:{task_id}",
-                mapping={
-                    "extension_status": "pending",
-                    "extension_requested_at": now.isoformat(),
-                    "status": "extension_requested"
-                }
-            )
-            # Optionally, keeping history of extension requests
-            extensions = redis.hget(f"task:{task_id}", "extensions")
-            extensions_list = json.loads(extensions) if extensions else []
-            extensions_list.append({
-                "requested_at": now.isoformat(),
-                "reason": reason,
-                "approved": None
-            })
-            redis.hset(f"task:{task_id}", "extensions", json.dumps(extensions_list))
+            with redis.pipeline() as pipe:
+                ExtensionService._stage_request(pipe, task_id, reason)
+                pipe.execute()
+            return True
+        except Exception as e:
+            logger.error("Extension request failed", extra={"task_id": task_id, "error": str(e)})
+            return False
+
+    @staticmethod
+    async def arequest_extension(task_id: str, reason: str) -> bool:
+        """Async counterpart of request_extension, on the shared asyncio pool."""
+        redis = get_async_redis()
+        try:
+            async with redis.pipeline() as pipe:
+                ExtensionService._stage_request(pipe, task_id, reason)
+                await pipe.execute()
             return True
         except Exception as e:
-            logger.error(f"Extension request failed for {task_id}: {e}")
+            logger.error("Extension request failed", extra={"task_id": task_id, "error": str(e)})
             return False
 
+    @staticmethod
+    def load_pending_requests(redis_client: redis.Redis, task_ids: List[str]) -> Dict[str, Tuple[int, Dict]]:
+        """Fetches the latest extension request of each task still awaiting evaluation.
+
+        Returns {task_id: (index in the history, request)}; tasks no longer
+        pending are dropped from PENDING_EXTENSIONS_KEY.
+        """
+        with redis_client.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.hget(f"task:{task_id}", "extension_status")
+                pipe.llen(extensions_key(task_id))
+                pipe.lindex(extensions_key(task_id), -1)
+            rows = pipe.execute()
+        pending, stale = {}, []
+        for i, task_id in enumerate(task_ids):
+            status, count, latest = rows[3 * i:3 * i + 3]
+            if status != "pending" or not latest:
+                stale.append(task_id)
+                continue
+            pending[task_id] = (count - 1, json.loads(latest))
+        if stale:
+            redis_client.srem(PENDING_EXTENSIONS_KEY, *stale)
+        return pending
+
+    @staticmethod
+    def stage_evaluation(pipe, task_id: str, latest_index: int, latest_req: Dict,
+                         evaluation: ExtensionEvaluation) -> None:
+        """Queues the outcome of an evaluated extension request on a pipeline.
+
+        The task, the evaluated entry of the extensions history and the
+        deadline index are updated together, and only if the request is
+        still pending and still the latest; the queued script returns 1 when
+        the outcome was written, else 0. A rejected task is due right away so
+        the next check_deadlines run dispatches its reassignment.
+        """
+        now = datetime.now()
+        if evaluation.approved:
+            # Extend due_date and deadline by 24h
+            new_due = now + timedelta(hours=24)
+            fields = {
+                "status": "assigned",
+                "due_date": encode_datetime(new_due),
+                "deadline": encode_datetime(new_due),
+                "extension_status": "approved",
+                "extension_requested_at": encode_datetime(now),
+                "extension_rejection_reason": ""
+            }
+            latest_req = {**latest_req, "approved": True, "decided_by": evaluation.source}
+        else:
+            fields = {
+                "extension_status": "rejected",
+                "extension_rejection_reason": evaluation.reason or "Rejected by AI",
+                "status": "reassigning"
+            }
+            latest_req = {
+                **latest_req, "approved": False, "rejection_reason": evaluation.reason or "Rejected by AI",
+                "decided_by": evaluation.source
+            }
+
+        event = {
+            "event": "extension_approved" if evaluation.approved else "extension_rejected",
+            "task_id": task_id, "decided_by": evaluation.source
+        }
+        args = [task_id, latest_index, json.dumps(latest_req),
+                repr((new_due if evaluation.approved else now).timestamp()), json.dumps(event),
+                settings.EVENT_STREAM_MAXLEN]
+        for name, value in fields.items():
+            args += [name, value]
+        stage_script(pipe, _store_evaluation, keys=[
+            f"task:{task_id}", extensions_key(task_id), PENDING_EXTENSIONS_KEY, DEADLINES_KEY,
+            stream_key(TASK_EVENTS_CHANNEL)
+        ], args=args)
+
+    @staticmethod
+    def decided_requests(redis_client: redis.Redis, batch_size: int = 500) -> Iterator[Tuple[str, bool]]:
+        """Yields (reason, approved) for every extension request the LLM decided.
+
+        Requests decided by the pre-classifier are skipped so it is never
+        trained on its own output.
+        """
+        for key in redis_client.scan_iter(match="task:*:extensions", count=batch_size, _type="list"):
+            for raw in redis_client.lrange(key, 0, -1):
+                request = json.loads(raw)
+                if request.get("approved") is not None and request.get("decided_by", "model") == "model":
+                    yield request["reason"], request["approved"]
+
     @staticmethod
     def evaluate_extension(task_id: str) -> bool:
         """Uses Gemini AI to approve/reject the latest extension request."""
         redis = get_redis()
         try:
-            extensions = redis.hget(f"task:{task_id}", "extensions")
-            extensions_list = json.loads(extensions) if extensions else []
-            if not extensions_list:
+            pending = ExtensionService.load_pending_requests(redis, [task_id])
+            if task_id not in pending:
                 return False
-            latest_req = extensions_list[-1]
+            latest_index, latest_req = pending[task_id]
 
             ai_client = GeminiAIClient()
             evaluation = ai_client.evaluate_extension(latest_req["reason"])
+            if evaluation is None:
+                return False
 
-            now = datetime.now()
-            if evaluation.approved:
-                # Extend due_date and deadline by 24h
-                new_due = now + timedelta(hours=24)
-                redis.hset(
-                    f"task:{task_id}",
-                    mapping={
-                        "status": "assigned",
-                        "due_date": new_due.isoformat(),
-                        "deadline": new_due.isoformat(),
-                        "extension_status": "approved",
-                        "extension_requested_at": now.isoformat(),
-                        "extension_rejection_reason": ""
-                    }
-                )
-                latest_req["approved"] = True
-            else:
-                redis.hset(
-                    f"task:{task_id}",
-                    mapping={
-                        "extension_status": "rejected",
-                        "extension_rejection_reason": evaluation.reason or "Rejected by AI",
-                        "status": "reassigning"
-                    }
-                )
-                latest_req["approved"] = False
-                latest_req["rejection_reason"] = evaluation.reason or "Rejected by AI"
-
-            # Update extensions history
-            extensions_list[-1] = latest_req
-            redis.hset(f"task:{task_id}", "extensions", json.dumps(extensions_list))
+            with redis.pipeline() as pipe:
+                ExtensionService.stage_evaluation(pipe, task_id, latest_index, latest_req, evaluation)
+                stored, = pipe.execute()
 
-            return True
+            if not stored:
+                logger.info("Extension request decided elsewhere, evaluation discarded", extra={"task_id": task_id})
+            return bool(stored)
         except Exception as e:
-            logger.error(f"AI extension evaluation failed for {task_id}: {e}")
-            return False
\ No newline at end of file
+            logger.error("AI extension evaluation failed", extra={"task_id": task_id, "error": str(e)})
+            return False
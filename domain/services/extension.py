@@ -1,5 +1,4 @@
 import os
-import google.generativeai as genai
 from domain.models import Task
 import json
 
@@ -9,6 +8,7 @@ class ExtensionService:
     @staticmethod
     def evaluate_request(task: Task, reason: str) -> dict:
         """Use Gemini API to evaluate extension requests and return decision and reason."""
+        import google.generativeai as genai
         genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
         model = genai.GenerativeModel('gemini-2.0-flash')
 
@@ -1,35 +1,98 @@
+import json
+from config import settings
 from config.redis import get_redis
-from domain.models import Talent, Task
-from typing import Optional
+from domain.models import Task
+from domain.models.task import matches_key
+from domain.models.indexes import AvailabilityIndex
+from domain.services.claim import ClaimEngine
+from typing import TYPE_CHECKING, Dict, List, Optional
+from domain.utils.decorators import timed
 from domain.utils.logging import logger
+from domain.utils.metrics import log_buckets, registry
+
+if TYPE_CHECKING:
+    from domain.services.talent_matrix import TalentMatrix
+
+_talent_matrix: Optional["TalentMatrix"] = None
+
+_candidates_scanned = registry.histogram(
+    "matching_candidates", "Candidates offered to the claim script per lookup", buckets=log_buckets(1, 100000, 5)
+)
+_claims = {
+    result: registry.counter("matching_claims_total", "Next-available lookups by result", {"result": result})
+    for result in ("claimed", "none_available", "no_candidates", "error")
+}
 
 class MatchingService:
     @staticmethod
+    def get_talent_matrix() -> "TalentMatrix":
+        """Returns the process-wide talent matrix, loading it on first use."""
+        global _talent_matrix
+        if _talent_matrix is None:
+            # Deferred so processes that never match (the API) don't import numpy
+            from domain.services.talent_matrix import TalentMatrix
+            matrix = TalentMatrix(rating_weight=settings.MATCHING_RATING_WEIGHT)
+            matrix.load(get_redis())
+            _talent_matrix = matrix
+        else:
+            _talent_matrix.refresh(max_staleness=settings.MATCHING_MAX_STALENESS)
+        return _talent_matrix
+
+    @staticmethod
+    def score_candidates(required_skills: List[str], limit: Optional[int] = None) -> Dict[str, float]:
+        """Scores available talents against the required skills, best first."""
+        if not required_skills:
+            return {}
+        matrix = MatchingService.get_talent_matrix()
+        return dict(matrix.top_k(required_skills, limit or settings.MATCHING_TOP_K))
+
+    @staticmethod
+    @timed(name="matching_next_available_seconds")
     def get_next_available(task_id: str) -> Optional[str]:
         """Finds the best available talent for a task (atomic operation)."""
         redis = get_redis()
         try:
-            task = Task.from_redis(redis, task_id)
-            if not task or not task.matches:
+            with redis.pipeline(transaction=False) as pipe:
+                pipe.zrevrange(matches_key(task_id), 0, -1)
+                pipe.hmget(f"task:{task_id}", "matches", "required_skills")
+                candidates, (legacy_matches, raw_skills) = pipe.execute()
+            if not candidates and legacy_matches:
+                # Task not yet migrated to the native matches zset
+                matches = json.loads(legacy_matches)
+                candidates = [talent_id for talent_id, _ in sorted(matches.items(), key=lambda x: -x[1])]
+            if not candidates:
+                # No caller-supplied matches: score talents by skills instead
+                matches = MatchingService.score_candidates(json.loads(raw_skills) if raw_skills else [])
+                candidates = list(matches)
+            if not candidates:
+                _claims["no_candidates"].inc()
                 return None
 
-            # Check talents in descending match score order
-            for talent_id, _ in sorted(task.matches.items(), key=lambda x: -x[1]):
-                talent = Talent.from_redis(redis, talent_id)
-                if talent and talent.available:
-                    # Atomic lock to prevent race conditions
-                    with redis.lock(f"talent:{talent_id}:lock", timeout=5):
-                        if talent.available:
-                            redis.hset(f"talent:{talent_id}", "available", "false")
-                            return talent_id
-            return None
+            # Ship the candidates in descending match score order and let
+            # Redis pick and mark the first available talent in one call
+            _candidates_scanned.observe(len(candidates))
+            talent_id = ClaimEngine(redis).claim_first(candidates)
+            _claims["claimed" if talent_id else "none_available"].inc()
+            return talent_id
         except Exception as e:
-            logger.error(f"Matching failed for {task_id}: {e}")
+            _claims["error"].inc()
+            logger.error("Matching failed", extra={"task_id": task_id, "error": str(e)})
             return None
     @staticmethod
+    def get_available_matches(task: Task, limit: int = -1) -> List[str]:
+        """Returns the task's currently available candidates, best match first."""
+        if not task:
+            return []
+        try:
+            return AvailabilityIndex.available_candidates(get_redis(), matches_key(task.task_id), limit)
+        except Exception as e:
+            logger.error("Available match lookup failed", extra={"task_id": task.task_id, "error": str(e)})
+            return []
+
+    @staticmethod
     def get_best_match(task: Task) -> Optional[str]:
         """Returns the talent_id with the highest match score for the given task."""
         if not task or not task.matches:
             return None
         # Return the talent_id with the highest score
-        return max(task.matches, key=task.matches.get)
\ No newline at end of file
+        return max(task.matches, key=task.matches.get)
@@ -0,0 +1,225 @@
+import csv
+import io
+import json
+import resource
+import time
+from itertools import islice
+from typing import Any, Dict, IO, Iterable, Iterator, List, Tuple
+import redis
+from pydantic import ValidationError
+from config import settings
+from domain.models.base import VERSION_FIELD
+from domain.models.codec import SCHEMA_FIELD, decode_datetime, dumps, encode_datetime
+from domain.models.indexes import AvailabilityIndex
+from domain.models.talent import Talent
+from domain.utils.logging import logger
+
+ROSTER_FORMATS = ("csv", "ndjson")
+ROSTER_FIELDS = ("talent_id", "available", "rating", "skills", "last_assigned_at")
+# Only the first errors are kept in an import report; the rest are counted
+MAX_REPORTED_ERRORS = 100
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("", "true", "1", "yes", "y"):
+        return True
+    if text in ("false", "0", "no", "n"):
+        return False
+    raise ValueError(f"invalid boolean {value!r}")
+
+def parse_skills(value: Any) -> List[str]:
+    """Skills as a JSON list, or in CSV a JSON array or semicolon-separated text."""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(skill) for skill in value]
+    text = str(value).strip()
+    if text.startswith("["):
+        return [str(skill) for skill in json.loads(text)]
+    return [skill.strip() for skill in text.split(";") if skill.strip()]
+
+def read_rows(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yields (line number, raw row): a dict per CSV record, or the text of each NDJSON line."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "ndjson":
+        for number, line in enumerate(lines, 1):
+            if line.strip():
+                yield number, line
+    else:
+        raise ValueError(f"Unknown roster format {fmt!r}, expected one of {ROSTER_FORMATS}")
+
+def encode_validated(row: Dict[str, Any]) -> Tuple[str, Dict[str, str]]:
+    """Builds a Talent from the row, so every field is checked, and returns its hash fields."""
+    talent = Talent(
+        talent_id=str(row.get("talent_id") or ""),
+        available=parse_bool(row.get("available", True)),
+        rating=row.get("rating"),
+        skills=parse_skills(row.get("skills")),
+        last_assigned_at=row.get("last_assigned_at") or None,
+    )
+    return talent.talent_id, talent.changed_fields()
+
+def encode_trusted(row: Dict[str, Any]) -> Tuple[str, Dict[str, str]]:
+    """Encodes the row straight to hash fields, in the same format as Talent, without validation.
+
+    The record is stamped with the codec version like any model write, so
+    reads take the same trusted path as for talents saved through Talent.
+    """
+    return str(row["talent_id"]), {
+        "available": "true" if parse_bool(row.get("available", True)) else "false",
+        "rating": str(float(row.get("rating") or 0)),
+        "skills": dumps(parse_skills(row.get("skills"))),
+        "last_assigned_at": encode_datetime(decode_datetime(row.get("last_assigned_at") or None)),
+        SCHEMA_FIELD: str(settings.MODEL_SCHEMA_VERSION),
+    }
+
+def parse_rows(rows: Iterable[Tuple[int, Any]], trusted: bool,
+               report: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """Yields (talent_id, hash fields) for each good row; bad rows are recorded in the report."""
+    encode = encode_trusted if trusted else encode_validated
+    for number, row in rows:
+        report["rows"] += 1
+        try:
+            if isinstance(row, str):
+                row = json.loads(row)
+            yield encode(row)
+        except (ValidationError, ValueError, TypeError, KeyError) as e:
+            report["failed"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                message = "; ".join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()
+                ) if isinstance(e, ValidationError) else str(e)
+                report["errors"].append({"line": number, "error": message})
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+class RosterService:
+    """Streams talent rosters in and out of Redis without holding them in memory."""
+
+    @staticmethod
+    def write_chunk(redis_client: redis.Redis, records: List[Tuple[str, Dict[str, str]]]) -> int:
+        """Writes talent hashes and their index entries in one pipeline round trip.
+
+        A talent being overwritten leaves the indexes of its old skills first.
+        Returns how many of the talents are available.
+        """
+        available = 0
+        with redis_client.pipeline(transaction=False) as pipe:
+            for talent_id, fields in records:
+                AvailabilityIndex.stage_unindex(pipe, talent_id)
+                pipe.hset(f"talent:{talent_id}", mapping=fields)
+                pipe.hincrby(f"talent:{talent_id}", VERSION_FIELD, 1)
+                is_available = fields.get("available", "true") == "true"
+                AvailabilityIndex.stage(pipe, talent_id, is_available)
+                available += is_available
+            pipe.execute()
+        return available
+
+    @staticmethod
+    def import_roster(redis_client: redis.Redis, lines: Iterable[str], fmt: str = "csv",
+                      trusted: bool = False, chunk_size: int = 1000) -> Dict[str, Any]:
+        """Imports a CSV or NDJSON roster, indexing each talent as it is written.
+
+        Rows flow through read -> parse -> chunked pipeline writes one chunk at
+        a time, so memory stays flat whatever the roster size. With trusted=True
+        rows skip pydantic validation. Existing talents are overwritten.
+        Returns a report with row counts, errors, rows/sec and peak RSS.
+        """
+        started = time.perf_counter()
+        report: Dict[str, Any] = {"rows": 0, "imported": 0, "failed": 0, "indexed": 0, "errors": []}
+        for chunk in chunked(parse_rows(read_rows(lines, fmt), trusted, report), chunk_size):
+            report["indexed"] += RosterService.write_chunk(redis_client, chunk)
+            report["imported"] += len(chunk)
+        elapsed = time.perf_counter() - started
+        report["seconds"] = round(elapsed, 3)
+        report["rows_per_sec"] = round(report["rows"] / elapsed, 1) if elapsed else 0.0
+        report["peak_rss_mb"] = round(peak_rss_mb(), 1)
+        logger.info(
+            f"Imported {report['imported']}/{report['rows']} roster rows ({report['failed']} failed) "
+            f"in {elapsed:.2f}s, {report['rows_per_sec']} rows/sec, peak RSS {report['peak_rss_mb']} MB"
+        )
+        return report
+
+    @staticmethod
+    def iter_roster(redis_client: redis.Redis, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Yields every talent as a row, reading SCAN batches with one pipelined round trip each."""
+        def load(keys: List[str]) -> Iterator[Dict[str, Any]]:
+            with redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.hmget(key, "available", "rating", "skills", "last_assigned_at")
+                rows = pipe.execute()
+            for key, (available, rating, skills, last_assigned_at) in zip(keys, rows):
+                yield {
+                    "talent_id": key.split(":", 1)[1],
+                    "available": available is None or str(available).lower() == "true",
+                    "rating": float(rating or 0),
+                    "skills": json.loads(skills or "[]"),
+                    # ISO 8601 whatever the stored encoding, for other tools
+                    "last_assigned_at": last_assigned_at and decode_datetime(last_assigned_at).isoformat() or "",
+                }
+
+        batch = []
+        for key in redis_client.scan_iter(match="talent:*", count=batch_size, _type="hash"):
+            batch.append(key.decode() if isinstance(key, bytes) else key)
+            if len(batch) >= batch_size:
+                yield from load(batch)
+                batch = []
+        if batch:
+            yield from load(batch)
+
+    @staticmethod
+    def export_lines(redis_client: redis.Redis, fmt: str = "csv", batch_size: int = 1000) -> Iterator[str]:
+        """Yields the roster as CSV (header first, skills semicolon-separated) or NDJSON lines."""
+        if fmt not in ROSTER_FORMATS:
+            raise ValueError(f"Unknown roster format {fmt!r}, expected one of {ROSTER_FORMATS}")
+        rows = RosterService.iter_roster(redis_client, batch_size)
+        if fmt == "ndjson":
+            for row in rows:
+                yield json.dumps(row) + "\n"
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def line(values) -> str:
+            writer.writerow(values)
+            text = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return text
+
+        yield line(ROSTER_FIELDS)
+        for row in rows:
+            yield line((row["talent_id"], str(row["available"]).lower(), row["rating"],
+                        ";".join(row["skills"]), row["last_assigned_at"]))
+
+    @staticmethod
+    def export_roster(redis_client: redis.Redis, out: IO[str], fmt: str = "csv",
+                      batch_size: int = 1000) -> Dict[str, Any]:
+        """Writes the roster to a text stream and returns rows, rows/sec and peak RSS."""
+        started = time.perf_counter()
+        # The CSV header is one of the lines
+        rows = -1 if fmt == "csv" else 0
+        for line in RosterService.export_lines(redis_client, fmt, batch_size):
+            out.write(line)
+            rows += 1
+        elapsed = time.perf_counter() - started
+        report = {
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(rows / elapsed, 1) if elapsed else 0.0,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+        logger.info(f"Exported {report['rows']} roster rows in {elapsed:.2f}s, {report['rows_per_sec']} rows/sec")
+        return report
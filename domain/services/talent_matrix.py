@@ -0,0 +1,205 @@
+import json
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import redis
+from domain.models.indexes import TALENT_CHANGES_CHANNEL
+from domain.utils.logging import logger
+
+class TalentMatrix:
+    """In-memory talent matrix for vectorized skill matching.
+
+    Skills are kept as a bit-packed multi-hot matrix (one bit per skill in the
+    vocabulary), next to rating and availability vectors. Rows are allocated
+    with spare capacity so single-talent updates don't copy the arrays.
+    """
+
+    def __init__(self, rating_weight: float = 0.3):
+        self.rating_weight = rating_weight
+        self.talent_ids: List[str] = []
+        self.talent_index: Dict[str, int] = {}
+        self.skill_index: Dict[str, int] = {}
+        self.skill_bits = np.zeros((0, 1), dtype=np.uint8)
+        self.rating = np.zeros(0, dtype=np.float32)
+        self.available = np.zeros(0, dtype=bool)
+        self.size = 0
+        self._redis: Optional[redis.Redis] = None
+        self._pubsub = None
+        self._loaded_at = 0.0
+
+    def _ensure_capacity(self, rows: int, skills: int) -> None:
+        cols = max(1, (skills + 7) // 8)
+        capacity, current_cols = self.skill_bits.shape
+        if rows <= capacity and cols <= current_cols:
+            return
+        new_capacity = max(rows, capacity * 2, 1024) if rows > capacity else capacity
+        new_cols = max(cols, current_cols)
+        skill_bits = np.zeros((new_capacity, new_cols), dtype=np.uint8)
+        skill_bits[:self.size, :current_cols] = self.skill_bits[:self.size]
+        rating = np.zeros(new_capacity, dtype=np.float32)
+        rating[:self.size] = self.rating[:self.size]
+        available = np.zeros(new_capacity, dtype=bool)
+        available[:self.size] = self.available[:self.size]
+        self.skill_bits, self.rating, self.available = skill_bits, rating, available
+
+    def _skill_ids(self, skills: Iterable[str], create: bool) -> List[int]:
+        ids = []
+        for skill in skills:
+            index = self.skill_index.get(skill)
+            if index is None and create:
+                index = self.skill_index[skill] = len(self.skill_index)
+            if index is not None:
+                ids.append(index)
+        return ids
+
+    def bulk_load(self, talent_ids: Sequence[str], skills: Sequence[Sequence[str]],
+                  ratings: Sequence[float], available: Sequence[bool]) -> None:
+        """Replaces the matrix contents in one pass."""
+        self.talent_ids = list(talent_ids)
+        self.talent_index = {talent_id: row for row, talent_id in enumerate(self.talent_ids)}
+        self.skill_index = {}
+        rows, cols = [], []
+        for row, talent_skills in enumerate(skills):
+            skill_ids = self._skill_ids(talent_skills, create=True)
+            rows.extend([row] * len(skill_ids))
+            cols.extend(skill_ids)
+        self.size = 0
+        self.skill_bits = np.zeros((0, 1), dtype=np.uint8)
+        self._ensure_capacity(len(self.talent_ids), len(self.skill_index))
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        np.bitwise_or.at(self.skill_bits, (rows, cols >> 3), (1 << (cols & 7)).astype(np.uint8))
+        self.rating[:len(self.talent_ids)] = np.asarray(ratings, dtype=np.float32)
+        self.available[:len(self.talent_ids)] = np.asarray(available, dtype=bool)
+        self.size = len(self.talent_ids)
+
+    def upsert(self, talent_id: str, skills: Sequence[str], rating: float, available: bool) -> None:
+        """Inserts or updates a single talent row."""
+        skill_ids = self._skill_ids(skills, create=True)
+        row = self.talent_index.get(talent_id)
+        if row is None:
+            row = self.size
+            self._ensure_capacity(row + 1, len(self.skill_index))
+            self.talent_index[talent_id] = row
+            self.talent_ids.append(talent_id)
+            self.size += 1
+        else:
+            self._ensure_capacity(self.size, len(self.skill_index))
+        self.skill_bits[row] = 0
+        for skill_id in skill_ids:
+            self.skill_bits[row, skill_id >> 3] |= np.uint8(1 << (skill_id & 7))
+        self.rating[row] = rating
+        self.available[row] = available
+
+    def remove(self, talent_id: str) -> None:
+        """Hides a deleted talent; its row is reused only by a full reload."""
+        row = self.talent_index.get(talent_id)
+        if row is not None:
+            self.available[row] = False
+            self.skill_bits[row] = 0
+
+    def score(self, required_skills: Sequence[str]) -> np.ndarray:
+        """Scores every talent against the required skills; unmatched or busy talents get -inf."""
+        skill_ids = self._skill_ids(set(required_skills), create=False)
+        scores = np.full(self.size, -np.inf, dtype=np.float32)
+        if not required_skills or not skill_ids:
+            return scores
+        mask = np.zeros(self.skill_bits.shape[1], dtype=np.uint8)
+        for skill_id in skill_ids:
+            mask[skill_id >> 3] |= np.uint8(1 << (skill_id & 7))
+        cols = np.flatnonzero(mask)
+        # Only the bytes holding required skills take part in the popcount
+        overlap = np.bitwise_count(self.skill_bits[:self.size, cols] & mask[cols]).sum(axis=1, dtype=np.float32)
+        coverage = overlap / len(set(required_skills))
+        combined = coverage * (1 - self.rating_weight) + (self.rating[:self.size] / 5) * self.rating_weight
+        candidate = (overlap > 0) & self.available[:self.size]
+        scores[candidate] = combined[candidate]
+        return scores
+
+    def top_k(self, required_skills: Sequence[str], k: int) -> List[Tuple[str, float]]:
+        """Returns up to k (talent_id, score) pairs, best first."""
+        scores = self.score(required_skills)
+        candidates = np.flatnonzero(np.isfinite(scores))
+        if not len(candidates):
+            return []
+        if len(candidates) > k:
+            best = np.argpartition(-scores[candidates], k - 1)[:k]
+            candidates = candidates[best]
+        ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.talent_ids[row], float(scores[row])) for row in ordered]
+
+    @staticmethod
+    def _decode_row(row) -> Tuple[List[str], float, bool]:
+        available, rating, skills = row
+        return (
+            json.loads(skills or "[]"),
+            float(rating or 0),
+            available is None or str(available).lower() == "true"
+        )
+
+    def load(self, redis_client: redis.Redis, batch_size: int = 5000) -> None:
+        """Fully loads the matrix from the talent hashes and starts following changes."""
+        if self._pubsub is None:
+            # Subscribe before reading so no change between load and refresh is missed
+            self._pubsub = redis_client.pubsub()
+            self._pubsub.subscribe(TALENT_CHANGES_CHANNEL)
+        self._redis = redis_client
+
+        talent_ids, skills, ratings, available = [], [], [], []
+        batch = []
+
+        def flush():
+            with redis_client.pipeline(transaction=False) as pipe:
+                for key in batch:
+                    pipe.hmget(key, "available", "rating", "skills")
+                for key, row in zip(batch, pipe.execute()):
+                    talent_skills, rating, is_available = self._decode_row(row)
+                    talent_ids.append(key.split(":", 1)[1])
+                    skills.append(talent_skills)
+                    ratings.append(rating)
+                    available.append(is_available)
+
+        for key in redis_client.scan_iter(match="talent:*", count=batch_size, _type="hash"):
+            batch.append(key.decode() if isinstance(key, bytes) else key)
+            if len(batch) >= batch_size:
+                flush()
+                batch = []
+        if batch:
+            flush()
+
+        self.bulk_load(talent_ids, skills, ratings, available)
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded talent matrix with {self.size} talents and {len(self.skill_index)} skills")
+
+    def refresh(self, max_staleness: float = 300.0) -> int:
+        """Applies pending talent-change events; falls back to a full reload when stale."""
+        if self._redis is None:
+            return 0
+        if time.monotonic() - self._loaded_at > max_staleness:
+            # Pub/sub is lossy across reconnects, so reload periodically
+            self.load(self._redis)
+            return self.size
+
+        changed = set()
+        while True:
+            message = self._pubsub.get_message(timeout=0)
+            if message is None:
+                break
+            if message.get("type") != "message":
+                continue
+            data = message.get("data")
+            changed.add(data.decode() if isinstance(data, bytes) else data)
+        if not changed:
+            return 0
+
+        ids = sorted(changed)
+        with self._redis.pipeline(transaction=False) as pipe:
+            for talent_id in ids:
+                pipe.hmget(f"talent:{talent_id}", "available", "rating", "skills")
+            rows = pipe.execute()
+        for talent_id, row in zip(ids, rows):
+            if all(value is None for value in row):
+                self.remove(talent_id)
+            else:
+                self.upsert(talent_id, *self._decode_row(row))
+        return len(ids)
@@ -1,79 +1,167 @@
+import asyncio
 import functools
 import inspect
+import logging
+import random
 import time
-from typing import Callable, Any, TypeVar, Union
+import types
+from typing import Callable, Any, Dict, List, Optional, Tuple, TypeVar, Union, get_args, get_origin
+from config import settings
 from domain.utils.logging import logger
+from domain.utils.metrics import MetricsRegistry, registry
 
 F = TypeVar('F', bound=Callable[..., Any])
 
-def validate_input(func: F) -> F:
-    """Decorator to validate function inputs using type hints"""
+def _instance_types(annotation) -> Optional[Tuple[type, ...]]:
+    """The classes isinstance() checks for an annotation, or None when it can't be checked."""
+    if annotation is Any:
+        return None
+    origin = get_origin(annotation)
+    if origin is Union or origin is types.UnionType:
+        # Optional[X] is Union[X, None], so None is accepted
+        members = [_instance_types(arg) for arg in get_args(annotation)]
+        if any(member is None for member in members):
+            return None
+        return tuple(cls for member in members for cls in member)
+    if origin is not None:
+        # Only the container of a generic is checked: List[str] checks for a list
+        annotation = origin
+    return (annotation,) if isinstance(annotation, type) else None
+
+def _reject(name: str, expected: Tuple[type, ...], value: Any) -> None:
+    raise TypeError(
+        f"Argument '{name}' must be {' or '.join(cls.__name__ for cls in expected)}, "
+        f"got {type(value).__name__}"
+    )
+
+def validate_input(func: Optional[F] = None, *, enabled: bool = True) -> F:
+    """Decorator to validate function inputs using type hints.
+
+    The signature and annotations are read once when the function is
+    decorated, so a call only costs an isinstance check per argument passed.
+    Annotations that isinstance can't check, like Any or string forward
+    references, are skipped, as are defaults. A function with nothing to
+    check is returned undecorated. Opt out with @validate_input(enabled=False)
+    for one function, or VALIDATE_INPUT=false for all of them.
+    """
+    if func is None:
+        return functools.partial(validate_input, enabled=enabled)
+    if not (enabled and settings.VALIDATE_INPUT):
+        return func
+
+    positional: List[Tuple[int, str, Tuple[type, ...]]] = []
+    by_name: Dict[str, Tuple[type, ...]] = {}
+    for index, (name, parameter) in enumerate(inspect.signature(func).parameters.items()):
+        if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+            continue
+        expected = _instance_types(func.__annotations__.get(name))
+        if expected is None:
+            continue
+        if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+            positional.append((index, name, expected))
+        if parameter.kind != parameter.POSITIONAL_ONLY:
+            by_name[name] = expected
+    if not by_name and not positional:
+        return func
+
+    def check(args, kwargs) -> None:
+        for index, name, expected in positional:
+            if index < len(args) and not isinstance(args[index], expected):
+                _reject(name, expected, args[index])
+        for name, value in kwargs.items():
+            expected = by_name.get(name)
+            if expected is not None and not isinstance(value, expected):
+                _reject(name, expected, value)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            check(args, kwargs)
+            return await func(*args, **kwargs)
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Get type hints, skipping return type if present
-        type_hints = {
-            k: v for k, v in func.__annotations__.items() 
-            if k != 'return'
-        }
-        
-        # Handle bound methods (skip 'self' parameter)
-        bound_args = inspect.signature(func).bind(*args, **kwargs)
-        bound_args.apply_defaults()
-        
-        # Validate all parameters
-        for param_name, value in bound_args.arguments.items():
-            if param_name in type_hints:
-                expected_type = type_hints[param_name]
-                origin_type = getattr(expected_type, "__origin__", expected_type)
-                
-                # Handle Optional types
-                if origin_type is Union:
-                    type_args = expected_type.__args__
-                    if type(None) in type_args:
-                        expected_type = Union[tuple(
-                            t for t in type_args if t is not type(None)
-                        )]
-                
-                if not isinstance(value, expected_type):
-                    raise TypeError(
-                        f"Argument '{param_name}' must be {expected_type.__name__}, "
-                        f"got {type(value).__name__}"
-                    )
-        
+        check(args, kwargs)
         return func(*args, **kwargs)
     return wrapper
 
-def retry(max_retries: int = 3, delay: float = 1.0, retry_on: tuple = (Exception,)):
-    """Decorator to retry failed operations"""
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^(attempt-1))]."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+def retry(max_retries: int = 3, delay: float = 1.0, retry_on: tuple = (Exception,), max_delay: float = 30.0):
+    """Decorator to retry failed operations with jittered exponential backoff.
+
+    Coroutines back off with asyncio.sleep and don't block the event loop.
+    Celery tasks should use self.retry(countdown=backoff_delay(...)) instead,
+    which frees the worker while waiting.
+    """
     def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                for attempt in range(1, max_retries + 1):
+                    try:
+                        return await func(*args, **kwargs)
+                    except retry_on as e:
+                        logger.warning(f"Attempt {attempt} failed: {str(e)}")
+                        if attempt == max_retries:
+                            raise
+                        await asyncio.sleep(backoff_delay(attempt, delay, max_delay))
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            last_exception = None
             for attempt in range(1, max_retries + 1):
                 try:
                     return func(*args, **kwargs)
                 except retry_on as e:  # Retry only on specified exceptions
-                    last_exception = e
                     logger.warning(f"Attempt {attempt} failed: {str(e)}")
-                    if attempt < max_retries:
-                        time.sleep(delay)
-            raise last_exception
+                    if attempt == max_retries:
+                        raise
+                    time.sleep(backoff_delay(attempt, delay, max_delay))
         return wrapper
     return decorator
 
-def timed(func: F, log_level: str = "info") -> F:
-    """Decorator to log execution time"""
+def timed(func: Optional[F] = None, *, name: Optional[str] = None, log_level: Optional[str] = None,
+          slow_threshold: Optional[float] = None, metrics: MetricsRegistry = registry) -> F:
+    """Decorator recording execution time, in seconds, into a histogram of the metrics registry.
+
+    Works bare (@timed) or with arguments. The histogram is named after the
+    function's module and qualified name unless name is given. With
+    log_level every call is also logged at that level; with slow_threshold
+    only calls taking at least that many seconds are, as warnings. Calls
+    that raise are recorded too.
+    """
+    if func is None:
+        return functools.partial(timed, name=name, log_level=log_level,
+                                 slow_threshold=slow_threshold, metrics=metrics)
+    histogram = metrics.histogram(name or f"{func.__module__}.{func.__qualname__}")
+    level = logging.getLevelName(log_level.upper()) if log_level else None
+
+    def record(elapsed: float) -> None:
+        histogram.observe(elapsed)
+        if level is not None:
+            logger.log(level, "Timed call", extra={"timer": histogram.name, "seconds": round(elapsed, 6)})
+        elif slow_threshold is not None and elapsed >= slow_threshold:
+            logger.warning("Slow call", extra={"timer": histogram.name, "seconds": round(elapsed, 6)})
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                record(time.perf_counter() - start_time)
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         start_time = time.perf_counter()
-        result = func(*args, **kwargs)
-        end_time = time.perf_counter()
-        log_message = f"{func.__name__} executed in {end_time - start_time:.4f}s"
-        if log_level.lower() == "debug":
-            logger.debug(log_message)
-        elif log_level.lower() == "warning":
-            logger.warning(log_message)
-        else:
-            logger.info(log_message)
-        return result
-    return wrapper
\ No newline at end of file
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(time.perf_counter() - start_time)
+    return wrapper
@@ -0,0 +1,50 @@
+import os
+import threading
+import time
+from typing import List
+
+# Crockford base32, the ULID alphabet
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+RANDOM_BITS = 80
+
+_lock = threading.Lock()
+_last = [0, 0]
+
+def _reset_after_fork() -> None:
+    # A forked worker must not continue the parent's sequence within the same millisecond
+    _last[0] = _last[1] = 0
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(26):
+        chars.append(ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+def new_ulids(count: int) -> List[str]:
+    """Returns count ULIDs: 48-bit millisecond time plus 80 random bits, 26 characters.
+
+    Ids sort by creation time. Within one millisecond the random part of the
+    first id is incremented for the next ones, so ids from this process stay
+    unique and ordered however many are generated per millisecond.
+    """
+    with _lock:
+        now = time.time_ns() // 1_000_000
+        if now > _last[0]:
+            _last[0], _last[1] = now, int.from_bytes(os.urandom(RANDOM_BITS // 8), "big") - 1
+        values = []
+        for _ in range(count):
+            _last[1] += 1
+            if _last[1] >> RANDOM_BITS:
+                # Random part exhausted within the millisecond: borrow the next one
+                _last[0], _last[1] = _last[0] + 1, 0
+            values.append((_last[0] << RANDOM_BITS) | _last[1])
+    return [_encode(value) for value in values]
+
+def new_ulid() -> str:
+    return new_ulids(1)[0]
+
+def new_task_id() -> str:
+    return f"task_{new_ulid()}"
@@ -1,38 +1,150 @@
+import atexit
+import json
 import logging
+import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-import json
-from datetime import datetime, timezone
-import traceback
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional, Tuple
+from config import settings
+
+try:
+    import orjson
+except ImportError:  # optional speedup; the stdlib produces equivalent JSON
+    orjson = None
+
+# Attributes of every LogRecord; anything else on a record came from extra= and is context
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+# Message templates tracked by RateLimitFilter before its counts are reset
+MAX_TRACKED_MESSAGES = 1024
+
+def context_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    """The structured fields passed with extra=, e.g. task_id and talent_id."""
+    return {key: value for key, value in record.__dict__.items() if key not in _RECORD_FIELDS}
+
+def _dumps(entry: Dict[str, Any]) -> str:
+    if orjson is not None:
+        return orjson.dumps(entry, default=str).decode()
+    return json.dumps(entry, default=str)
 
 class JSONFormatter(logging.Formatter):
     """Custom JSON log formatter for structured logging"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (second, formatted prefix): consecutive records mostly share the second
+        self._second: Tuple[int, str] = (-1, "")
+
+    def timestamp(self, created: float) -> str:
+        """ISO 8601 UTC time of the logging call, as datetime.isoformat() would give it."""
+        second = int(created)
+        cached, prefix = self._second
+        if second != cached:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second = (second, prefix)
+        return f"{prefix}.{int((created - second) * 1_000_000):06d}+00:00"
+
     def format(self, record: logging.LogRecord) -> str:
         log_entry: Dict[str, Any] = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": self.timestamp(record.created),
             "level": record.levelname,
             "message": record.getMessage(),
             "module": record.module,
             "function": record.funcName,
             "line": record.lineno
         }
-        
+        for key, value in context_fields(record).items():
+            log_entry.setdefault(key, value)
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_entry["exception"] = record.exc_text
+
+        return _dumps(log_entry)
+
+class ContextFormatter(logging.Formatter):
+    """Plain text formatter that appends the structured fields as key=value."""
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        text = super().formatMessage(record)
+        context = context_fields(record)
+        if not context:
+            return text
+        return text + "".join(f" {key}={value}" for key, value in context.items())
+
+class RateLimitFilter(logging.Filter):
+    """Lets each message through burst times per window, then samples one in sample_every.
+
+    Records are counted per logger and unformatted message, so messages that
+    pass their variables with extra= instead of interpolating them are
+    limited together. The next record let through carries the number dropped
+    before it as suppressed. Records at max_level and above always pass.
+    """
+    def __init__(self, burst: int, window: float, sample_every: int = 0, max_level: int = logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.sample_every = sample_every
+        self.max_level = max_level
+        # (logger, message) -> [window start, records seen, records suppressed]
+        self._counts: Dict[Tuple[str, Any], List] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.max_level:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            state = self._counts.get(key)
+            if state is None or record.created - state[0] >= self.window:
+                if state is None and len(self._counts) >= MAX_TRACKED_MESSAGES:
+                    # Interpolated messages never repeat; don't let them grow the table
+                    self._counts.clear()
+                state = self._counts[key] = [record.created, 0, state[2] if state else 0]
+            state[1] += 1
+            over = state[1] - self.burst
+            if over > 0 and not (self.sample_every and over % self.sample_every == 0):
+                state[2] += 1
+                return False
+            suppressed, state[2] = state[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class BackgroundQueueHandler(QueueHandler):
+    """Hands records to a QueueListener thread, which formats and writes them.
+
+    The calling thread only renders the message, since its arguments could
+    change after the call, and the traceback. Unlike QueueHandler it does so
+    in place instead of on a copy; other handlers see the same rendered text.
+    When the queue is full the record is dropped and counted rather than
+    blocking the caller.
+    """
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.message = record.getMessage()
+        record.args = None
         if record.exc_info:
-            log_entry["exception"] = traceback.format_exc()
-            
-        return json.dumps(log_entry)
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
-def setup_logging(log_file: str = "app.log") -> None:
-    """Configure logging with both file and console output"""
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def create_handlers(log_file: str = "app.log", stream=None) -> List[logging.Handler]:
+    """The JSON file handler and the console handler every process writes to."""
     logs_dir = Path("logs")
     logs_dir.mkdir(exist_ok=True)
-    
-    # Main logger configuration
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
+
     # File handler with rotation
     file_handler = RotatingFileHandler(
         logs_dir / log_file,
@@ -40,14 +152,78 @@ def setup_logging(log_file: str = "app.log") -> None:
         backupCount=5
     )
     file_handler.setFormatter(JSONFormatter())
-    
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(logging.Formatter(
+
+    console_handler = logging.StreamHandler(stream or sys.stdout)
+    console_handler.setFormatter(ContextFormatter(
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     ))
-    
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    return [file_handler, console_handler]
+
+_configured = False
+_queue_handler: Optional[BackgroundQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+def _start_listener(handlers: List[logging.Handler]) -> None:
+    global _listener
+    _queue_handler.queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+    _listener = QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+def _restart_listener_after_fork() -> None:
+    # The listener thread doesn't survive fork (Celery prefork children): start the child's own
+    if _listener is not None:
+        _start_listener(list(_listener.handlers))
+
+def setup_logging(log_file: str = "app.log", level: int = logging.INFO, stream=None) -> None:
+    """Configure logging with both file and console output.
+
+    Called by each entry point (API lifespan, Celery worker, manage.py), not on
+    import, so importing the code creates no files or handlers. Only the first
+    call in a process has any effect.
+
+    With LOG_QUEUE_SIZE set, callers only enqueue records and a background
+    thread formats and writes them. Repetitive messages below WARNING are
+    rate limited per LOG_RATE_LIMIT_* settings.
+    """
+    global _configured, _queue_handler
+    if _configured:
+        return
+    _configured = True
+
+    # Main logger configuration
+    logger = logging.getLogger()
+    logger.setLevel(level)
+
+    handlers = create_handlers(log_file, stream)
+    if settings.LOG_QUEUE_SIZE > 0:
+        _queue_handler = BackgroundQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+        _start_listener(handlers)
+        os.register_at_fork(after_in_child=_restart_listener_after_fork)
+        atexit.register(shutdown_logging)
+        handlers = [_queue_handler]
+
+    for handler in handlers:
+        if settings.LOG_RATE_LIMIT_BURST > 0:
+            handler.addFilter(RateLimitFilter(
+                settings.LOG_RATE_LIMIT_BURST, settings.LOG_RATE_LIMIT_WINDOW, settings.LOG_SAMPLE_EVERY
+            ))
+        logger.addHandler(handler)
+
+def shutdown_logging() -> None:
+    """Writes out the records still queued and stops the background thread."""
+    global _listener
+    if _listener is None:
+        return
+    if _queue_handler.dropped:
+        logger.warning("Log queue was full, records dropped", extra={"dropped": _queue_handler.dropped})
+    listener, _listener = _listener, None
+    listener.stop()
+    # Anything logged after this, e.g. by other exit hooks, is written directly
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    for handler in listener.handlers:
+        for log_filter in _queue_handler.filters:
+            handler.addFilter(log_filter)
+        root.addHandler(handler)
 
-setup_logging()
-logger = logging.getLogger(__name__)
\ No newline at end of file
+logger = logging.getLogger(__name__)
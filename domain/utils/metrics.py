@@ -0,0 +1,207 @@
+import bisect
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# Sorted (name, value) pairs identifying one series of a metric
+Labels = Tuple[Tuple[str, str], ...]
+
+def log_buckets(low: float = 1e-6, high: float = 100.0, per_decade: int = 10) -> List[float]:
+    """Bucket upper bounds spaced evenly on a log scale, from low to high inclusive.
+
+    At ten per decade each bucket spans 26%, so quantile estimates keep the
+    same relative precision from microsecond helpers to minute-long calls.
+    """
+    steps = round(math.log10(high / low) * per_decade)
+    return [float(f"{low * 10 ** (i / per_decade):.6g}") for i in range(steps + 1)]
+
+# Seconds, 1us to 100s
+DEFAULT_BUCKETS = log_buckets()
+
+def label_key(labels: Optional[Dict[str, str]]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items())) if labels else ()
+
+def series_name(name: str, labels: Labels) -> str:
+    """name{key="value",...}, the series as Prometheus writes it."""
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+class Counter:
+    """A total that only goes up, such as calls made or cache hits."""
+    kind = "counter"
+
+    def __init__(self, name: str, description: str = "", labels: Labels = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.value = 0.0
+        # Part of value already added to the shared totals (integrations.metrics)
+        self.flushed = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> Dict:
+        return {"value": self.value}
+
+    def pending(self) -> float:
+        """What was counted since the last flush."""
+        with self._lock:
+            return self.value - self.flushed
+
+    def commit(self, delta: float) -> None:
+        with self._lock:
+            self.flushed += delta
+
+    def reset(self) -> None:
+        with self._lock:
+            self.value = self.flushed = 0.0
+
+class Histogram:
+    """Counts observations into fixed buckets; quantiles are interpolated within a bucket.
+
+    Fixed buckets keep memory constant and let histograms from several
+    processes be merged by adding their counts.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str = "", buckets: Optional[Sequence[float]] = None,
+                 labels: Labels = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = list(buckets or DEFAULT_BUCKETS)
+        # One count per bucket plus the overflow above the last bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        # Counts and sum already added to the shared totals (integrations.metrics)
+        self.flushed_counts = [0] * (len(self.buckets) + 1)
+        self.flushed_sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimated q-quantile (0..1), or 0.0 before any observation."""
+        with self._lock:
+            counts = list(self.counts)
+        return quantile(self.buckets, counts, q)
+
+    def snapshot(self) -> Dict:
+        """Count, sum, p50/p95/p99 and cumulative bucket counts, ready to serialize."""
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        return summarize(self.buckets, counts, total)
+
+    def pending(self) -> Tuple[List[int], float]:
+        """Bucket counts and sum observed since the last flush."""
+        with self._lock:
+            return ([count - flushed for count, flushed in zip(self.counts, self.flushed_counts)],
+                    self.sum - self.flushed_sum)
+
+    def commit(self, delta: Tuple[List[int], float]) -> None:
+        counts, total = delta
+        with self._lock:
+            self.flushed_counts = [flushed + count for flushed, count in zip(self.flushed_counts, counts)]
+            self.flushed_sum += total
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.flushed_counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = self.flushed_sum = 0.0
+
+Metric = Union[Counter, Histogram]
+
+def quantile(buckets: Sequence[float], counts: Sequence[int], q: float) -> float:
+    """Estimated q-quantile of per-bucket counts, the last count being the overflow."""
+    count = sum(counts)
+    if not count:
+        return 0.0
+    rank = q * count
+    seen = 0
+    for index, bucket_count in enumerate(counts):
+        if bucket_count and seen + bucket_count >= rank:
+            if index == len(buckets):
+                return buckets[-1]
+            lower = buckets[index - 1] if index else 0.0
+            return lower + (buckets[index] - lower) * (rank - seen) / bucket_count
+        seen += bucket_count
+    return buckets[-1]
+
+def summarize(buckets: Sequence[float], counts: Sequence[int], total: float) -> Dict:
+    """Count, sum, p50/p95/p99 and cumulative (bound, count) pairs of per-bucket counts."""
+    cumulative, running = [], 0
+    for bound, bucket_count in zip(list(buckets) + [math.inf], counts):
+        running += bucket_count
+        cumulative.append((bound, running))
+    return {
+        "count": running,
+        "sum": total,
+        "p50": quantile(buckets, counts, 0.5),
+        "p95": quantile(buckets, counts, 0.95),
+        "p99": quantile(buckets, counts, 0.99),
+        "buckets": cumulative,
+    }
+
+class MetricsRegistry:
+    """Counters and histograms of one process, created on first use.
+
+    Where the labels are fixed, look a metric up once and keep it: the
+    lookup costs more than the observation.
+    """
+    def __init__(self):
+        self._metrics: Dict[Tuple[str, Labels], Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, labels: Optional[Dict[str, str]], **kwargs) -> Metric:
+        key = (name, label_key(labels))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(key, cls(name, labels=key[1], **kwargs))
+        return metric
+
+    def counter(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+        return self._get(Counter, name, labels, description=description)
+
+    def histogram(self, name: str, description: str = "", buckets: Optional[Sequence[float]] = None,
+                  labels: Optional[Dict[str, str]] = None) -> Histogram:
+        return self._get(Histogram, name, labels, description=description, buckets=buckets)
+
+    def metrics(self) -> List[Metric]:
+        return list(self._metrics.values())
+
+    def histograms(self) -> List[Histogram]:
+        return [metric for metric in self.metrics() if isinstance(metric, Histogram)]
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Every series' snapshot by series name."""
+        return {series_name(metric.name, metric.labels): metric.snapshot() for metric in self.metrics()}
+
+    def reset(self) -> None:
+        for metric in self.metrics():
+            metric.reset()
+
+    def after_fork(self) -> None:
+        """Marks inherited counts as flushed in a forked child; the parent still flushes them."""
+        self._lock = threading.Lock()
+        for metric in self.metrics():
+            # Another thread of the parent may have held the lock when it forked
+            metric._lock = threading.Lock()
+            metric.commit(metric.pending())
+
+# The process-wide registry that timed() and the instrumented services record into
+registry = MetricsRegistry()
+os.register_at_fork(after_in_child=registry.after_fork)
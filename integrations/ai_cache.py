@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+import redis
+import redis.asyncio
+from config import settings
+from domain.utils.logging import logger
+from domain.utils.metrics import registry
+
+# Returned by get/get_many when neither tier has the context; a cached
+# failure is returned as None
+MISS = object()
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Shared by every cache in the process, unlike EvaluationCache.counters
+_lookups = {
+    result: registry.counter("ai_cache_lookups_total", "AI cache lookups by the tier that answered", {"result": result})
+    for result in ("local_hits", "redis_hits", "misses")
+}
+
+def normalize_context(text: str) -> str:
+    """Case- and whitespace-insensitive form of a request context."""
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+def cache_key(text: str, prompt_version: str, model_name: str, namespace: str = "ai:eval") -> str:
+    """Stable key for a request context: the same in every process and on every host."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (model_name, prompt_version, normalize_context(text)):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return f"{namespace}:{digest.hexdigest()}"
+
+class EvaluationCache:
+    """Two-tier cache of AI evaluation results keyed by request context.
+
+    An in-process LRU with a short TTL sits in front of Redis, which is
+    shared by every worker and API process. Failures can be cached too
+    (as None) with their own, shorter TTL so a context that keeps failing
+    doesn't hit the model on every retry. Coroutines use aget_many and
+    aput_many, which go through async_redis when given and a worker thread
+    otherwise.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis], model_name: str, prompt_version: str,
+                 ttl: Optional[int] = None, negative_ttl: Optional[int] = None,
+                 local_size: Optional[int] = None, local_ttl: Optional[float] = None,
+                 async_redis: Optional[redis.asyncio.Redis] = None):
+        self.redis = redis_client
+        self.async_redis = async_redis
+        self.model_name = model_name
+        self.prompt_version = prompt_version
+        self.ttl = ttl or settings.AI_CACHE_TTL
+        self.negative_ttl = negative_ttl or settings.AI_CACHE_NEGATIVE_TTL
+        self.local_size = settings.AI_CACHE_LOCAL_SIZE if local_size is None else local_size
+        self.local_ttl = local_ttl or settings.AI_CACHE_LOCAL_TTL
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {
+            "local_hits": 0, "redis_hits": 0, "negative_hits": 0, "misses": 0,
+            "stores": 0, "errors": 0, "lookups": 0, "lookup_seconds": 0.0,
+        }
+
+    def key(self, text: str) -> str:
+        return cache_key(text, self.prompt_version, self.model_name)
+
+    def _local_get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return MISS
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return MISS
+            self._local.move_to_end(key)
+            return value
+
+    def _local_put(self, key: str, value: Optional[Dict], ttl: float) -> None:
+        if self.local_size <= 0:
+            return
+        with self._lock:
+            self._local[key] = (value, time.monotonic() + min(ttl, self.local_ttl))
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def _count_hit(self, value: Any, tier: str) -> None:
+        self.counters[tier] += 1
+        _lookups[tier].inc()
+        if value is None:
+            self.counters["negative_hits"] += 1
+
+    def get(self, text: str) -> Any:
+        """Returns the cached result dict, None for a cached failure, or MISS."""
+        return self.get_many([text])[0]
+
+    def get_many(self, texts: Sequence[str]) -> List[Any]:
+        """Looks up many contexts with at most one Redis round trip."""
+        started = time.perf_counter()
+        keys, results, remote = self._local_lookup(texts)
+        if remote and self.redis is not None:
+            try:
+                raw_values = self.redis.mget([keys[i] for i in remote])
+            except redis.RedisError as e:
+                raw_values = self._lookup_failed(e, remote)
+            self._promote(keys, results, remote, raw_values)
+        return self._finish_lookup(results, started)
+
+    async def aget_many(self, texts: Sequence[str]) -> List[Any]:
+        """get_many for coroutines: the Redis lookup doesn't block the event loop."""
+        if self.async_redis is None:
+            return await asyncio.to_thread(self.get_many, texts)
+        started = time.perf_counter()
+        keys, results, remote = self._local_lookup(texts)
+        if remote:
+            try:
+                raw_values = await self.async_redis.mget([keys[i] for i in remote])
+            except redis.RedisError as e:
+                raw_values = self._lookup_failed(e, remote)
+            self._promote(keys, results, remote, raw_values)
+        return self._finish_lookup(results, started)
+
+    def _local_lookup(self, texts: Sequence[str]) -> tuple:
+        keys = [self.key(text) for text in texts]
+        results = [self._local_get(key) for key in keys]
+        for value in results:
+            if value is not MISS:
+                self._count_hit(value, "local_hits")
+        return keys, results, [i for i, value in enumerate(results) if value is MISS]
+
+    def _lookup_failed(self, error: Exception, remote: List[int]) -> List[None]:
+        logger.warning(f"AI cache lookup failed: {error}")
+        self.counters["errors"] += 1
+        return [None] * len(remote)
+
+    def _promote(self, keys: List[str], results: List[Any], remote: List[int], raw_values: List) -> None:
+        for i, raw in zip(remote, raw_values):
+            if raw is None:
+                continue
+            value = json.loads(raw)
+            results[i] = value
+            self._count_hit(value, "redis_hits")
+            # Remote entries are promoted with the local TTL
+            self._local_put(keys[i], value, self.local_ttl)
+
+    def _finish_lookup(self, results: List[Any], started: float) -> List[Any]:
+        misses = sum(1 for value in results if value is MISS)
+        self.counters["misses"] += misses
+        if misses:
+            _lookups["misses"].inc(misses)
+        self.counters["lookups"] += len(results)
+        self.counters["lookup_seconds"] += time.perf_counter() - started
+        return results
+
+    def put(self, text: str, value: Optional[Dict]) -> None:
+        """Caches a result dict, or a failure when value is None."""
+        self.put_many([(text, value)])
+
+    def put_many(self, items: Sequence[tuple]) -> None:
+        """Caches (context, result-or-None) pairs in one pipeline."""
+        staged = self._stage_local(items)
+        if not staged or self.redis is None:
+            return
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                for key, payload, ttl in staged:
+                    pipe.set(key, payload, ex=int(ttl))
+                pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"AI cache store failed: {e}")
+            self.counters["errors"] += 1
+
+    async def aput_many(self, items: Sequence[tuple]) -> None:
+        """put_many for coroutines: the Redis writes don't block the event loop."""
+        if self.async_redis is None:
+            return await asyncio.to_thread(self.put_many, items)
+        staged = self._stage_local(items)
+        if not staged:
+            return
+        try:
+            async with self.async_redis.pipeline(transaction=False) as pipe:
+                for key, payload, ttl in staged:
+                    pipe.set(key, payload, ex=int(ttl))
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"AI cache store failed: {e}")
+            self.counters["errors"] += 1
+
+    def _stage_local(self, items: Sequence[tuple]) -> List[tuple]:
+        """Stores items in the local tier; returns (key, payload, ttl) for Redis."""
+        staged = []
+        for text, value in items:
+            key = self.key(text)
+            ttl = self.ttl if value is not None else self.negative_ttl
+            self._local_put(key, value, ttl)
+            staged.append((key, json.dumps(value), ttl))
+        self.counters["stores"] += len(staged)
+        return staged
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus hit rate and mean lookup latency."""
+        counters = dict(self.counters)
+        hits = counters["local_hits"] + counters["redis_hits"]
+        counters["hit_rate"] = hits / counters["lookups"] if counters["lookups"] else 0.0
+        counters["mean_lookup_ms"] = (
+            counters["lookup_seconds"] / counters["lookups"] * 1000 if counters["lookups"] else 0.0
+        )
+        return counters
@@ -0,0 +1,266 @@
+import asyncio
+import math
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence
+import redis
+import redis.asyncio
+from redis.commands.core import Script
+from config import settings
+from domain.models.indexes import stage_script
+from domain.utils.logging import logger
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# KEYS: calls list, half-open flag, open flag, probe lock
+# ARGV: outcome entry, window, calls TTL, min calls, error rate, slow seconds,
+# open ms, probe token of the caller ('' when it holds none)
+# Returns {action, entries}: action is ignored (a call finishing while open,
+# or while half-open without holding the probe lock), closed (probe
+# succeeded), probe_failed, tripped or recorded; entries are the window's
+# outcomes before any reset
+RECORD_SCRIPT = """
+local calls, half_open, open, probe = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+if redis.call('EXISTS', open) == 1 then
+    return {'ignored', {}}
+end
+if redis.call('EXISTS', half_open) == 1 and (ARGV[8] == '' or redis.call('GET', probe) ~= ARGV[8]) then
+    return {'ignored', {}}
+end
+redis.call('LPUSH', calls, ARGV[1])
+redis.call('LTRIM', calls, 0, tonumber(ARGV[2]) - 1)
+redis.call('EXPIRE', calls, ARGV[3])
+local entries = redis.call('LRANGE', calls, 0, -1)
+local function trip()
+    redis.call('SET', open, 1, 'PX', ARGV[7])
+    redis.call('SET', half_open, 1)
+    redis.call('DEL', calls, probe)
+end
+if redis.call('EXISTS', half_open) == 1 then
+    if string.sub(ARGV[1], 1, 1) == '1' then
+        redis.call('DEL', half_open, probe, calls)
+        return {'closed', entries}
+    end
+    trip()
+    return {'probe_failed', entries}
+end
+local count = #entries
+if count < tonumber(ARGV[4]) then
+    return {'recorded', entries}
+end
+local errors, latencies = 0, {}
+for i, entry in ipairs(entries) do
+    local ok, latency = string.match(entry, '^(%d):(.+)$')
+    if ok == '0' then
+        errors = errors + 1
+    end
+    latencies[i] = tonumber(latency)
+end
+table.sort(latencies)
+local p95 = latencies[math.max(1, math.ceil(0.95 * count))]
+if errors / count >= tonumber(ARGV[5]) or p95 >= tonumber(ARGV[6]) then
+    trip()
+    return {'tripped', entries}
+end
+return {'recorded', entries}
+"""
+
+# The SHA is computed once per process; redis-py falls back to SCRIPT LOAD on NOSCRIPT,
+# and pipelines (sync or asyncio) load it before executing
+_record = Script(None, RECORD_SCRIPT.encode())
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+def percentile(values: Sequence[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)] if ordered else 0.0
+
+class CircuitBreaker:
+    """Circuit breaker whose state is shared by every process through Redis.
+
+    The outcomes of the last `window` calls are kept in a Redis list. The
+    circuit opens when at least min_calls are recorded and either the error
+    rate or the p95 latency crosses its threshold. While open, allow() is
+    False everywhere without any call being made. Once open_seconds pass it
+    is half-open: one process at a time gets a probe call. A successful
+    probe closes it, and a failed one opens it again; outcomes of other
+    calls are ignored until then.
+
+    State is cached locally (for the whole open period, refresh_seconds
+    while closed), so a closed circuit costs a Redis round trip per call
+    at most once a second. If Redis is unreachable the circuit acts closed.
+    Recording an outcome, and the trip or close it causes, is one atomic
+    script call. Coroutines use astate, aallow and arecord, which go
+    through async_redis when given and a worker thread otherwise.
+    """
+
+    def __init__(self, name: str, redis_client: redis.Redis, window: Optional[int] = None,
+                 min_calls: Optional[int] = None, error_rate: Optional[float] = None,
+                 slow_seconds: Optional[float] = None, open_seconds: Optional[float] = None,
+                 refresh_seconds: float = 1.0, async_redis: Optional[redis.asyncio.Redis] = None):
+        self.name = name
+        self.redis = redis_client
+        self.async_redis = async_redis
+        self.window = window or settings.GEMINI_BREAKER_WINDOW
+        self.min_calls = min_calls or settings.GEMINI_BREAKER_MIN_CALLS
+        self.error_rate = error_rate or settings.GEMINI_BREAKER_ERROR_RATE
+        self.slow_seconds = slow_seconds or settings.GEMINI_BREAKER_SLOW_SECONDS
+        self.open_seconds = open_seconds or settings.GEMINI_BREAKER_OPEN_SECONDS
+        self.refresh_seconds = refresh_seconds
+        self.calls_key = f"breaker:{name}:calls"
+        self.open_key = f"breaker:{name}:open"
+        self.half_open_key = f"breaker:{name}:half_open"
+        self.probe_key = f"breaker:{name}:probe"
+        self._keys = [self.calls_key, self.half_open_key, self.open_key, self.probe_key]
+        self._cached = (CLOSED, 0.0)
+        # Value of the probe lock while this instance holds it
+        self._probe = ""
+        self._latencies: List[float] = []
+        self.counters = {"allowed": 0, "rejected": 0, "probes": 0, "trips": 0}
+
+    def state(self) -> str:
+        state, until = self._cached
+        if time.monotonic() < until:
+            return state
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.pttl(self.open_key)
+                pipe.exists(self.half_open_key)
+                return self._refresh_state(*pipe.execute())
+        except redis.RedisError as e:
+            logger.warning(f"Circuit {self.name} state unavailable, treating as closed: {e}")
+            return CLOSED
+
+    async def astate(self) -> str:
+        """state() for coroutines."""
+        if self.async_redis is None:
+            return await asyncio.to_thread(self.state)
+        state, until = self._cached
+        if time.monotonic() < until:
+            return state
+        try:
+            async with self.async_redis.pipeline(transaction=False) as pipe:
+                pipe.pttl(self.open_key)
+                pipe.exists(self.half_open_key)
+                return self._refresh_state(*await pipe.execute())
+        except redis.RedisError as e:
+            logger.warning(f"Circuit {self.name} state unavailable, treating as closed: {e}")
+            return CLOSED
+
+    def _refresh_state(self, open_ms: int, half_open: int) -> str:
+        now = time.monotonic()
+        if open_ms > 0:
+            self._cached = (OPEN, now + open_ms / 1000)
+        elif half_open:
+            self._cached = (HALF_OPEN, now)
+        else:
+            self._cached = (CLOSED, now + self.refresh_seconds)
+        return self._cached[0]
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only the probe may."""
+        state = self.state()
+        allowed = state == CLOSED
+        if state == HALF_OPEN:
+            token = self._probe_token()
+            try:
+                allowed = bool(self.redis.set(self.probe_key, token, nx=True, px=int(self.open_seconds * 1000)))
+            except redis.RedisError:
+                allowed = False
+            if allowed:
+                self._probe = token
+        return self._count_allowed(allowed, state)
+
+    async def aallow(self) -> bool:
+        """allow() for coroutines."""
+        if self.async_redis is None:
+            return await asyncio.to_thread(self.allow)
+        state = await self.astate()
+        allowed = state == CLOSED
+        if state == HALF_OPEN:
+            token = self._probe_token()
+            try:
+                allowed = bool(await self.async_redis.set(
+                    self.probe_key, token, nx=True, px=int(self.open_seconds * 1000)
+                ))
+            except redis.RedisError:
+                allowed = False
+            if allowed:
+                self._probe = token
+        return self._count_allowed(allowed, state)
+
+    @staticmethod
+    def _probe_token() -> str:
+        return f"{os.getpid()}:{uuid.uuid4().hex}"
+
+    def _count_allowed(self, allowed: bool, state: str) -> bool:
+        if allowed and state == HALF_OPEN:
+            self.counters["probes"] += 1
+        self.counters["allowed" if allowed else "rejected"] += 1
+        return allowed
+
+    def record(self, success: bool, latency: float) -> None:
+        """Records one call's outcome, tripping or closing the circuit as needed, in one script call."""
+        try:
+            action, entries = _record(keys=self._keys, args=self._record_args(success, latency), client=self.redis)
+        except redis.RedisError as e:
+            logger.warning(f"Circuit {self.name} could not record a call: {e}")
+            return
+        self._recorded(action, entries, latency)
+
+    async def arecord(self, success: bool, latency: float) -> None:
+        """record() for coroutines."""
+        if self.async_redis is None:
+            return await asyncio.to_thread(self.record, success, latency)
+        try:
+            async with self.async_redis.pipeline(transaction=False) as pipe:
+                stage_script(pipe, _record, keys=self._keys, args=self._record_args(success, latency))
+                (action, entries), = await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Circuit {self.name} could not record a call: {e}")
+            return
+        self._recorded(action, entries, latency)
+
+    def _record_args(self, success: bool, latency: float) -> List:
+        return [
+            f"{int(success)}:{latency:.4f}", self.window, int(self.open_seconds * 10), self.min_calls,
+            self.error_rate, self.slow_seconds, int(self.open_seconds * 1000), self._probe,
+        ]
+
+    def _recorded(self, action: str, entries: List[str], latency: float) -> None:
+        outcomes = [entry.split(":") for entry in entries]
+        if action == "ignored":
+            return
+        # The probe lock is released once the probe is settled either way
+        if action in ("closed", "probe_failed"):
+            self._probe = ""
+        if action == "closed":
+            self._cached = (CLOSED, time.monotonic() + self.refresh_seconds)
+            self._latencies = []
+            logger.info(f"Circuit {self.name} closed after a successful probe")
+            return
+        if action == "recorded":
+            self._latencies = [float(latency) for ok, latency in outcomes if ok == "1"]
+            return
+        if action == "probe_failed":
+            why = f"probe failed after {latency:.2f}s"
+        else:
+            errors = sum(1 for ok, _ in outcomes if ok == "0") / len(outcomes)
+            p95 = percentile([float(latency) for _, latency in outcomes], 0.95)
+            why = f"error rate {errors:.0%}, p95 latency {p95:.2f}s over {len(outcomes)} calls"
+        self._cached = (OPEN, time.monotonic() + self.open_seconds)
+        self._latencies = []
+        self.counters["trips"] += 1
+        logger.warning(f"Circuit {self.name} opened for {self.open_seconds:.0f}s: {why}")
+
+    def timeout(self, default: float) -> float:
+        """Call timeout adapted to recent latencies: a multiple of the p99, capped at default."""
+        if len(self._latencies) < self.min_calls:
+            return default
+        adaptive = percentile(self._latencies, 0.99) * settings.GEMINI_TIMEOUT_MULTIPLIER
+        return min(default, max(settings.GEMINI_MIN_TIMEOUT, adaptive))
+
+    def stats(self) -> Dict[str, object]:
+        return {"state": self.state(), **self.counters}
@@ -1,18 +1,87 @@
+import asyncio
 import json
 import os
-import google.generativeai as genai
-from datetime import datetime, timedelta
+import time
+import redis.asyncio
+from config.redis import get_redis
+from integrations.ai_cache import MISS, EvaluationCache
+from integrations.circuit_breaker import CircuitBreaker, CircuitOpenError
+from integrations.preclassifier import PreClassifier, create_preclassifier
 from domain.utils.logging import logger
-from domain.utils.decorators import retry, validate_input
+from domain.utils.decorators import timed, validate_input
+from domain.utils.metrics import registry
 from pydantic import BaseModel
-from typing import Optional, Dict
-from functools import lru_cache
-import redis
+from typing import Optional, Dict, List, Sequence, Tuple
+
+MODEL_NAME = "gemini-1.5-pro"
+# Part of every cache key: bump when the prompt or its response format changes
+PROMPT_VERSION = "1"
+
+GENERATION_CONFIG = {
+    "temperature": 0.2,
+    "max_output_tokens": 200,
+    "top_p": 0.95
+}
+# Rough token accounting for packing batched prompts; ~4 characters per token
+BATCH_PROMPT_TOKENS = 250
+BATCH_ITEM_TOKENS = 20
+BATCH_OUTPUT_TOKENS_PER_ITEM = 60
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+SAFETY_SETTINGS = {
+    "HARM_CATEGORY_HARASSMENT": "BLOCK_NONE",
+    "HARM_CATEGORY_HATE_SPEECH": "BLOCK_NONE",
+    "HARM_CATEGORY_SEXUALLY_EXPLICIT": "BLOCK_NONE",
+    "HARM_CATEGORY_DANGEROUS_CONTENT": "BLOCK_NONE"
+}
+
+def create_model():
+    """Builds the Gemini model, or the offline fake when GEMINI_FAKE_MODEL is set."""
+    if os.getenv("GEMINI_FAKE_MODEL", "").lower() in ("1", "true", "yes"):
+        from integrations.mock.gemini import FakeGenerativeModel
+        return FakeGenerativeModel()
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY not found in environment variables!")
+    # Deferred: the SDK takes about a second to import and only model callers need it
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(MODEL_NAME)
+
+def create_cache(model, async_redis: Optional[redis.asyncio.Redis] = None) -> EvaluationCache:
+    """Evaluation cache scoped to the model actually in use."""
+    return EvaluationCache(get_redis(), getattr(model, "model_name", MODEL_NAME), PROMPT_VERSION,
+                           async_redis=async_redis)
+
+def create_breaker(async_redis: Optional[redis.asyncio.Redis] = None) -> CircuitBreaker:
+    """The circuit breaker every process shares for Gemini calls."""
+    return CircuitBreaker("gemini", get_redis(), async_redis=async_redis)
+
+def record_call(mode: str, started: Optional[float], error: Optional[BaseException] = None) -> None:
+    """Counts a model call by outcome and, if it was sent, observes its latency."""
+    if error is None:
+        outcome = "ok"
+    elif isinstance(error, CircuitOpenError):
+        outcome = "circuit_open"
+    # The SDK raises google.api_core's DeadlineExceeded, not TimeoutError
+    elif isinstance(error, TimeoutError) or type(error).__name__ == "DeadlineExceeded":
+        outcome = "timeout"
+    else:
+        outcome = "error"
+    registry.counter("gemini_requests_total", "Gemini calls by mode and outcome",
+                     {"mode": mode, "outcome": outcome}).inc()
+    if started is not None:
+        registry.histogram("gemini_request_seconds", "Latency of Gemini calls sent",
+                           labels={"mode": mode}).observe(time.perf_counter() - started)
 
 class ExtensionEvaluation(BaseModel):
     approved: bool
     reason: str
     confidence: float
+    # "model", or "rules"/"classifier" when the pre-classifier decided locally
+    source: str = "model"
 
 class GeminiAIClient:
     _instance = None
@@ -24,28 +93,41 @@ class GeminiAIClient:
         return cls._instance
     
     def _initialize(self):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables!")
-        
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-pro')
+        self.model = create_model()
         self.timeout = int(os.getenv("GEMINI_TIMEOUT", "30"))
-        self.redis = redis.Redis.from_url(os.getenv('REDIS_URL'))
-        self.cache_ttl = timedelta(hours=1)
+        self.cache = create_cache(self.model)
+        self.preclassifier = create_preclassifier()
+        self.breaker = create_breaker()
         logger.info("Gemini AI client initialized successfully")
 
-    @retry(max_retries=3)
+    @timed(name="gemini_evaluate_extension_seconds")
     @validate_input
     def evaluate_extension(self, request_context: str) -> Optional[ExtensionEvaluation]:
-        """Evaluate extension request using Gemini API with caching"""
-        cache_key = f"gemini:eval:{hash(request_context)}"
-        
-        # Check cache first
-        cached = self._get_cached_evaluation(cache_key)
-        if cached:
-            return cached
-            
+        """Evaluate extension request using Gemini API with caching.
+
+        Returns None on failure, and right away while the circuit is open;
+        the request then stays pending for a later attempt.
+        """
+        # Obvious requests are decided locally without a model call
+        decided = self.preclassifier.classify(request_context) if self.preclassifier else None
+        if decided is not None:
+            return ExtensionEvaluation(**decided)
+
+        # Check cache first; failures are cached briefly as None
+        cached = self.cache.get(request_context)
+        if cached is not MISS:
+            return ExtensionEvaluation(**cached) if cached is not None else None
+
+        try:
+            evaluation = self._evaluate(request_context)
+        except CircuitOpenError:
+            # Not cached: the request hasn't failed, it wasn't tried
+            logger.warning("Gemini circuit is open, leaving the extension request pending")
+            return None
+        self.cache.put(request_context, evaluation.model_dump() if evaluation else None)
+        return evaluation
+
+    def _evaluate(self, request_context: str) -> Optional[ExtensionEvaluation]:
         try:
             # Build structured prompt
             prompt = self._build_evaluation_prompt(request_context)
@@ -55,24 +137,19 @@ class GeminiAIClient:
             
             # Parse and validate response
             result = self._parse_ai_response(response)
-            evaluation = ExtensionEvaluation(**result)
-            
-            # Cache successful evaluation
-            self._cache_evaluation(cache_key, evaluation)
-            
-            return evaluation
+            return ExtensionEvaluation(**result)
             
+        except CircuitOpenError:
+            raise
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse Gemini response: {e}")
             return None
-        except genai.types.GenerativeAIError as e:
-            logger.error(f"Gemini API error: {e}")
-            return None
         except Exception as e:
             logger.error(f"Unexpected error in evaluation: {e}")
             return None
 
-    def _build_evaluation_prompt(self, context: str) -> str:
+    @staticmethod
+    def _build_evaluation_prompt(context: str) -> str:
         """Construct the evaluation prompt with clear instructions"""
         return f"""
         You are a task management AI evaluating extension requests.
@@ -99,33 +176,87 @@ class GeminiAIClient:
         }}
         """
 
+    @staticmethod
+    def _build_batch_prompt(items: Sequence[Tuple[str, str]]) -> str:
+        """Construct one prompt evaluating several (id, context) requests"""
+        requests = "\n".join(json.dumps({"id": item_id, "reason": context}) for item_id, context in items)
+        return f"""
+        You are a task management AI evaluating extension requests.
+        Evaluate each request below independently.
+
+        REQUESTS (one JSON object per line):
+{requests}
+
+        For every request provide an object with these exact fields:
+        - "id" (string): The id of the request
+        - "approved" (boolean): Should this request be approved?
+        - "reason" (string): Short justification (1-2 sentences)
+        - "confidence" (float 0-1): Your confidence in this decision
+
+        Guidelines:
+        1. Approve only for valid reasons (illness, technical issues)
+        2. Reject vague requests ("need more time")
+        3. Confidence must reflect certainty
+
+        Respond ONLY with a valid JSON array with one object per request:
+        [
+            {{"id": "request_id", "approved": true|false, "reason": "your_reason", "confidence": 0.95}}
+        ]
+        """
+
     def _get_ai_response(self, prompt: str):
-        """Get response from Gemini with error handling"""
-        return self.model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.2,
-                "max_output_tokens": 200,
-                "top_p": 0.95
-            },
-            safety_settings={
-                "HARM_CATEGORY_HARASSMENT": "BLOCK_NONE",
-                "HARM_CATEGORY_HATE_SPEECH": "BLOCK_NONE",
-                "HARM_CATEGORY_SEXUALLY_EXPLICIT": "BLOCK_NONE",
-                "HARM_CATEGORY_DANGEROUS_CONTENT": "BLOCK_NONE"
-            }
-        )
+        """Get response from Gemini through the circuit breaker"""
+        if not self.breaker.allow():
+            error = CircuitOpenError("Gemini circuit is open")
+            record_call("sync", None, error)
+            raise error
+        started = time.perf_counter()
+        try:
+            response = self.model.generate_content(
+                prompt,
+                generation_config=GENERATION_CONFIG,
+                safety_settings=SAFETY_SETTINGS,
+                request_options={"timeout": self.breaker.timeout(self.timeout)}
+            )
+        except Exception as e:
+            self.breaker.record(False, time.perf_counter() - started)
+            record_call("sync", started, e)
+            raise
+        self.breaker.record(True, time.perf_counter() - started)
+        record_call("sync", started)
+        return response
 
-    def _parse_ai_response(self, response) -> Dict:
-        """Parse and validate the AI response"""
+    @staticmethod
+    def _response_json(response):
         response_text = response.text.strip()
-        
+
         # Handle code block responses
         if response_text.startswith("```json"):
             response_text = response_text[7:-3].strip()
-        
-        result = json.loads(response_text)
-        
+
+        return json.loads(response_text)
+
+    @staticmethod
+    def _parse_ai_response(response) -> Dict:
+        """Parse and validate the AI response"""
+        return GeminiAIClient._validate_result(GeminiAIClient._response_json(response))
+
+    @staticmethod
+    def _parse_batch_response(response) -> Dict[str, ExtensionEvaluation]:
+        """Parse a batched response into {id: evaluation}, skipping items that fail validation"""
+        items = GeminiAIClient._response_json(response)
+        if not isinstance(items, list):
+            raise ValueError("Batched response must be a JSON array")
+        results = {}
+        for item in items:
+            try:
+                results[str(item["id"])] = ExtensionEvaluation(**GeminiAIClient._validate_result(item))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Dropping invalid batched evaluation {item!r}: {e}")
+        return results
+
+    @staticmethod
+    def _validate_result(result) -> Dict:
         # Validate required fields
         if not all(k in result for k in ["approved", "reason", "confidence"]):
             raise ValueError("Missing required fields in response")
@@ -138,27 +269,6 @@ class GeminiAIClient:
             
         return result
 
-    def _cache_evaluation(self, key: str, evaluation: ExtensionEvaluation):
-        """Cache the evaluation result in Redis"""
-        try:
-            self.redis.setex(
-                key,
-                self.cache_ttl,
-                json.dumps(evaluation.model_dump())
-            )
-        except redis.RedisError as e:
-            logger.warning(f"Failed to cache evaluation: {e}")
-
-    def _get_cached_evaluation(self, key: str) -> Optional[ExtensionEvaluation]:
-        """Retrieve cached evaluation if available"""
-        try:
-            cached = self.redis.get(key)
-            if cached:
-                return ExtensionEvaluation(**json.loads(cached))
-        except (redis.RedisError, json.JSONDecodeError) as e:
-            logger.warning(f"Failed to read cached evaluation: {e}")
-        return None
-
     @staticmethod
     def get_fallback_evaluation() -> ExtensionEvaluation:
         """Provide a default response when AI fails"""
@@ -166,4 +276,224 @@ class GeminiAIClient:
             approved=False,
             reason="System could not process request",
             confidence=0.0
-        )
\ No newline at end of file
+        )
+
+class AsyncExtensionEvaluator:
+    """Evaluates extension requests concurrently on one event loop.
+
+    At most max_concurrency model calls are in flight at a time, and
+    identical request contexts evaluated at the same time share a single
+    call. With a cache, lookups and stores for a batch take one Redis round
+    trip each. With a pre-classifier, requests it can decide confidently
+    never reach the cache or the model. With a batch token budget,
+    evaluate_many packs requests into shared prompts and falls back to one
+    call per item for anything the batched answer leaves out or gets wrong.
+    With a circuit breaker, calls are skipped while it is open and their
+    requests come back as None without being cached. Failures return None,
+    as in GeminiAIClient.evaluate_extension.
+    """
+
+    def __init__(self, model=None, max_concurrency: int = 16, timeout: Optional[float] = None,
+                 cache: Optional[EvaluationCache] = None, batch_token_budget: int = 0,
+                 batch_max_items: int = 25, preclassifier: Optional[PreClassifier] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.model = model or create_model()
+        self.cache = cache
+        self.preclassifier = preclassifier
+        self.breaker = breaker
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout or float(os.getenv("GEMINI_TIMEOUT", "30"))
+        self.batch_token_budget = batch_token_budget
+        self.batch_max_items = batch_max_items
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._deferred: set = set()
+        self.counters = {
+            "calls": 0, "coalesced": 0, "failures": 0, "preclassified": 0, "deferred": 0,
+            "batch_calls": 0, "batched_items": 0, "fallback_items": 0, "batch_seconds": 0.0,
+        }
+
+    @property
+    def calls(self) -> int:
+        return self.counters["calls"]
+
+    @property
+    def coalesced(self) -> int:
+        return self.counters["coalesced"]
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus model calls saved by batching and mean per-item latency of batched calls."""
+        counters = dict(self.counters)
+        answered = counters["batched_items"] - counters["fallback_items"]
+        counters["calls_saved"] = max(0, answered - counters["batch_calls"])
+        counters["mean_item_latency_ms"] = (
+            counters["batch_seconds"] / counters["batched_items"] * 1000 if counters["batched_items"] else 0.0
+        )
+        return counters
+
+    async def evaluate(self, request_context: str) -> Optional[ExtensionEvaluation]:
+        return (await self.evaluate_many([request_context]))[0]
+
+    async def evaluate_many(self, request_contexts: List[str],
+                            labels: Optional[List[str]] = None) -> List[Optional[ExtensionEvaluation]]:
+        """Evaluates all contexts concurrently, results in input order.
+
+        labels (e.g. task ids) identify the items inside batched prompts.
+        """
+        known = [self.preclassifier.classify(context) if self.preclassifier else None for context in request_contexts]
+        remote = [i for i, decided in enumerate(known) if decided is None]
+        self.counters["preclassified"] += len(request_contexts) - len(remote)
+        if self.cache and remote:
+            looked_up = await self.cache.aget_many([request_contexts[i] for i in remote])
+        else:
+            looked_up = [MISS] * len(remote)
+        for i, value in zip(remote, looked_up):
+            known[i] = value
+
+        misses = {}
+        for i, (context, value) in enumerate(zip(request_contexts, known)):
+            if value is MISS and context not in misses:
+                misses[context] = labels[i] if labels else str(len(misses))
+
+        if self.batch_token_budget > 0 and len(misses) > 1:
+            fresh = await self._evaluate_batched(misses)
+        else:
+            fresh = dict(zip(misses, await asyncio.gather(*(self._shared(context) for context in misses))))
+        if self.cache and fresh:
+            await self.cache.aput_many([
+                (context, evaluation.model_dump() if evaluation else None)
+                for context, evaluation in fresh.items() if context not in self._deferred
+            ])
+        self._deferred.difference_update(fresh)
+        return [
+            fresh[context] if value is MISS else (ExtensionEvaluation(**value) if value is not None else None)
+            for context, value in zip(request_contexts, known)
+        ]
+
+    async def _shared(self, request_context: str) -> Optional[ExtensionEvaluation]:
+        call = self._in_flight.get(request_context)
+        if call is not None:
+            self.counters["coalesced"] += 1
+        else:
+            call = asyncio.ensure_future(self._evaluate(request_context))
+            self._in_flight[request_context] = call
+            call.add_done_callback(lambda _: self._in_flight.pop(request_context, None))
+        # Shielded so a cancelled waiter doesn't cancel the call others share
+        return await asyncio.shield(call)
+
+    def _pack(self, labelled: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        """Splits (label, context) items into batches that fit the token budget."""
+        batches, current, used = [], [], BATCH_PROMPT_TOKENS
+        for label, context in labelled:
+            cost = estimate_tokens(context) + BATCH_ITEM_TOKENS + BATCH_OUTPUT_TOKENS_PER_ITEM
+            if current and (used + cost > self.batch_token_budget or len(current) >= self.batch_max_items):
+                batches.append(current)
+                current, used = [], BATCH_PROMPT_TOKENS
+            current.append((label, context))
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _evaluate_batched(self, misses: Dict[str, str]) -> Dict[str, Optional[ExtensionEvaluation]]:
+        loop = asyncio.get_running_loop()
+        waiting: Dict[str, asyncio.Future] = {}
+        owned = []
+        for context, label in misses.items():
+            if context in self._in_flight:
+                self.counters["coalesced"] += 1
+            else:
+                self._in_flight[context] = loop.create_future()
+                owned.append((label, context))
+            waiting[context] = self._in_flight[context]
+        await asyncio.gather(*(self._run_batch(batch) for batch in self._pack(owned)))
+        return {context: await asyncio.shield(future) for context, future in waiting.items()}
+
+    async def _run_batch(self, batch: List[Tuple[str, str]]) -> None:
+        results: Dict[str, Optional[ExtensionEvaluation]] = {}
+        try:
+            if len(batch) == 1:
+                results[batch[0][1]] = await self._evaluate(batch[0][1])
+                return
+            answered = await self._call_batch(batch)
+            fallback = []
+            for label, context in batch:
+                if label in answered:
+                    results[context] = answered[label]
+                else:
+                    fallback.append(context)
+            self.counters["fallback_items"] += len(fallback)
+            for context, evaluation in zip(fallback, await asyncio.gather(*(self._evaluate(c) for c in fallback))):
+                results[context] = evaluation
+        finally:
+            for _, context in batch:
+                future = self._in_flight.pop(context, None)
+                if future is not None and not future.done():
+                    future.set_result(results.get(context))
+
+    async def _generate(self, prompt: str, max_output_tokens: Optional[int] = None):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        config = GENERATION_CONFIG if max_output_tokens is None else {**GENERATION_CONFIG, "max_output_tokens": max_output_tokens}
+        async with self._semaphore:
+            if self.breaker is not None and not await self.breaker.aallow():
+                error = CircuitOpenError("Gemini circuit is open")
+                record_call("async", None, error)
+                raise error
+            self.counters["calls"] += 1
+            timeout = self.breaker.timeout(self.timeout) if self.breaker is not None else self.timeout
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(prompt, generation_config=config, safety_settings=SAFETY_SETTINGS),
+                    timeout
+                )
+            except Exception as e:
+                if self.breaker is not None:
+                    await self.breaker.arecord(False, time.perf_counter() - started)
+                record_call("async", started, e)
+                raise
+            if self.breaker is not None:
+                await self.breaker.arecord(True, time.perf_counter() - started)
+            record_call("async", started)
+            return response
+
+    async def _call_batch(self, batch: List[Tuple[str, str]]) -> Dict[str, ExtensionEvaluation]:
+        """One model call for the whole batch; {} when the answer can't be used at all."""
+        started = time.perf_counter()
+        self.counters["batch_calls"] += 1
+        self.counters["batched_items"] += len(batch)
+        try:
+            response = await self._generate(
+                GeminiAIClient._build_batch_prompt(batch),
+                max_output_tokens=BATCH_OUTPUT_TOKENS_PER_ITEM * len(batch) + 50
+            )
+            return GeminiAIClient._parse_batch_response(response)
+        except CircuitOpenError:
+            pass
+        except asyncio.TimeoutError:
+            logger.error(f"Batched Gemini evaluation of {len(batch)} items timed out")
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error(f"Failed to parse batched Gemini response: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error in batched evaluation: {e}")
+        finally:
+            self.counters["batch_seconds"] += time.perf_counter() - started
+        return {}
+
+    async def _evaluate(self, request_context: str) -> Optional[ExtensionEvaluation]:
+        try:
+            response = await self._generate(GeminiAIClient._build_evaluation_prompt(request_context))
+            return ExtensionEvaluation(**GeminiAIClient._parse_ai_response(response))
+        except CircuitOpenError:
+            self._deferred.add(request_context)
+            self.counters["deferred"] += 1
+            return None
+        except asyncio.TimeoutError:
+            logger.error("Gemini evaluation timed out")
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse Gemini response: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error in evaluation: {e}")
+        self.counters["failures"] += 1
+        return None
@@ -0,0 +1,280 @@
+import json
+import math
+import os
+import re
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+import redis
+from config import settings
+from config.redis import get_redis, pool_stats, redis_url
+from domain.models.indexes import AVAILABLE_KEY, DEADLINES_KEY
+from domain.services.batch_matching import UNASSIGNED_QUEUE
+from domain.services.deadline import PENDING_EXTENSIONS_KEY
+from domain.utils.logging import logger
+from domain.utils.metrics import Counter, MetricsRegistry, registry, series_name, summarize
+from integrations.circuit_breaker import OPEN
+from integrations.gemini import create_breaker
+
+# Totals of every process: counters in one hash, one hash of bucket counts and sum per
+# histogram series, and each series' type, description and buckets
+COUNTERS_KEY = "metrics:counters"
+HISTOGRAM_KEY_PREFIX = "metrics:histogram:"
+META_KEY = "metrics:meta"
+# Celery queues whose length is reported; kombu keeps priorities above 0 in suffixed lists
+CELERY_QUEUES = ("matching", "monitoring", "extensions", "celery")
+CELERY_PRIORITY_STEPS = (0, 3, 6, 9)
+CELERY_PRIORITY_SEP = "\x06\x16"
+# Exported histograms keep every fifth bound, two per decade of the default buckets;
+# the JSON view estimates quantiles from all of them
+EXPORT_BUCKET_STRIDE = 5
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def metric_name(name: str) -> str:
+    """A valid Prometheus name; timed() names default to dotted module paths."""
+    return re.sub(r"[^a-zA-Z0-9_:]", "_", name)
+
+def flush(redis_client: redis.Redis, metrics: MetricsRegistry = registry) -> int:
+    """Adds what this process counted since its last flush to the shared totals, in one round trip.
+
+    Returns the number of series written. Counts stay pending if the write fails.
+    """
+    staged = []
+    with redis_client.pipeline(transaction=False) as pipe:
+        for metric in metrics.metrics():
+            delta = metric.pending()
+            series = series_name(metric_name(metric.name), metric.labels)
+            meta = {"name": metric_name(metric.name), "kind": metric.kind,
+                    "description": metric.description, "labels": dict(metric.labels)}
+            if isinstance(metric, Counter):
+                if not delta:
+                    continue
+                pipe.hincrbyfloat(COUNTERS_KEY, series, delta)
+            else:
+                counts, total = delta
+                if not any(counts):
+                    continue
+                key = HISTOGRAM_KEY_PREFIX + series
+                for index, count in enumerate(counts):
+                    if count:
+                        pipe.hincrby(key, str(index), count)
+                pipe.hincrbyfloat(key, "sum", total)
+                meta["buckets"] = metric.buckets
+            pipe.hset(META_KEY, series, json.dumps(meta))
+            staged.append((metric, delta))
+        if staged:
+            pipe.execute()
+    for metric, delta in staged:
+        metric.commit(delta)
+    return len(staged)
+
+def collect(redis_client: redis.Redis) -> List[Dict[str, Any]]:
+    """Every series' totals across processes, grouped by metric name."""
+    metas = {series: json.loads(meta) for series, meta in redis_client.hgetall(META_KEY).items()}
+    counters = redis_client.hgetall(COUNTERS_KEY)
+    histograms = sorted(series for series, meta in metas.items() if meta["kind"] == "histogram")
+    with redis_client.pipeline(transaction=False) as pipe:
+        for series in histograms:
+            pipe.hgetall(HISTOGRAM_KEY_PREFIX + series)
+        stored = dict(zip(histograms, pipe.execute())) if histograms else {}
+
+    collected = []
+    for series in sorted(metas, key=lambda series: (metas[series]["name"], series)):
+        meta = metas[series]
+        if meta["kind"] == "counter":
+            meta["value"] = float(counters.get(series, 0))
+        else:
+            fields = stored.get(series, {})
+            meta["counts"] = [int(fields.get(str(index), 0)) for index in range(len(meta["buckets"]) + 1)]
+            meta["sum"] = float(fields.get("sum", 0))
+        collected.append(meta)
+    return collected
+
+_broker: Optional[redis.Redis] = None
+
+def broker_client(redis_client: redis.Redis) -> redis.Redis:
+    global _broker
+    if settings.METRICS_BROKER_URL == redis_url():
+        return redis_client
+    if _broker is None:
+        _broker = redis.Redis.from_url(settings.METRICS_BROKER_URL, decode_responses=True)
+    return _broker
+
+def gauges(redis_client: redis.Redis) -> List[Tuple[str, str, Dict[str, str], float]]:
+    """Current values read at scrape time: (name, description, labels, value)."""
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.llen(UNASSIGNED_QUEUE)
+        pipe.scard(PENDING_EXTENSIONS_KEY)
+        pipe.zcard(DEADLINES_KEY)
+        # Deadline scores are naive local timestamps, as DeadlineIndex writes them
+        pipe.zcount(DEADLINES_KEY, "-inf", datetime.now().timestamp())
+        pipe.scard(AVAILABLE_KEY)
+        unassigned, pending, active, overdue, available = pipe.execute()
+    try:
+        with broker_client(redis_client).pipeline(transaction=False) as pipe:
+            for queue in CELERY_QUEUES:
+                for step in CELERY_PRIORITY_STEPS:
+                    pipe.llen(f"{queue}{CELERY_PRIORITY_SEP}{step}" if step else queue)
+            lengths = pipe.execute()
+    except redis.RedisError as e:
+        # A separate broker being down shouldn't take the rest of the scrape with it
+        logger.warning("Celery queue lengths unavailable", extra={"error": str(e)})
+        lengths = None
+    info = redis_client.info()
+
+    values = [
+        ("unassigned_tasks", "Tasks waiting in the unassigned queue", {}, unassigned),
+        ("pending_extension_requests", "Extension requests waiting for evaluation", {}, pending),
+        ("active_assignments", "Assigned tasks with a tracked deadline", {}, active),
+        ("overdue_tasks", "Tracked deadlines that have passed", {}, overdue),
+        ("available_talents", "Talents available for assignment", {}, available),
+        ("gemini_circuit_open", "1 while the Gemini circuit breaker is open", {},
+         1 if create_breaker().state() == OPEN else 0),
+        ("redis_connected_clients", "Clients connected to Redis", {}, info.get("connected_clients", 0)),
+        ("redis_blocked_clients", "Clients blocked on Redis", {}, info.get("blocked_clients", 0)),
+        ("redis_used_memory_bytes", "Memory used by Redis", {}, info.get("used_memory", 0)),
+    ]
+    for index, queue in enumerate(CELERY_QUEUES if lengths is not None else ()):
+        step_lengths = lengths[index * len(CELERY_PRIORITY_STEPS):(index + 1) * len(CELERY_PRIORITY_STEPS)]
+        values.append(("celery_queue_length", "Messages waiting in a Celery queue", {"queue": queue}, sum(step_lengths)))
+    for pool, usage in pool_stats().items():
+        for state, count in usage.items():
+            values.append(("redis_pool_connections", "Connections of the scraping process's Redis pools",
+                           {"pool": pool, "state": state}, count))
+    return values
+
+def _number(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(float(value))
+
+def render(redis_client: redis.Redis, metrics: MetricsRegistry = registry) -> str:
+    """Prometheus text exposition of the totals of every process plus the current gauges."""
+    try:
+        flush(redis_client, metrics)
+    except redis.RedisError as e:
+        logger.warning("Metrics flush failed", extra={"error": str(e)})
+    lines = []
+    described = set()
+
+    def header(name: str, kind: str, description: str) -> None:
+        if name not in described:
+            described.add(name)
+            if description:
+                lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for meta in collect(redis_client):
+        name, labels = meta["name"], tuple(sorted(meta["labels"].items()))
+        header(name, meta["kind"], meta["description"])
+        if meta["kind"] == "counter":
+            lines.append(f"{series_name(name, labels)} {_number(meta['value'])}")
+            continue
+        running = 0
+        for index, (bound, count) in enumerate(zip(meta["buckets"], meta["counts"])):
+            running += count
+            if index % EXPORT_BUCKET_STRIDE == 0:
+                lines.append(f"{series_name(name + '_bucket', labels + (('le', _number(bound)),))} {running}")
+        total = sum(meta["counts"])
+        lines.append(f"{series_name(name + '_bucket', labels + (('le', '+Inf'),))} {total}")
+        lines.append(f"{series_name(name + '_sum', labels)} {_number(meta['sum'])}")
+        lines.append(f"{series_name(name + '_count', labels)} {total}")
+
+    for name, description, labels, value in gauges(redis_client):
+        header(name, "gauge", description)
+        lines.append(f"{series_name(name, tuple(sorted(labels.items())))} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+def snapshot(redis_client: redis.Redis, metrics: MetricsRegistry = registry) -> Dict[str, Dict[str, Any]]:
+    """The same totals for people: counter values, histogram count/sum/p50/p95/p99, gauges."""
+    flush(redis_client, metrics)
+    totals = {}
+    for meta in collect(redis_client):
+        series = series_name(meta["name"], tuple(sorted(meta["labels"].items())))
+        if meta["kind"] == "counter":
+            totals[series] = meta["value"]
+        else:
+            summary = summarize(meta["buckets"], meta["counts"], meta["sum"])
+            totals[series] = {key: summary[key] for key in ("count", "sum", "p50", "p95", "p99")}
+    return {
+        "metrics": totals,
+        "gauges": {series_name(name, tuple(sorted(labels.items()))): value
+                   for name, _, labels, value in gauges(redis_client)},
+    }
+
+class MetricsFlusher:
+    """Flushes this process's registry to the shared totals every interval seconds, on a daemon thread."""
+    def __init__(self, interval: Optional[float] = None, metrics: MetricsRegistry = registry):
+        self.interval = interval or settings.METRICS_FLUSH_INTERVAL
+        self.metrics = metrics
+        self.pid = os.getpid()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-flusher", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def flush(self) -> None:
+        try:
+            flush(get_redis(), self.metrics)
+        except redis.RedisError as e:
+            logger.warning("Metrics flush failed", extra={"error": str(e)})
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def stop(self) -> None:
+        """Stops the thread and flushes what is left."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush()
+
+_flusher: Optional[MetricsFlusher] = None
+
+def start_flusher() -> MetricsFlusher:
+    """Starts this process's flusher; safe to call again, and again after a fork."""
+    global _flusher
+    if _flusher is None or _flusher.pid != os.getpid():
+        _flusher = MetricsFlusher()
+        _flusher.start()
+    return _flusher
+
+def stop_flusher() -> None:
+    global _flusher
+    if _flusher is not None and _flusher.pid == os.getpid():
+        _flusher.stop()
+    _flusher = None
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        try:
+            body = render(get_redis()).encode()
+        except redis.RedisError as e:
+            logger.error("Metrics scrape failed", extra={"error": str(e)})
+            self.send_error(503)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # One line per scrape would only add noise
+        pass
+
+def create_exporter(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """An HTTP server answering GET /metrics like the API does; call serve_forever() to run it."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    logger.info("Metrics exporter listening", extra={"host": host, "port": server.server_port})
+    return server
+
+def start_exporter(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serves GET /metrics from a daemon thread, for processes without the API (Celery workers)."""
+    server = create_exporter(port, host)
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return server
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+# Reasons the fake model approves; everything else is rejected
+APPROVE_PATTERN = re.compile(r"\b(sick|ill|illness|hospital|outage|broke|broken|emergency)\b", re.IGNORECASE)
+CONTEXT_PATTERN = re.compile(r"CONTEXT:\s*(.*?)\s*Provide JSON", re.DOTALL)
+BATCH_PATTERN = re.compile(r"REQUESTS \(one JSON object per line\):\s*(.*?)\n\s*\n", re.DOTALL)
+
+@dataclass
+class MockGeminiResponse:
+    text: str
+
+class FakeGenerativeModel:
+    """Offline stand-in for genai.GenerativeModel with configurable latency.
+
+    Decides from keywords in the prompt's CONTEXT section and answers in
+    the JSON format the evaluation prompt asks for; batched prompts get a
+    JSON array, with batch_drop_rate of the items left out. Set
+    GEMINI_FAKE_MODEL=1 to use it in place of the real model.
+    """
+
+    model_name = "fake"
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.1, failure_rate: float = 0.0,
+                 batch_drop_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.batch_drop_rate = batch_drop_rate
+        self.calls = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._random = random.Random(seed)
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    @staticmethod
+    def _decide(context: str) -> dict:
+        approved = bool(APPROVE_PATTERN.search(context))
+        return {
+            "approved": approved,
+            "reason": "Valid reason" if approved else "Reason is too vague",
+            "confidence": 0.9
+        }
+
+    def _respond(self, prompt: str) -> MockGeminiResponse:
+        self.calls += 1
+        if self._random.random() < self.failure_rate:
+            raise RuntimeError("Fake model failure")
+        batch = BATCH_PATTERN.search(prompt)
+        if batch:
+            items = [json.loads(line) for line in batch.group(1).splitlines() if line.strip()]
+            return MockGeminiResponse(text=json.dumps([
+                {"id": item["id"], **self._decide(item["reason"])}
+                for item in items if self._random.random() >= self.batch_drop_rate
+            ]))
+        match = CONTEXT_PATTERN.search(prompt)
+        return MockGeminiResponse(text=json.dumps(self._decide(match.group(1) if match else prompt)))
+
+    def generate_content(self, prompt: str, **kwargs) -> MockGeminiResponse:
+        time.sleep(self._delay())
+        return self._respond(prompt)
+
+    async def generate_content_async(self, prompt: str, **kwargs) -> MockGeminiResponse:
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            await asyncio.sleep(self._delay())
+            return self._respond(prompt)
+        finally:
+            self._in_flight -= 1
@@ -0,0 +1,188 @@
+import json
+import math
+import os
+import re
+import time
+from typing import Dict, List, Optional, Sequence
+from config import settings
+from integrations.ai_cache import normalize_context
+from domain.utils.logging import logger
+
+RULE_CONFIDENCE = 0.95
+
+# (pattern, approved, reason) over the normalized request text
+RULES = [
+    (r"\b(sick|ill|illness|flu|fever|covid|hospital\w*|surgery|injur\w*|doctor|medical)\b",
+     True, "Medical reason"),
+    (r"\b(laptop|computer|pc|machine|hard ?drive|disk)\b.*\b(broke|broken|crash\w*|died|dead|stolen|fail\w*)\b",
+     True, "Equipment failure"),
+    (r"\b(power|internet|network|electricity) (outage|cut|down|failure)\b|\boutage\b",
+     True, "Power or network outage"),
+    (r"\b(family emergency|bereavement|funeral|passed away)\b",
+     True, "Family emergency"),
+    (r"^(i )?(just )?(need|want) (more|extra) time\W*$",
+     False, "Reason is too vague"),
+    (r"\b(forgot|too busy|didn'?t get to it|procrastinat\w*)\b",
+     False, "Not a valid reason for an extension"),
+]
+# Approving rules don't apply to negated text ("not sick, just need more time")
+_NEGATION = re.compile(r"\b(not|no|never|isn'?t|wasn'?t|don'?t|didn'?t)\b")
+_WORD = re.compile(r"[a-z0-9']+")
+
+class TextClassifier:
+    """TF-IDF features under a logistic regression, trained offline with numpy.
+
+    Saved as JSON, so loading needs no pickles. Scoring one request walks
+    its terms in a dict and takes microseconds.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], idf: Sequence[float], weights: Sequence[float], bias: float):
+        self.vocabulary = vocabulary
+        self.idf = list(idf)
+        self.weights = list(weights)
+        self.bias = bias
+
+    @staticmethod
+    def terms(text: str) -> List[str]:
+        """Word unigrams and bigrams of the normalized text."""
+        words = _WORD.findall(normalize_context(text))
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def _features(self, text: str) -> Dict[int, float]:
+        counts: Dict[int, int] = {}
+        for term in self.terms(text):
+            index = self.vocabulary.get(term)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+        features = {index: count * self.idf[index] for index, count in counts.items()}
+        norm = math.sqrt(sum(value * value for value in features.values())) or 1.0
+        return {index: value / norm for index, value in features.items()}
+
+    def predict_proba(self, text: str) -> float:
+        """Probability that the request would be approved."""
+        z = self.bias + sum(self.weights[index] * value for index, value in self._features(text).items())
+        return 1 / (1 + math.exp(-max(min(z, 30.0), -30.0)))
+
+    @classmethod
+    def train(cls, texts: Sequence[str], labels: Sequence[bool], epochs: int = 300,
+              learning_rate: float = 2.0, l2: float = 1e-4, min_df: int = 1) -> "TextClassifier":
+        """Fits on (text, approved) pairs with full-batch gradient descent."""
+        # Only training needs numpy; loading and predicting are pure Python
+        import numpy as np
+        documents = [cls.terms(text) for text in texts]
+        df: Dict[str, int] = {}
+        for terms in documents:
+            for term in set(terms):
+                df[term] = df.get(term, 0) + 1
+        vocabulary = {term: i for i, term in enumerate(sorted(t for t, count in df.items() if count >= min_df))}
+        n = len(documents)
+        idf = np.zeros(len(vocabulary))
+        for term, index in vocabulary.items():
+            idf[index] = math.log((1 + n) / (1 + df[term])) + 1
+
+        # Sparse rows as (row, column, value) triples
+        model = cls(vocabulary, idf.tolist(), [0.0] * len(vocabulary), 0.0)
+        rows, cols, vals = [], [], []
+        for row, text in enumerate(texts):
+            for index, value in model._features(text).items():
+                rows.append(row)
+                cols.append(index)
+                vals.append(value)
+        rows, cols, vals = np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64), np.array(vals)
+        y = np.array(labels, dtype=float)
+
+        weights = np.zeros(len(vocabulary))
+        bias = 0.0
+        for _ in range(epochs):
+            z = bias + np.bincount(rows, weights=vals * weights[cols], minlength=n)
+            error = 1 / (1 + np.exp(-np.clip(z, -30, 30))) - y
+            gradient = np.bincount(cols, weights=vals * error[rows], minlength=len(vocabulary)) / n + l2 * weights
+            weights -= learning_rate * gradient
+            bias -= learning_rate * error.mean()
+        model.weights = weights.tolist()
+        model.bias = float(bias)
+        return model
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({"vocabulary": self.vocabulary, "idf": self.idf, "weights": self.weights, "bias": self.bias}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "TextClassifier":
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["vocabulary"], data["idf"], data["weights"], data["bias"])
+
+class PreClassifier:
+    """Decides obvious extension requests locally, before the LLM.
+
+    Keyword rules run first, then the optional text classifier. A decision
+    is only made at or above the confidence threshold; anything else, and
+    any request matching rules on both sides, is escalated (None). Decided
+    results carry source "rules" or "classifier".
+    """
+
+    def __init__(self, model: Optional[TextClassifier] = None, threshold: Optional[float] = None, rules=RULES):
+        self.model = model
+        self.threshold = settings.PRECLASSIFIER_THRESHOLD if threshold is None else threshold
+        self.rules = [(re.compile(pattern), approved, reason) for pattern, approved, reason in rules]
+        self.counters = {"lookups": 0, "rule_decisions": 0, "model_decisions": 0, "escalated": 0, "seconds": 0.0}
+
+    def _rule_decision(self, text: str) -> Optional[Dict]:
+        negated = bool(_NEGATION.search(text))
+        matched = {
+            (approved, reason) for pattern, approved, reason in self.rules
+            if not (approved and negated) and pattern.search(text)
+        }
+        if len({approved for approved, _ in matched}) != 1:
+            return None
+        approved, reason = min(matched)
+        return {"approved": approved, "reason": reason, "confidence": RULE_CONFIDENCE, "source": "rules"}
+
+    def classify(self, request_context: str) -> Optional[Dict]:
+        """Returns an evaluation dict, or None when the LLM should decide."""
+        started = time.perf_counter()
+        text = normalize_context(request_context)
+        decision = self._rule_decision(text) if RULE_CONFIDENCE >= self.threshold else None
+        if decision is not None:
+            self.counters["rule_decisions"] += 1
+        elif self.model is not None:
+            probability = self.model.predict_proba(text)
+            confidence = max(probability, 1 - probability)
+            if confidence >= self.threshold:
+                approved = probability >= 0.5
+                decision = {
+                    "approved": approved,
+                    "reason": "Matches previously approved requests" if approved
+                    else "Matches previously rejected requests",
+                    "confidence": round(confidence, 4),
+                    "source": "classifier",
+                }
+                self.counters["model_decisions"] += 1
+        if decision is None:
+            self.counters["escalated"] += 1
+        self.counters["lookups"] += 1
+        self.counters["seconds"] += time.perf_counter() - started
+        return decision
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus the threshold, the fraction short-circuited and mean time per lookup."""
+        counters = dict(self.counters)
+        lookups = counters["lookups"]
+        counters["threshold"] = self.threshold
+        counters["short_circuit_rate"] = (lookups - counters["escalated"]) / lookups if lookups else 0.0
+        counters["mean_us"] = counters["seconds"] / lookups * 1e6 if lookups else 0.0
+        return counters
+
+def create_preclassifier() -> Optional[PreClassifier]:
+    """Pre-classifier from settings, with the trained model when one is configured."""
+    if not settings.PRECLASSIFIER_ENABLED:
+        return None
+    model = None
+    path = settings.PRECLASSIFIER_MODEL_PATH
+    if path:
+        if os.path.exists(path):
+            model = TextClassifier.load(path)
+        else:
+            logger.warning(f"Pre-classifier model {path} not found; using rules only")
+    return PreClassifier(model=model)
@@ -1,37 +1,418 @@
+import asyncio
+import inspect
+import os
+import socket
+import threading
+import time
 import redis
+import redis.asyncio
 import json
-from typing import Callable, Dict, Any
+from typing import Callable, Dict, Any, Iterable, List, Optional, Set, Tuple
+from config import settings
+from config.redis import get_async_redis, get_redis, redis_url
 from domain.utils.logging import logger
 
+# Events of a channel are appended to the stream events:<channel>
+EVENT_STREAM_PREFIX = "events:"
+# Task lifecycle events: created, assigned, reassigning, reassigned, extension_*, completed
+TASK_EVENTS_CHANNEL = "tasks"
+# Entries that kept failing are moved here after EVENT_MAX_DELIVERIES attempts
+DEAD_LETTER_STREAM = "events:dead"
+
+def stream_key(channel: str) -> str:
+    return f"{EVENT_STREAM_PREFIX}{channel}"
+
+def event_id_key(event_id: str) -> Tuple[int, int]:
+    """Sort key of a stream entry id ("<millis>-<seq>")."""
+    millis, _, seq = event_id.partition("-")
+    return int(millis), int(seq or 0)
+
+def decode_event(fields: Dict[str, str]) -> Dict[str, Any]:
+    try:
+        return json.loads(fields["data"])
+    except (KeyError, json.JSONDecodeError):
+        return {"raw": fields}
+
 class RedisEventStream:
-    def __init__(self, redis_url: str = "redis://localhost:6379/0"):
-        self.client = redis.Redis.from_url(redis_url, decode_responses=True)
-        self.pubsub = self.client.pubsub()
+    """Event bus on Redis Streams.
+
+    Events are appended to events:<channel>, trimmed to about
+    EVENT_STREAM_MAXLEN entries, and stay there whether or not anyone is
+    listening. Subscribers read through a consumer group (see
+    EventConsumer), so every event is handled at least once.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None):
+        # Shares the process-wide pool unless pointed at another server
+        self.redis_url = redis_url
+        self.client = redis.Redis.from_url(redis_url, decode_responses=True) if redis_url else get_redis()
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
         logger.info("Redis event stream initialized")
 
-    def subscribe(self, channel: str, callback: Callable[[Dict[str, Any]], None]) -> None:
-        """Subscribe to Redis channel with message handler"""
-        def wrapped_callback(message: Dict):
-            try:
-                data = json.loads(message["data"])
-                callback(data)
-            except json.JSONDecodeError:
-                callback({"raw": message["data"]})
-            except Exception as e:
-                logger.error(f"Message handling failed: {e}")
+    @staticmethod
+    def stage(pipe, channel: str, data: Dict[str, Any]) -> None:
+        """Queues an event on a pipeline (sync or asyncio) or sends it on a plain client."""
+        return pipe.xadd(
+            stream_key(channel), {"data": json.dumps(data)},
+            maxlen=settings.EVENT_STREAM_MAXLEN, approximate=True
+        )
 
-        self.pubsub.subscribe(**{channel: wrapped_callback})
-        logger.info(f"Subscribed to Redis channel: {channel}")
+    def subscribe(self, channel: str, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Registers a handler for a channel; run() starts delivering to it"""
+        self.handlers[channel] = callback
+        logger.info(f"Subscribed to event stream: {stream_key(channel)}")
 
     def publish(self, channel: str, data: Dict[str, Any]) -> bool:
-        """Publish data to Redis channel"""
+        """Append an event to the channel's stream"""
+        try:
+            self.stage(self.client, channel, data)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to publish to {channel}: {e}")
+            return False
+
+    @staticmethod
+    async def apublish(redis_client: redis.asyncio.Redis, channel: str, data: Dict[str, Any]) -> bool:
+        """Append an event to the channel's stream through an asyncio client"""
         try:
-            self.client.publish(channel, json.dumps(data))
+            await RedisEventStream.stage(redis_client, channel, data)
             return True
         except Exception as e:
             logger.error(f"Failed to publish to {channel}: {e}")
             return False
 
-    def run(self) -> None:
-        """Start listening for messages (blocking)"""
-        self.pubsub.run_in_thread(sleep_time=0.1)
\ No newline at end of file
+    def run(self, group: str = "default", consumer: Optional[str] = None) -> threading.Thread:
+        """Consumes the subscribed channels in a background thread with blocking reads"""
+        def consume():
+            client = redis.asyncio.Redis.from_url(self.redis_url or redis_url(), decode_responses=True)
+            asyncio.run(EventConsumer(group, self.handlers, consumer=consumer, redis_client=client).run())
+
+        thread = threading.Thread(target=consume, name=f"events-{group}", daemon=True)
+        thread.start()
+        return thread
+
+class AsyncEventPublisher:
+    """Publishes events from the API, sharing round trips between requests.
+
+    publish() queues the event and waits until it is written. One
+    background task writes everything queued so far in a single pipeline,
+    so concurrent requests share round trips instead of paying one each.
+    There is no timer: under light load a batch is just one event.
+    """
+
+    def __init__(self, redis_client: Optional[redis.asyncio.Redis] = None, max_batch: int = 500):
+        self.redis = redis_client
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"events": 0, "batches": 0, "errors": 0}
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Writes whatever is still queued, then stops."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def publish(self, channel: str, data: Dict[str, Any]) -> bool:
+        if self._task is None:
+            return await RedisEventStream.apublish(self.redis or get_async_redis(), channel, data)
+        written = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((channel, data, written))
+        return await written
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            stopping = batch[-1] is None
+            events = [item for item in batch if item is not None]
+            if events:
+                await self._write(events)
+            if stopping:
+                return
+
+    async def _write(self, events: List[Tuple[str, Dict[str, Any], asyncio.Future]]) -> None:
+        ok = True
+        try:
+            async with (self.redis or get_async_redis()).pipeline(transaction=False) as pipe:
+                for channel, data, _ in events:
+                    RedisEventStream.stage(pipe, channel, data)
+                await pipe.execute()
+            self.counters["events"] += len(events)
+            self.counters["batches"] += 1
+        except Exception as e:
+            logger.error(f"Failed to publish {len(events)} events: {e}")
+            self.counters["errors"] += 1
+            ok = False
+        for _, _, written in events:
+            if not written.done():
+                written.set_result(ok)
+
+class EventConsumer:
+    """Delivers events of some channels to handlers through a consumer group.
+
+    Reads block in XREADGROUP rather than polling. An entry is acknowledged
+    only after its handler returns. When a handler raises, or the consumer
+    dies, the entry stays pending. Once it has been idle for claim_idle_ms,
+    any consumer in the group takes it over with XAUTOCLAIM and retries it.
+    An entry that has been delivered max_deliveries times goes to
+    events:dead instead. Handlers may be plain functions or coroutines and
+    should tolerate duplicates.
+    """
+
+    def __init__(self, group: str, handlers: Dict[str, Callable[[Dict[str, Any]], Any]],
+                 consumer: Optional[str] = None, redis_client: Optional[redis.asyncio.Redis] = None,
+                 count: int = 100, block_ms: int = 5000, claim_idle_ms: Optional[int] = None,
+                 max_deliveries: Optional[int] = None, start_id: str = "0"):
+        self.group = group
+        self.handlers = {stream_key(channel): handler for channel, handler in handlers.items()}
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.redis = redis_client
+        self.count = count
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms or settings.EVENT_CLAIM_IDLE_MS
+        self.max_deliveries = max_deliveries or settings.EVENT_MAX_DELIVERIES
+        self.start_id = start_id
+        self._running = False
+        self.counters = {"handled": 0, "failed": 0, "reclaimed": 0, "dead": 0}
+
+    @property
+    def client(self) -> redis.asyncio.Redis:
+        return self.redis or get_async_redis()
+
+    async def ensure_groups(self) -> None:
+        # start_id "0" also delivers events published before the group existed
+        for stream in self.handlers:
+            try:
+                await self.client.xgroup_create(stream, self.group, id=self.start_id, mkstream=True)
+            except redis.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    async def run(self) -> None:
+        await self.ensure_groups()
+        self._running = True
+        next_claim = 0.0
+        logger.info(f"Consumer {self.consumer} reading {', '.join(self.handlers)} as group {self.group}")
+        while self._running:
+            if time.monotonic() >= next_claim:
+                await self.reclaim()
+                next_claim = time.monotonic() + self.claim_idle_ms / 2000
+            await self.read_once()
+
+    def stop(self) -> None:
+        """Stops after the current read returns (at most block_ms)."""
+        self._running = False
+
+    async def read_once(self) -> int:
+        """One blocking read of new entries; returns how many were handled."""
+        try:
+            entries = await self.client.xreadgroup(
+                self.group, self.consumer, {stream: ">" for stream in self.handlers},
+                count=self.count, block=self.block_ms
+            )
+        except redis.RedisError as e:
+            logger.error(f"Event read failed: {e}")
+            await asyncio.sleep(1)
+            return 0
+        handled = 0
+        for stream, messages in entries or []:
+            handled += await self._handle(stream, messages)
+        return handled
+
+    async def reclaim(self) -> int:
+        """Takes over entries other consumers left pending too long; returns how many were handled."""
+        handled = 0
+        for stream in self.handlers:
+            start = "0-0"
+            while True:
+                start, messages, *_ = await self.client.xautoclaim(
+                    stream, self.group, self.consumer, self.claim_idle_ms, start_id=start, count=self.count
+                )
+                messages = [(message_id, fields) for message_id, fields in messages if fields is not None]
+                if messages:
+                    self.counters["reclaimed"] += len(messages)
+                    handled += await self._handle(stream, await self._drop_dead(stream, messages))
+                if start == "0-0":
+                    break
+        return handled
+
+    async def _drop_dead(self, stream: str, messages: List[Tuple[str, Dict]]) -> List[Tuple[str, Dict]]:
+        pending = await self.client.xpending_range(
+            stream, self.group, min=messages[0][0], max=messages[-1][0], count=len(messages),
+            consumername=self.consumer
+        )
+        deliveries = {entry["message_id"]: entry["times_delivered"] for entry in pending}
+        dead = [(message_id, fields) for message_id, fields in messages
+                if deliveries.get(message_id, 0) > self.max_deliveries]
+        if dead:
+            async with self.client.pipeline() as pipe:
+                for message_id, fields in dead:
+                    pipe.xadd(DEAD_LETTER_STREAM, {**fields, "stream": stream, "id": message_id},
+                              maxlen=settings.EVENT_STREAM_MAXLEN, approximate=True)
+                pipe.xack(stream, self.group, *[message_id for message_id, _ in dead])
+                await pipe.execute()
+            self.counters["dead"] += len(dead)
+            logger.error(f"Moved {len(dead)} events from {stream} to {DEAD_LETTER_STREAM} after repeated failures")
+        return [message for message in messages if message not in dead]
+
+    async def _handle(self, stream: str, messages: List[Tuple[str, Dict]]) -> int:
+        handler = self.handlers[stream]
+        done = []
+        for message_id, fields in messages:
+            try:
+                result = handler(decode_event(fields))
+                if inspect.isawaitable(result):
+                    await result
+                done.append(message_id)
+            except Exception as e:
+                # Left pending; reclaimed and retried after claim_idle_ms
+                logger.error(f"Event {message_id} on {stream} failed: {e}")
+                self.counters["failed"] += 1
+        if done:
+            await self.client.xack(stream, self.group, *done)
+            self.counters["handled"] += len(done)
+        return len(done)
+
+class EventSubscription:
+    """One listener's bounded queue of (event id, event) pairs.
+
+    When the listener falls behind the oldest events are dropped, so a slow
+    client never holds back the shared reader or the other listeners.
+    dropped counts what was lost since the listener last checked.
+    """
+
+    def __init__(self, task_ids: Optional[Set[str]], maxsize: int):
+        self.task_ids = task_ids
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def wants(self, data: Dict[str, Any]) -> bool:
+        return self.task_ids is None or data.get("task_id") in self.task_ids
+
+    def offer(self, item: Tuple[str, Dict[str, Any]]) -> bool:
+        """Queues an event; returns False when an older one had to be dropped for it."""
+        full = self.queue.full()
+        if full:
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+        return not full
+
+    async def get(self) -> Tuple[str, Dict[str, Any]]:
+        return await self.queue.get()
+
+class EventHub:
+    """Fans one upstream read of a channel's stream out to local listeners.
+
+    One task per process follows the stream with blocking XREAD, started
+    with the first listener and stopped once the last one is gone, so
+    Redis sees at most one reader however many clients are connected.
+    Listeners filtered by task id are indexed by it, so each event only
+    touches the listeners that want it.
+    """
+
+    def __init__(self, channel: str = "tasks", redis_client: Optional[redis.asyncio.Redis] = None,
+                 queue_size: Optional[int] = None, count: int = 500, block_ms: int = 5000):
+        self.stream = stream_key(channel)
+        self.redis = redis_client
+        self.queue_size = queue_size or settings.EVENT_SUBSCRIBER_QUEUE_SIZE
+        self.count = count
+        self.block_ms = block_ms
+        self._unfiltered: Set[EventSubscription] = set()
+        self._by_task: Dict[str, Set[EventSubscription]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"events": 0, "delivered": 0, "dropped": 0}
+
+    @property
+    def client(self) -> redis.asyncio.Redis:
+        return self.redis or get_async_redis()
+
+    def subscribe(self, task_ids: Optional[Iterable[str]] = None) -> EventSubscription:
+        subscription = EventSubscription(set(task_ids) if task_ids else None, self.queue_size)
+        if subscription.task_ids is None:
+            self._unfiltered.add(subscription)
+        else:
+            for task_id in subscription.task_ids:
+                self._by_task.setdefault(task_id, set()).add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        self._unfiltered.discard(subscription)
+        for task_id in subscription.task_ids or ():
+            listeners = self._by_task.get(task_id)
+            if listeners is not None:
+                listeners.discard(subscription)
+                if not listeners:
+                    del self._by_task[task_id]
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def dispatch(self, event_id: str, data: Dict[str, Any]) -> None:
+        listeners = set(self._unfiltered)
+        task_id = data.get("task_id")
+        if task_id is not None:
+            listeners.update(self._by_task.get(task_id, ()))
+        for subscription in listeners:
+            if not subscription.offer((event_id, data)):
+                self.counters["dropped"] += 1
+        self.counters["events"] += 1
+        self.counters["delivered"] += len(listeners)
+
+    async def replay(self, subscription: EventSubscription,
+                     after_id: str) -> Tuple[List[Tuple[str, Dict[str, Any]]], int]:
+        """Events after after_id still in the stream that the listener wants, oldest first.
+
+        At most queue_size of the newest are returned, with how many older
+        ones were left out.
+        """
+        events = []
+        start = after_id
+        while True:
+            entries = await self.client.xrange(self.stream, min=f"({start}", max="+", count=self.count)
+            for event_id, fields in entries:
+                data = decode_event(fields)
+                if subscription.wants(data):
+                    events.append((event_id, data))
+            if len(entries) < self.count:
+                break
+            start = entries[-1][0]
+        skipped = max(0, len(events) - self.queue_size)
+        return events[skipped:], skipped
+
+    async def _run(self) -> None:
+        # Start from the current end of the stream; listeners resume older events with replay()
+        latest = await self.client.xrevrange(self.stream, count=1)
+        last_id = latest[0][0] if latest else "0-0"
+        # Checked after each read, at most block_ms after the last listener leaves;
+        # subscribe() starts a new reader once this one is done
+        while self._unfiltered or self._by_task:
+            try:
+                entries = await self.client.xread({self.stream: last_id}, count=self.count, block=self.block_ms)
+            except redis.RedisError as e:
+                logger.error(f"Event hub read failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            for _, messages in entries or []:
+                for event_id, fields in messages:
+                    last_id = event_id
+                    self.dispatch(event_id, decode_event(fields))
+
+    def stats(self) -> Dict[str, int]:
+        return {"listeners": len(set(self._unfiltered).union(*self._by_task.values())), **self.counters}
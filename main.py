@@ -1,25 +1,60 @@
-import os
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional, Dict
+import asyncio
+import io
+import json
+import math
+import tempfile
+import redis
+from celery import group
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, AsyncIterator, Optional, Dict, List, Tuple
 from datetime import datetime, timedelta
 
+from config import settings
+from config.redis import close_async_pool, get_async_redis, get_redis, open_async_pool, pool_stats
+from domain.models.base import ConcurrentUpdateError
+from domain.models.indexes import DeadlineIndex, TaskIndex
 from domain.models.task import Task
+from domain.services.batch_matching import BatchMatchingService
 from domain.services.deadline import ExtensionService
-from tasks.assignment import assign_task
+from domain.services.roster import ROSTER_FORMATS, RosterService
+from domain.utils.ids import new_task_id, new_ulids
+from domain.utils.logging import setup_logging, shutdown_logging
+from tasks.assignment import assign_batch
 from tasks.reassignment import reassign_task
-from integrations.redis_events import RedisEventStream
-import redis
+from integrations.metrics import CONTENT_TYPE, render, snapshot, start_flusher, stop_flusher
+from integrations.redis_events import (
+    TASK_EVENTS_CHANNEL, AsyncEventPublisher, EventHub, RedisEventStream, event_id_key
+)
 
-app = FastAPI(title="Talent Match API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    # One asyncio connection pool shared by every request of this process
+    open_async_pool()
+    events.start()
+    start_flusher()
+    yield
+    await events.close()
+    await hub.close()
+    await close_async_pool()
+    stop_flusher()
+    shutdown_logging()
 
-redis_client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://redis:6379/0"), decode_responses=True)
-event_stream = RedisEventStream()
+# Events of concurrent requests are written to their streams together
+events = AsyncEventPublisher()
+# One reader of the task event stream per process, shared by every /events client
+hub = EventHub(TASK_EVENTS_CHANNEL)
+app = FastAPI(title="Talent Match API", lifespan=lifespan)
 
 # --- Pydantic Schemas for API ---
 class TaskCreate(BaseModel):
     description: str
-    matches: Dict[str, float]
+    matches: Dict[str, float] = {}
+    required_skills: List[str] = []
 
 class ExtensionRequest(BaseModel):
     reason: str
@@ -28,43 +63,175 @@ class ExtensionProcess(BaseModel):
     status: str  # "approved" or "rejected"
     reason: Optional[str] = None
 
-@app.post("/tasks", response_model=Task)
-def create_task(payload: TaskCreate):
-    # Generating a new task_id (for demo, use timestamp)
-    task_id = f"task_{int(datetime.now().timestamp())}"
-    task = Task(
+async def save_task(task: Task) -> None:
+    """Saves an API-modified task, rejecting the request if it raced another writer."""
+    try:
+        saved = await task.ato_redis(get_async_redis(), check_version=True)
+    except ConcurrentUpdateError:
+        raise HTTPException(status_code=409, detail="Task was modified concurrently, please retry")
+    if not saved:
+        raise HTTPException(status_code=500, detail="Failed to save task")
+
+def new_task(task_id: str, payload: TaskCreate, due: datetime) -> Task:
+    return Task(
         task_id=task_id,
         status="unassigned",
         matches=payload.matches,
+        required_skills=payload.required_skills,
         extensions=[],
-        deadline=datetime.now() + timedelta(hours=24),
-        due_date=datetime.now() + timedelta(hours=24)
+        deadline=due,
+        due_date=due
     )
-    task.to_redis(redis_client)
-    # Ensuring automatic assignment by triggering the Celery assignment task immediately
-    assign_task.delay(task_id)
-    event_stream.publish("tasks", {"event": "created", "task_id": task_id})
-    return Task.from_redis(redis_client, task_id)  # Return the latest state (may still be unassigned if Celery is async)
+
+@app.post("/tasks", response_model=Task)
+async def create_task(payload: TaskCreate):
+    redis = get_async_redis()
+    task = new_task(new_task_id(), payload, datetime.now() + timedelta(hours=24))
+    await task.ato_redis(redis)
+    # Queue for batch assignment; a full batch is dispatched right away, otherwise
+    # the beat schedule drains the queue within ASSIGN_BATCH_MAX_LATENCY seconds
+    if await BatchMatchingService.aenqueue(redis, task.task_id) >= settings.ASSIGN_BATCH_SIZE:
+        # Celery's broker client is blocking, keep it off the event loop
+        await run_in_threadpool(assign_batch.delay)
+    await events.publish(TASK_EVENTS_CHANNEL, {"event": "created", "task_id": task.task_id})
+    # Still unassigned; clients follow GET /events?task_id=... for the "assigned" event
+    return task
+
+async def bulk_items(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    """Yields (index, item) from a JSON array body, or each line of an NDJSON body as it arrives."""
+    if "ndjson" not in request.headers.get("content-type", ""):
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array of tasks")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array of tasks")
+        if len(items) > settings.BULK_MAX_TASKS:
+            raise HTTPException(status_code=413, detail=f"At most {settings.BULK_MAX_TASKS} tasks per request")
+        for index, item in enumerate(items):
+            yield index, item
+        return
+    index, buffer = 0, b""
+    async for chunk in request.stream():
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield index, line
+                index += 1
+    if buffer.strip():
+        yield index, buffer
+
+async def write_tasks(redis, payloads: List[TaskCreate]) -> List[str]:
+    """Writes new tasks, their queue entries and "created" events in one pipeline round trip."""
+    due = datetime.now() + timedelta(hours=24)
+    task_ids = [f"task_{ulid}" for ulid in new_ulids(len(payloads))]
+    async with redis.pipeline(transaction=False) as pipe:
+        for task_id, payload in zip(task_ids, payloads):
+            new_task(task_id, payload, due).stage_to_redis(pipe)
+            RedisEventStream.stage(pipe, TASK_EVENTS_CHANNEL, {"event": "created", "task_id": task_id})
+        BatchMatchingService.stage_enqueue(pipe, task_ids)
+        await pipe.execute()
+    return task_ids
+
+@app.post("/tasks/bulk")
+async def create_tasks(request: Request):
+    """Creates many tasks from a JSON array or an NDJSON stream (Content-Type: application/x-ndjson).
+
+    Tasks are written BULK_CHUNK_SIZE at a time while the body is still
+    being read, and assignment is dispatched once for all of them. Invalid
+    items are skipped and reported by their index; the rest are created.
+    """
+    redis = get_async_redis()
+    task_ids: List[str] = []
+    errors: List[Dict[str, Any]] = []
+    chunk: List[TaskCreate] = []
+    async for index, item in bulk_items(request):
+        if index >= settings.BULK_MAX_TASKS:
+            errors.append({"index": index, "error": f"Limit of {settings.BULK_MAX_TASKS} tasks per request reached"})
+            break
+        try:
+            chunk.append(TaskCreate.model_validate_json(item) if isinstance(item, bytes) else TaskCreate.model_validate(item))
+        except ValidationError as e:
+            errors.append({"index": index, "error": "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}" if error["loc"] else error["msg"]
+                for error in e.errors()
+            )})
+            continue
+        if len(chunk) >= settings.BULK_CHUNK_SIZE:
+            task_ids += await write_tasks(redis, chunk)
+            chunk = []
+    if chunk:
+        task_ids += await write_tasks(redis, chunk)
+    if task_ids:
+        # One dispatch for the whole request: a batch per ASSIGN_BATCH_SIZE queued tasks,
+        # sent together and drained by workers in parallel
+        batches = math.ceil(len(task_ids) / settings.ASSIGN_BATCH_SIZE)
+        await run_in_threadpool(group(assign_batch.s() for _ in range(batches)).apply_async)
+    return {"created": len(task_ids), "task_ids": task_ids, "errors": errors}
+
+class TaskPage(BaseModel):
+    tasks: List[Task]
+    next_cursor: Optional[str] = None
+
+@app.get("/tasks", response_model=TaskPage)
+async def list_tasks(status: Optional[str] = None, assigned_to: Optional[str] = None, overdue: bool = False,
+                     cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=500)):
+    """Lists tasks from the status/assignee indexes (or the deadline index when overdue=true).
+
+    Pass next_cursor back as cursor for the following page; it is null once
+    the listing is exhausted. The most selective index is read and any
+    other filter applied to the loaded tasks, so a page can come back short
+    with a cursor when TASK_LIST_MAX_EXAMINED entries matched nothing.
+    """
+    if overdue and cursor:
+        try:
+            DeadlineIndex.parse_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    redis = get_async_redis()
+    now = datetime.now()
+    index_key = TaskIndex.key(status, assigned_to)
+    tasks: List[Task] = []
+    examined = 0
+    while examined < settings.TASK_LIST_MAX_EXAMINED:
+        if overdue:
+            page = await DeadlineIndex.aoverdue_page(redis, now, cursor, limit)
+        else:
+            page = [(task_id, task_id) for task_id in await TaskIndex.apage(redis, index_key, cursor, limit)]
+        if not page:
+            return TaskPage(tasks=tasks)
+        examined += len(page)
+        loaded = await Task.afrom_redis_many(redis, [task_id for task_id, _ in page])
+        for (_, position), task in zip(page, loaded):
+            cursor = position
+            if (task and (not status or task.status == status)
+                    and (not assigned_to or task.assigned_to == assigned_to)):
+                tasks.append(task)
+                if len(tasks) == limit:
+                    return TaskPage(tasks=tasks, next_cursor=cursor)
+        if len(page) < limit:
+            return TaskPage(tasks=tasks)
+    return TaskPage(tasks=tasks, next_cursor=cursor)
 
 @app.get("/tasks/{task_id}", response_model=Task)
-def get_task(task_id: str):
-    task = Task.from_redis(redis_client, task_id)
+async def get_task(task_id: str):
+    task = await Task.afrom_redis(get_async_redis(), task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
 
 @app.post("/tasks/{task_id}/request-extension")
-def request_extension(task_id: str, req: ExtensionRequest):
-    ok = ExtensionService.request_extension(task_id, req.reason)
+async def request_extension(task_id: str, req: ExtensionRequest):
+    ok = await ExtensionService.arequest_extension(task_id, req.reason)
     if not ok:
         raise HTTPException(status_code=400, detail="Extension request failed")
-    event_stream.publish("tasks", {"event": "extension_requested", "task_id": task_id})
+    await events.publish(TASK_EVENTS_CHANNEL, {"event": "extension_requested", "task_id": task_id})
     return {"status": "pending"}
 
 @app.post("/tasks/{task_id}/process-extension")
-def process_extension(task_id: str, req: ExtensionProcess):
+async def process_extension(task_id: str, req: ExtensionProcess):
     # updating fields directly
-    task = Task.from_redis(redis_client, task_id)
+    task = await Task.afrom_redis(get_async_redis(), task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     task.extension_status = req.status
@@ -75,28 +242,111 @@ def process_extension(task_id: str, req: ExtensionProcess):
         # Optionally extend deadline
         task.deadline = datetime.now() + timedelta(hours=24)
         task.due_date = task.deadline
-    task.to_redis(redis_client)
-    event_stream.publish("tasks", {"event": "extension_processed", "task_id": task_id, "status": req.status})
+    await save_task(task)
+    await events.publish(TASK_EVENTS_CHANNEL, {"event": "extension_processed", "task_id": task_id, "status": req.status})
     return {"extension_status": req.status}
 
 @app.post("/cron/reassign-tasks")
-def trigger_reassignment():
-    reassign_task.delay("task_id_placeholder")
-    event_stream.publish("tasks", {"event": "reassignment_triggered"})
+async def trigger_reassignment():
+    await run_in_threadpool(reassign_task.delay, "task_id_placeholder")
+    await events.publish(TASK_EVENTS_CHANNEL, {"event": "reassignment_triggered"})
     return {"status": "reassignment triggered"}
 
 @app.post("/tasks/{task_id}/complete")
-def complete_task(task_id: str):
-    task = Task.from_redis(redis_client, task_id)
+async def complete_task(task_id: str):
+    task = await Task.afrom_redis(get_async_redis(), task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     if task.extension_status == "rejected":
         raise HTTPException(status_code=400, detail="Cannot complete while extension is rejected.")
     task.status = "completed"
-    task.to_redis(redis_client)
-    event_stream.publish("tasks", {"event": "completed", "task_id": task_id})
+    await save_task(task)
+    await events.publish(TASK_EVENTS_CHANNEL, {"event": "completed", "task_id": task_id})
     return {"status": "completed"}
+
+
+def roster_format(request: Request, fmt: Optional[str]) -> str:
+    fmt = fmt or ("ndjson" if "json" in request.headers.get("content-type", "") else "csv")
+    if fmt not in ROSTER_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(ROSTER_FORMATS)}")
+    return fmt
+
+@app.post("/talents/import")
+async def import_talents(request: Request, format: Optional[str] = Query(None)):
+    """Imports a CSV or NDJSON roster body; every row is validated. Returns the import report."""
+    fmt = roster_format(request, format)
+    # The import runs on the blocking client in a worker thread, so the body is
+    # spooled first (to disk past 8 MB) rather than handed across as it arrives
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        lines = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        return await run_in_threadpool(RosterService.import_roster, get_redis(), lines, fmt)
+
+@app.get("/talents/export")
+def export_talents(request: Request, format: Optional[str] = Query("ndjson")):
+    """Streams every talent as CSV or NDJSON, read in SCAN batches."""
+    fmt = roster_format(request, format)
+    return StreamingResponse(RosterService.export_lines(get_redis(), fmt),
+                             media_type="text/csv" if fmt == "csv" else "application/x-ndjson")
+
+def sse(event_id: str, data: Dict) -> str:
+    return f"id: {event_id}\nevent: {data.get('event', 'message')}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/events")
+async def stream_events(request: Request, task_id: Optional[List[str]] = Query(None)):
+    """Server-sent task events, optionally only for the given task ids.
+
+    Reconnecting clients send Last-Event-ID and get the events they missed
+    first. A client that falls too far behind loses its oldest events and
+    is told so with a "lagged" event; it should re-read the tasks it
+    follows.
+    """
+    subscription = hub.subscribe(task_id)
+    last_event_id = request.headers.get("last-event-id")
+
+    async def stream():
+        try:
+            seen = None
+            if last_event_id:
+                missed, skipped = await hub.replay(subscription, last_event_id)
+                if skipped:
+                    yield f"event: lagged\ndata: {json.dumps({'dropped': skipped})}\n\n"
+                for event_id, data in missed:
+                    seen = event_id
+                    yield sse(event_id, data)
+            while not await request.is_disconnected():
+                try:
+                    event_id, data = await asyncio.wait_for(subscription.get(), settings.EVENT_SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if seen and event_id_key(event_id) <= event_id_key(seen):
+                    continue
+                if subscription.dropped:
+                    yield f"event: lagged\ndata: {json.dumps({'dropped': subscription.dropped})}\n\n"
+                    subscription.dropped = 0
+                yield sse(event_id, data)
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # Health check endpoint
 @app.get("/health")
-def health():
-    return {"status": "ok"}
\ No newline at end of file
+async def health():
+    return {"status": "ok", "redis_pools": pool_stats(), "events": hub.stats()}
+
+@app.get("/metrics")
+def metrics(format: str = Query("prometheus")):
+    """Totals of the API and worker processes plus current gauges, as Prometheus text or JSON."""
+    if format not in ("prometheus", "json"):
+        raise HTTPException(status_code=400, detail="format must be one of prometheus, json")
+    try:
+        if format == "json":
+            return snapshot(get_redis())
+        return PlainTextResponse(render(get_redis()), media_type=CONTENT_TYPE)
+    except redis.RedisError:
+        raise HTTPException(status_code=503, detail="Metrics store unavailable")
@@ -0,0 +1,156 @@
+"""
+Operational commands for Talent Match.
+
+    PYTHONPATH=. python manage.py rebuild-indexes
+    PYTHONPATH=. python manage.py migrate-task-storage
+    PYTHONPATH=. python manage.py deadline-scheduler
+    PYTHONPATH=. python manage.py train-preclassifier --out preclassifier.json
+    PYTHONPATH=. python manage.py import-roster talents.csv --trusted
+    PYTHONPATH=. python manage.py export-roster talents.ndjson
+    PYTHONPATH=. python manage.py metrics-exporter --port 9100
+"""
+import argparse
+import importlib
+import sys
+from contextlib import nullcontext
+
+from config.redis import get_redis
+from domain.utils.logging import setup_logging
+
+def rebuild_indexes(args) -> int:
+    from domain.models.indexes import AvailabilityIndex, TaskIndex
+    count = AvailabilityIndex.rebuild(get_redis(), batch_size=args.batch_size)
+    if count is None:
+        print("Another availability index rebuild is running", file=sys.stderr)
+        return 1
+    print(f"Indexed {count} available talents")
+    count = TaskIndex.rebuild(get_redis(), batch_size=args.batch_size)
+    print(f"Indexed {count} tasks for listing")
+    return 0
+
+def migrate_task_storage(args) -> int:
+    from domain.models import Task
+    count = Task.migrate_legacy_storage(get_redis(), batch_size=args.batch_size)
+    print(f"Migrated {count} tasks")
+    return 0
+
+def deadline_scheduler(args) -> int:
+    # Configures the Celery app the scheduler dispatches reassignments through
+    importlib.import_module("config.celery")
+    from tasks.scheduler import DeadlineScheduler
+    DeadlineScheduler(chunk_size=args.chunk_size).run()
+    return 0
+
+def train_preclassifier(args) -> int:
+    import json
+    import random
+    from integrations.preclassifier import TextClassifier
+    if args.data:
+        with open(args.data) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        examples = [(r["reason"], bool(r["approved"])) for r in records if r.get("approved") is not None]
+    else:
+        from domain.services.deadline import ExtensionService
+        examples = list(ExtensionService.decided_requests(get_redis()))
+    if len({approved for _, approved in examples}) < 2:
+        print(f"Need both approved and rejected examples, got {len(examples)} examples")
+        return 1
+
+    random.Random(0).shuffle(examples)
+    held_out = int(len(examples) * args.holdout)
+    test, train = examples[:held_out], examples[held_out:]
+    model = TextClassifier.train([text for text, _ in train], [label for _, label in train], epochs=args.epochs)
+    model.save(args.out)
+    print(f"Trained on {len(train)} examples, {len(model.vocabulary)} terms, saved to {args.out}")
+    if test:
+        correct = sum((model.predict_proba(text) >= 0.5) == label for text, label in test)
+        print(f"Held-out accuracy: {correct / len(test):.1%} on {len(test)} examples")
+    return 0
+
+def roster_format(path: str, fmt) -> str:
+    return fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+
+def import_roster(args) -> int:
+    import json
+    from domain.services.roster import RosterService
+    fmt = roster_format(args.path, args.format)
+    # stdin is left open: only a file opened here is closed
+    with (nullcontext(sys.stdin) if args.path == "-" else open(args.path, newline="")) as f:
+        report = RosterService.import_roster(get_redis(), f, fmt, trusted=args.trusted, chunk_size=args.chunk_size)
+    for error in report["errors"]:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+    print(json.dumps({k: v for k, v in report.items() if k != "errors"}))
+    return 1 if report["failed"] else 0
+
+def export_roster(args) -> int:
+    import json
+    from domain.services.roster import RosterService
+    fmt = roster_format(args.path, args.format)
+    # stdout is flushed but left open for anything printed after the export
+    with (nullcontext(sys.stdout) if args.path == "-" else open(args.path, "w", newline="")) as f:
+        report = RosterService.export_roster(get_redis(), f, fmt, batch_size=args.batch_size)
+        f.flush()
+    print(json.dumps(report), file=sys.stderr)
+    return 0
+
+def metrics_exporter(args) -> int:
+    from integrations.metrics import create_exporter
+    server = create_exporter(args.port, args.host)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Talent Match management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-indexes", help="Regenerate talent availability and task listing indexes from the hashes")
+    rebuild.add_argument("--batch-size", type=int, default=1000)
+    rebuild.set_defaults(handler=rebuild_indexes)
+
+    migrate = commands.add_parser("migrate-task-storage", help="Move task extensions/matches out of JSON hash fields")
+    migrate.add_argument("--batch-size", type=int, default=500)
+    migrate.set_defaults(handler=migrate_task_storage)
+
+    scheduler = commands.add_parser("deadline-scheduler", help="Run the leader-elected deadline scheduler")
+    scheduler.add_argument("--chunk-size", type=int, default=None)
+    scheduler.set_defaults(handler=deadline_scheduler)
+
+    train = commands.add_parser("train-preclassifier",
+                                help="Train the pre-classifier text model on past LLM extension decisions")
+    train.add_argument("--data", help="JSONL with reason and approved; defaults to the decisions stored in Redis")
+    train.add_argument("--out", default="preclassifier.json")
+    train.add_argument("--epochs", type=int, default=300)
+    train.add_argument("--holdout", type=float, default=0.2, help="fraction held out to report accuracy")
+    train.set_defaults(handler=train_preclassifier)
+
+    roster_import = commands.add_parser("import-roster", help="Load talents from a CSV or NDJSON roster")
+    roster_import.add_argument("path", help="roster file, or - for stdin")
+    roster_import.add_argument("--format", choices=("csv", "ndjson"), help="defaults to the file extension")
+    roster_import.add_argument("--trusted", action="store_true", help="skip model validation for a known-good source")
+    roster_import.add_argument("--chunk-size", type=int, default=1000)
+    roster_import.set_defaults(handler=import_roster)
+
+    roster_export = commands.add_parser("export-roster", help="Write every talent to a CSV or NDJSON roster")
+    roster_export.add_argument("path", help="output file, or - for stdout")
+    roster_export.add_argument("--format", choices=("csv", "ndjson"), help="defaults to the file extension")
+    roster_export.add_argument("--batch-size", type=int, default=1000)
+    roster_export.set_defaults(handler=export_roster)
+
+    exporter = commands.add_parser("metrics-exporter",
+                                   help="Serve GET /metrics from the totals in Redis, for deployments without the API")
+    exporter.add_argument("--port", type=int, default=9100)
+    exporter.add_argument("--host", default="0.0.0.0")
+    exporter.set_defaults(handler=metrics_exporter)
+
+    args = parser.parse_args(argv)
+    # stderr, so logs never mix into a roster exported to stdout
+    setup_logging(log_file="manage.log", stream=sys.stderr)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
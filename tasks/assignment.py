@@ -1,35 +1,111 @@
+import time
 from datetime import datetime, timedelta
+from typing import Callable, Optional
+import redis
 from celery import shared_task
+from config import settings
+from domain.models.base import VERSION_FIELD
+from domain.models.codec import encode_datetime
+from domain.models.indexes import AvailabilityIndex, DeadlineIndex, TaskIndex
 from domain.services import MatchingService
+from domain.services.batch_matching import BatchMatchingService, UNASSIGNED_QUEUE
 from config.redis import get_redis
 from domain.utils.logging import logger
 
+def commit_assignment(redis_client: redis.Redis, task_id: str, talent_id: str, expected_status: str,
+                      stage_extra: Optional[Callable] = None) -> Optional[datetime]:
+    """Writes a claimed talent onto a task that is still in expected_status.
+
+    The task hash is WATCHed while its status is checked, so of two workers
+    assigning the same task only one commits. stage_extra(pipe, previous
+    assignee) queues more writes in the same transaction. Returns the new
+    due date, or None after handing the talent back when the task moved on.
+    The claim script already marked the talent unavailable and unindexed it.
+    """
+    key = f"task:{task_id}"
+    with redis_client.pipeline() as pipe:
+        pipe.watch(key)
+        status, previous = pipe.hmget(key, "status", "assigned_to")
+        if status == expected_status:
+            now = datetime.now()
+            due = now + timedelta(seconds=30)
+            pipe.multi()
+            TaskIndex.stage_update(pipe, task_id, {
+                "assigned_to": talent_id,
+                "claimed_at": encode_datetime(now),
+                "status": "assigned",
+                "deadline": encode_datetime(due),
+                "due_date": encode_datetime(due),
+                "extension_status": "none",
+                "extension_requested_at": "",
+                "extension_rejection_reason": "",
+            })
+            pipe.hincrby(key, VERSION_FIELD, 1)
+            DeadlineIndex.stage_track(pipe, task_id, due)
+            if stage_extra is not None:
+                stage_extra(pipe, previous or None)
+            try:
+                pipe.execute()
+                return due
+            except redis.WatchError:
+                pass
+
+    logger.warning("Task changed before assignment was saved, releasing talent",
+                   extra={"task_id": task_id, "talent_id": talent_id})
+    with redis_client.pipeline() as pipe:
+        AvailabilityIndex.stage(pipe, talent_id, True)
+        pipe.execute()
+    return None
+
 @shared_task(bind=True, max_retries=3)
 def assign_task(self, task_id: str):
-    redis = get_redis()
+    redis_client = get_redis()
     try:
         talent_id = MatchingService.get_next_available(task_id)
         if not talent_id:
             raise ValueError("No available talent")
 
-        now = datetime.now()
-        due = now + timedelta(seconds=30)
+        due = commit_assignment(redis_client, task_id, talent_id, "unassigned")
+        if due is None:
+            return False
 
-        with redis.pipeline() as pipe:
-            pipe.hset(f"task:{task_id}", mapping={
-                "assigned_to": talent_id,
-                "claimed_at": now.isoformat(),
-                "status": "assigned",
-                "deadline": due.isoformat(),
-                "due_date": due.isoformat(),
-                "extension_status": "none",
-                "extension_requested_at": "",
-                "extension_rejection_reason": "",
-            })
-            pipe.hset(f"talent:{talent_id}", "available", "false")
-            pipe.execute()
+        logger.info("Assigned task", extra={"task_id": task_id, "talent_id": talent_id, "due_date": due.isoformat()})
+        return True
+    except Exception as e:
+        logger.error("Assignment failed", extra={"task_id": task_id, "error": str(e)})
+        self.retry(countdown=60)
+
+@shared_task(bind=True, max_retries=3)
+def assign_batch(self, batch_size: Optional[int] = None):
+    """Drains up to batch_size tasks from the unassigned queue in one matching pass.
+
+    Claims and assignments are committed by one script, so a failure part way
+    leaves no talent claimed. Tasks that found no talent are deferred for
+    ASSIGN_BATCH_RETRY_DELAY seconds instead of rejoining the queue at once.
+    """
+    redis = get_redis()
+    started = time.perf_counter()
+    BatchMatchingService.release_due(redis)
+    task_ids = redis.lpop(UNASSIGNED_QUEUE, batch_size or settings.ASSIGN_BATCH_SIZE) or []
+    if not task_ids:
+        return {"assigned": 0, "retrying": 0, "tasks_per_sec": 0.0}
 
-        logger.info(f"Assigned {task_id} to {talent_id} with due date {due.isoformat()}")
+    try:
+        assigned, retry = BatchMatchingService.assign(
+            redis, task_ids, optimal_max_size=settings.ASSIGN_BATCH_OPTIMAL_MAX_SIZE
+        )
     except Exception as e:
-        logger.error(f"Assignment failed for {task_id}: {e}")
-        self.retry(countdown=60)
\ No newline at end of file
+        logger.error("Batch assignment failed", extra={"tasks": len(task_ids), "error": str(e)})
+        # Put the batch back at the head of the queue in its original order
+        redis.lpush(UNASSIGNED_QUEUE, *reversed(task_ids))
+        raise self.retry(exc=e, countdown=settings.ASSIGN_BATCH_MAX_LATENCY)
+
+    BatchMatchingService.defer(redis, retry, settings.ASSIGN_BATCH_RETRY_DELAY)
+
+    elapsed = time.perf_counter() - started
+    throughput = len(task_ids) / elapsed if elapsed else 0.0
+    logger.info("Batch assigned", extra={
+        "assigned": len(assigned), "tasks": len(task_ids), "retrying": len(retry),
+        "seconds": round(elapsed, 6), "tasks_per_sec": round(throughput, 1)
+    })
+    return {"assigned": len(assigned), "retrying": len(retry), "tasks_per_sec": throughput}
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import time
+from typing import Optional
+import redis.asyncio
+from celery import shared_task
+from config import settings
+from config.redis import get_redis, pool_options, redis_url
+from domain.services.deadline import ExtensionService, PENDING_EXTENSIONS_KEY
+from domain.utils.logging import logger
+from integrations.gemini import AsyncExtensionEvaluator, create_breaker, create_cache, create_model
+from integrations.preclassifier import create_preclassifier
+
+# One event loop and evaluator per worker process, so the model's async
+# client and the concurrency limit survive across task runs
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_evaluator: Optional[AsyncExtensionEvaluator] = None
+_owner_pid: Optional[int] = None
+
+def get_evaluator() -> AsyncExtensionEvaluator:
+    global _loop, _evaluator, _owner_pid
+    if _evaluator is None or _owner_pid != os.getpid():
+        _loop = asyncio.new_event_loop()
+        # A pool of this process's own, used only on _loop, for the cache and breaker
+        async_redis = redis.asyncio.Redis(
+            connection_pool=redis.asyncio.BlockingConnectionPool.from_url(redis_url(), **pool_options())
+        )
+        model = create_model()
+        _evaluator = AsyncExtensionEvaluator(
+            model=model, max_concurrency=settings.EXTENSION_EVAL_CONCURRENCY,
+            cache=create_cache(model, async_redis),
+            batch_token_budget=settings.EXTENSION_BATCH_TOKEN_BUDGET,
+            batch_max_items=settings.EXTENSION_BATCH_MAX_ITEMS,
+            preclassifier=create_preclassifier(),
+            breaker=create_breaker(async_redis)
+        )
+        _owner_pid = os.getpid()
+    return _evaluator
+
+@shared_task
+def process_pending(limit: Optional[int] = None):
+    """Evaluates pending extension requests concurrently from this worker process."""
+    redis = get_redis()
+    started = time.perf_counter()
+    task_ids = redis.srandmember(PENDING_EXTENSIONS_KEY, limit or settings.EXTENSION_DRAIN_SIZE)
+    pending = ExtensionService.load_pending_requests(redis, task_ids) if task_ids else {}
+    if not pending:
+        return {"evaluated": 0, "failed": 0}
+
+    evaluator = get_evaluator()
+    items = list(pending.items())
+    evaluations = _loop.run_until_complete(
+        evaluator.evaluate_many(
+            [request["reason"] for _, (_, request) in items],
+            labels=[task_id for task_id, _ in items]
+        )
+    )
+
+    # Failed evaluations, and those skipped while the circuit is open, stay pending for the next run
+    # Outcomes of requests decided or replaced meanwhile are discarded by stage_evaluation
+    with redis.pipeline() as pipe:
+        for (task_id, (latest_index, request)), evaluation in zip(items, evaluations):
+            if evaluation is not None:
+                ExtensionService.stage_evaluation(pipe, task_id, latest_index, request, evaluation)
+        evaluated = sum(1 for stored in pipe.execute() if stored)
+
+    elapsed = time.perf_counter() - started
+    stats = evaluator.stats()
+    logger.info("Evaluated pending extensions", extra={
+        "evaluated": evaluated, "pending": len(items), "seconds": round(elapsed, 6),
+        # Evaluator totals since the worker started
+        "preclassified": stats["preclassified"], "model_calls": stats["calls"], "coalesced": stats["coalesced"],
+        "calls_saved": stats["calls_saved"], "deferred": stats["deferred"]
+    })
+    return {"evaluated": evaluated, "failed": len(items) - evaluated}
@@ -1,42 +1,149 @@
-from celery import shared_task
-from datetime import datetime
-from config.redis import get_redis
+import json
+from celery import group, shared_task
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from redis import Redis
+from redis.exceptions import LockError, RedisError
+from redis.lock import Lock
+from config import settings
+from config.redis import get_redis, pool_stats
 from domain.models import Task
+from domain.models.indexes import DeadlineIndex
+from domain.services.deadline import ExtensionService, PENDING_EXTENSIONS_KEY
+from domain.utils.decorators import backoff_delay, timed
 from domain.utils.logging import logger
-from integrations.gemini import GeminiAIClient
+from integrations.circuit_breaker import OPEN
+from integrations.gemini import create_breaker
+from integrations.redis_events import TASK_EVENTS_CHANNEL, stream_key
 from tasks.reassignment import reassign_task
-from tasks.evaluation import evaluate_extension_task
+
+# Held by the active deadline scheduler; the beat sweep only runs without one
+DEADLINE_LEADER_LOCK = "deadlines:scheduler:lock"
 
 @shared_task
-def check_deadlines():
+def check_deadlines(chunk_size: Optional[int] = None):
+    """Fallback sweep of the deadline index for when no deadline scheduler is running."""
     redis = get_redis()
+    lock = redis.lock(DEADLINE_LEADER_LOCK, timeout=settings.DEADLINE_SCHEDULER_LOCK_TTL)
+    if not lock.acquire(blocking=False):
+        logger.info("Deadline scheduler is active, skipping sweep")
+        return None
+    try:
+        return process_expired_deadlines(redis, chunk_size, lock=lock)
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            pass
+
+@timed(name="deadlines_process_expired_seconds")
+def process_expired_deadlines(redis: Redis, chunk_size: Optional[int] = None,
+                              lock: Optional[Lock] = None) -> Dict[str, int]:
+    """Processes expired entries of the deadline index a page at a time.
+
+    The caller should hold DEADLINE_LEADER_LOCK; it is extended after every
+    page so a long backlog doesn't outlive it.
+    """
     now = datetime.now()
-    expired_tasks = redis.zrangebyscore(
-        "assignments:active",
-        0,
-        now.timestamp()
-    )
-
-    for task_id in expired_tasks:
-        task_id_str = task_id.decode() if isinstance(task_id, bytes) else task_id
-        task = Task.from_redis(redis, task_id_str)
-        if not task:
-            logger.warning(f"Task {task_id_str} not found in Redis.")
-            continue
-
-        # If extension is pending, evaluate it
-        if task.extension_status == "pending":
-            logger.info(f"Evaluating extension for overdue task {task_id_str}")
-            evaluate_extension_task.delay(task_id_str)
-        elif task.status == "rejected" or (task.status == "assigned" and task.is_overdue()):
-            logger.info(f"Setting task {task_id_str} to reassigning")
-            task.status = "reassigning"
-            task.to_redis(redis)
-            reassign_task.delay(task_id_str)
-        else:
-            logger.info(f"No action needed for task {task_id_str} with status {task.status} and extension_status {task.extension_status}")
+    # Reassigning tasks stay tracked until a new talent is committed, so one
+    # reassign_task that gave up is dispatched again rather than lost
+    retry_at = now + timedelta(seconds=settings.REASSIGN_RETRY_DELAY)
+    chunk_size = chunk_size or settings.DEADLINE_CHECK_CHUNK_SIZE
+    evaluating = reassigning = 0
+
+    while True:
+        expired = [
+            (task_id.decode() if isinstance(task_id, bytes) else task_id, due)
+            for task_id, due in DeadlineIndex.expired(redis, now, chunk_size)
+        ]
+        if not expired:
+            break
+
+        tasks = Task.from_redis_many(redis, [task_id for task_id, _ in expired])
+        actions = []
+        with redis.pipeline(transaction=False) as pipe:
+            # Handled entries leave the index; new deadlines re-add them. Each entry is
+            # only handled if it wasn't re-tracked, and a task only reassigned if it is
+            # still at the version loaded here, so racing writes are never overwritten
+            for (task_id, due), task in zip(expired, tasks):
+                if not task:
+                    logger.warning("Task with a deadline not found in Redis", extra={"task_id": task_id})
+                    DeadlineIndex.stage_expire(pipe, task_id, due)
+                    actions.append(None)
+                elif task.extension_status == "pending":
+                    # If extension is pending, evaluate it
+                    DeadlineIndex.stage_expire(pipe, task_id, due)
+                    actions.append("evaluate")
+                elif task.status in ("rejected", "reassigning", "assigned"):
+                    # The index score is the deadline; an assigned task popped from it is overdue
+                    task.status = "reassigning"
+                    DeadlineIndex.stage_expire(
+                        pipe, task_id, due, version=task.version, fields=task.changed_fields(),
+                        event_stream=stream_key(TASK_EVENTS_CHANNEL),
+                        event=json.dumps({"event": "reassigning", "task_id": task_id}),
+                        maxlen=settings.EVENT_STREAM_MAXLEN, retrack=retry_at
+                    )
+                    actions.append("reassign")
+                else:
+                    logger.info("No action needed for expired task", extra={
+                        "task_id": task_id, "status": task.status, "extension_status": task.extension_status
+                    })
+                    DeadlineIndex.stage_expire(pipe, task_id, due)
+                    actions.append(None)
+            applied = pipe.execute()
+
+        to_evaluate = [task_id for (task_id, _), action, ok in zip(expired, actions, applied)
+                       if ok and action == "evaluate"]
+        to_reassign = [task_id for (task_id, _), action, ok in zip(expired, actions, applied)
+                       if ok and action == "reassign"]
+        skipped = len(expired) - sum(1 for ok in applied if ok)
+        if skipped:
+            logger.info("Expired tasks changed while being checked, left for the next run",
+                        extra={"skipped": skipped})
+        if to_evaluate:
+            group(evaluate_extension_task.s(task_id) for task_id in to_evaluate).apply_async()
+        if to_reassign:
+            group(reassign_task.s(task_id) for task_id in to_reassign).apply_async()
+        evaluating += len(to_evaluate)
+        reassigning += len(to_reassign)
+        if lock is not None:
+            lock.extend(lock.timeout, replace_ttl=True)
+        # Entries skipped on a full page would be read again; leave them for the next run
+        if len(expired) < chunk_size or skipped == len(expired):
+            break
+
+    logger.info("Deadline check done", extra={"evaluating": evaluating, "reassigning": reassigning})
+    return {"evaluating": evaluating, "reassigning": reassigning}
+
+@shared_task(bind=True, max_retries=3)
+def evaluate_extension_task(self, task_id: str):
+    """Evaluates one extension request, retried later with jittered backoff on failure.
+
+    The retry is a Celery countdown, so the worker is free while waiting.
+    Nothing is retried while the Gemini circuit is open; the request stays
+    pending and process_pending picks it up once the circuit closes.
+    """
+    if ExtensionService.evaluate_extension(task_id):
+        return True
+    if not get_redis().sismember(PENDING_EXTENSIONS_KEY, task_id):
+        return False
+    if self.request.retries >= self.max_retries or create_breaker().state() == OPEN:
+        logger.info("Leaving extension request pending", extra={"task_id": task_id})
+        return False
+    raise self.retry(countdown=backoff_delay(self.request.retries + 1, base=2.0, cap=60.0))
 
 @shared_task
-def evaluate_extension_task(task_id: str):
-    ai_client = GeminiAIClient()
-    ai_client.evaluate_extension(task_id)
\ No newline at end of file
+def check_system_health():
+    """Logs Redis reachability, server-side client counts and this worker's pool usage."""
+    redis = get_redis()
+    try:
+        clients = redis.info("clients")
+    except RedisError as e:
+        logger.error("Redis health check failed", extra={"error": str(e)})
+        return {"redis": "unreachable", "pools": pool_stats()}
+    stats = pool_stats()
+    logger.info("Redis health check", extra={
+        "connected_clients": clients.get("connected_clients"), "blocked_clients": clients.get("blocked_clients"),
+        "pools": stats
+    })
+    return {"redis": "ok", "connected_clients": clients.get("connected_clients"), "pools": stats}
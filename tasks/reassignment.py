@@ -1,8 +1,10 @@
-from datetime import datetime, timedelta
 from celery import shared_task
 from domain.models.task import Task
+from domain.models.indexes import AvailabilityIndex
 from domain.services import MatchingService
 from config.redis import get_redis
+from integrations.redis_events import TASK_EVENTS_CHANNEL, RedisEventStream
+from tasks.assignment import commit_assignment
 from domain.utils.logging import logger
 
 @shared_task(bind=True, max_retries=3)
@@ -17,27 +19,20 @@ def reassign_task(self, task_id: str):
         if not new_talent:
             raise ValueError("No available talent")
 
-        now = datetime.now()
-        due = now + timedelta(seconds=30)
-
-        # Atomic reassignment and deadline reset
-        with redis.pipeline() as pipe:
-            if task.assigned_to:
-                pipe.hset(f"talent:{task.assigned_to}", "available", "true")
-            pipe.hset(f"task:{task_id}", mapping={
-                "assigned_to": new_talent,
-                "claimed_at": now.isoformat(),
-                "status": "assigned",
-                "deadline": due.isoformat(),
-                "due_date": due.isoformat(),
-                "extension_status": "none",
-                "extension_requested_at": "",
-                "extension_rejection_reason": "",
+        def release_previous(pipe, previous):
+            if previous:
+                AvailabilityIndex.stage(pipe, previous, True)
+            RedisEventStream.stage(pipe, TASK_EVENTS_CHANNEL, {
+                "event": "reassigned", "task_id": task_id, "talent_id": new_talent, "previous_talent": previous
             })
-            pipe.hset(f"talent:{new_talent}", "available", "false")
-            pipe.execute()
 
-        logger.info(f"Reassigned {task_id} to {new_talent} with new due date {due.isoformat()}")
+        # Atomic reassignment and deadline reset, unless another worker reassigned it first
+        due = commit_assignment(redis, task_id, new_talent, "reassigning", stage_extra=release_previous)
+        if due is None:
+            return False
+
+        logger.info("Reassigned task", extra={"task_id": task_id, "talent_id": new_talent, "due_date": due.isoformat()})
+        return True
     except Exception as e:
-        logger.error(f"Reassignment failed for {task_id}: {e}")
+        logger.error("Reassignment failed", extra={"task_id": task_id, "error": str(e)})
         self.retry(countdown=120)
\ No newline at end of file
@@ -0,0 +1,110 @@
+import math
+import signal
+import time
+from typing import Optional, Tuple
+import redis
+from redis.exceptions import LockError
+from config import settings
+from config.redis import get_redis
+from domain.models.indexes import DEADLINE_WAKEUP_CHANNEL, DeadlineIndex
+from domain.utils.logging import logger
+from tasks.monitoring import DEADLINE_LEADER_LOCK, process_expired_deadlines
+
+class DeadlineScheduler:
+    """Processes expired deadlines as soon as they pass.
+
+    Sleeps until the earliest due timestamp in the deadline index and wakes
+    early when a task is tracked with an earlier one. Instances compete for
+    DEADLINE_LEADER_LOCK; only the holder acts, the others stand by.
+
+        PYTHONPATH=. python manage.py deadline-scheduler
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None,
+                 lock_ttl: Optional[float] = None, chunk_size: Optional[int] = None):
+        self.redis = redis_client or get_redis()
+        self.lock_ttl = lock_ttl or settings.DEADLINE_SCHEDULER_LOCK_TTL
+        self.chunk_size = chunk_size or settings.DEADLINE_CHECK_CHUNK_SIZE
+        self.lock = self.redis.lock(DEADLINE_LEADER_LOCK, timeout=self.lock_ttl)
+        self.is_leader = False
+        self.running = False
+        self._pubsub = None
+
+    def _hold_leadership(self) -> bool:
+        """Acquires the leader lock, or renews it when already held."""
+        try:
+            if self.is_leader:
+                self.lock.extend(self.lock_ttl, replace_ttl=True)
+            elif self.lock.acquire(blocking=False):
+                self.is_leader = True
+                logger.info("Deadline scheduler acquired leadership")
+        except LockError:
+            self.is_leader = False
+            logger.warning("Deadline scheduler lost leadership")
+        return self.is_leader
+
+    def tick(self) -> Tuple[float, float]:
+        """Runs one scheduling step.
+
+        Returns how long to wait before the next step and the due timestamp
+        being waited for; a wakeup for anything earlier ends the wait.
+        """
+        renew_interval = self.lock_ttl / 3
+        if not self._hold_leadership():
+            return renew_interval, -math.inf
+
+        next_due = DeadlineIndex.next_due(self.redis)
+        if next_due is not None and next_due <= time.time():
+            result = process_expired_deadlines(self.redis, self.chunk_size, lock=self.lock)
+            logger.info("Deadline scheduler processed expirations", extra=result)
+            next_due = DeadlineIndex.next_due(self.redis)
+
+        if next_due is None:
+            return renew_interval, math.inf
+        return max(0.0, min(next_due - time.time(), renew_interval)), next_due
+
+    def wait(self, timeout: float, target: float) -> None:
+        """Blocks for up to timeout seconds, or until a deadline earlier than target is tracked."""
+        until = time.monotonic() + timeout
+        while self.running:
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                return
+            message = self._pubsub.get_message(timeout=remaining)
+            if not message or message.get("type") != "message":
+                continue
+            try:
+                due = float(message["data"])
+            except (TypeError, ValueError):
+                continue
+            if due < target:
+                return
+
+    def stop(self, *_) -> None:
+        self.running = False
+
+    def run(self) -> None:
+        """Runs until SIGINT/SIGTERM."""
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        # Subscribe before the first read so no earlier deadline is missed
+        self._pubsub = self.redis.pubsub()
+        self._pubsub.subscribe(DEADLINE_WAKEUP_CHANNEL)
+        logger.info("Deadline scheduler started")
+        try:
+            while self.running:
+                try:
+                    timeout, target = self.tick()
+                except redis.RedisError as e:
+                    logger.error("Deadline scheduler step failed", extra={"error": str(e)})
+                    timeout, target = 1.0, -math.inf
+                self.wait(timeout, target)
+        finally:
+            if self.is_leader:
+                try:
+                    self.lock.release()
+                except LockError:
+                    pass
+            self._pubsub.close()
+            logger.info("Deadline scheduler stopped")
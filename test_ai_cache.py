@@ -0,0 +1,47 @@
+import asyncio
+from config.redis import get_async_redis
+from integrations.ai_cache import MISS, EvaluationCache
+from integrations.gemini import AsyncExtensionEvaluator
+from integrations.mock.gemini import FakeGenerativeModel
+
+def test_async_and_sync_paths_share_entries(redis_client):
+    writer = EvaluationCache(None, "model", "1", async_redis=get_async_redis())
+    reader = EvaluationCache(redis_client, "model", "1", local_size=0)
+
+    async def store_then_read():
+        await writer.aput_many([("Laptop  broke", {"approved": True}), ("vague", None)])
+        return await EvaluationCache(None, "model", "1", async_redis=get_async_redis()).aget_many(
+            ["laptop broke", "vague", "unknown"]
+        )
+
+    assert asyncio.run(store_then_read()) == [{"approved": True}, None, MISS]
+    assert reader.get_many(["laptop broke", "vague"]) == [{"approved": True}, None]
+    assert redis_client.ttl(writer.key("vague")) <= writer.negative_ttl
+
+def test_without_async_client_lookups_run_off_the_loop(redis_client):
+    cache = EvaluationCache(redis_client, "model", "1", local_size=0)
+    cache.put("laptop broke", {"approved": True})
+
+    async def lookup():
+        return await cache.aget_many(["laptop broke", "unknown"])
+
+    assert asyncio.run(lookup()) == [{"approved": True}, MISS]
+    assert cache.stats()["redis_hits"] == 1
+
+def test_evaluator_uses_the_async_cache_path(redis_client, monkeypatch):
+    cache = EvaluationCache(redis_client, "fake", "1", async_redis=get_async_redis())
+    def blocking(*args):
+        raise AssertionError("sync cache call inside the event loop")
+    monkeypatch.setattr(cache, "get_many", blocking)
+    monkeypatch.setattr(cache, "put_many", blocking)
+    model = FakeGenerativeModel(latency=0, jitter=0, seed=1)
+    evaluator = AsyncExtensionEvaluator(model=model, cache=cache)
+
+    async def evaluate_twice():
+        first = await evaluator.evaluate_many(["laptop broke", "laptop broke"])
+        second = await evaluator.evaluate("laptop broke")
+        return first, second
+
+    first, second = asyncio.run(evaluate_twice())
+    assert first[0] == first[1] == second
+    assert model.calls == 1
@@ -0,0 +1,59 @@
+import json
+from domain.models import Talent, Task
+from domain.models.indexes import AVAILABLE_KEY
+from domain.services import MatchingService
+from integrations.redis_events import TASK_EVENTS_CHANNEL, stream_key
+from tasks.assignment import assign_task, commit_assignment
+from tasks.reassignment import reassign_task
+
+def save_talents(redis_client, *talent_ids):
+    for talent_id in talent_ids:
+        Talent(talent_id=talent_id, rating=4.0, skills=["python"]).to_redis(redis_client)
+
+def save_task(redis_client, task_id, status="unassigned", assigned_to=None, matches=None):
+    Task(task_id=task_id, status=status, assigned_to=assigned_to, matches=matches or {}).to_redis(redis_client)
+
+def test_assign_task_claims_talent_once(redis_client):
+    save_talents(redis_client, "t1", "t2")
+    save_task(redis_client, "task1", matches={"t1": 0.9, "t2": 0.5})
+
+    assert assign_task("task1") is True
+    task = Task.from_redis(redis_client, "task1")
+    assert (task.status, task.assigned_to) == ("assigned", "t1")
+    assert redis_client.hget("talent:t1", "available") == "false"
+    assert redis_client.smembers(AVAILABLE_KEY) == {"t2"}
+
+def test_assignment_of_a_task_that_moved_on_releases_the_talent(redis_client):
+    save_talents(redis_client, "t1")
+    save_task(redis_client, "task1", status="completed", matches={"t1": 0.9})
+    talent_id = MatchingService.get_next_available("task1")
+
+    assert commit_assignment(redis_client, "task1", talent_id, "unassigned") is None
+    assert Task.from_redis(redis_client, "task1").status == "completed"
+    assert redis_client.hget("talent:t1", "available") == "true"
+    assert redis_client.sismember(AVAILABLE_KEY, "t1")
+
+def test_concurrent_reassignments_commit_once(redis_client, monkeypatch):
+    save_talents(redis_client, "old", "first", "second")
+    with redis_client.pipeline() as pipe:
+        pipe.hset("talent:old", "available", "false")
+        pipe.srem(AVAILABLE_KEY, "old")
+        pipe.execute()
+    save_task(redis_client, "task1", status="reassigning", assigned_to="old",
+              matches={"first": 0.9, "second": 0.5})
+
+    claim = MatchingService.get_next_available
+    def racing_claim(task_id):
+        # Another worker reassigns the task between our load and our write
+        monkeypatch.setattr(MatchingService, "get_next_available", claim)
+        assert reassign_task(task_id) is True
+        return claim(task_id)
+    monkeypatch.setattr(MatchingService, "get_next_available", racing_claim)
+
+    assert reassign_task("task1") is False
+    task = Task.from_redis(redis_client, "task1")
+    assert (task.status, task.assigned_to) == ("assigned", "first")
+    # The losing worker's talent and the previous assignee are both available again
+    assert redis_client.smembers(AVAILABLE_KEY) == {"old", "second"}
+    events = [json.loads(fields["data"]) for _, fields in redis_client.xrange(stream_key(TASK_EVENTS_CHANNEL))]
+    assert [event["talent_id"] for event in events if event["event"] == "reassigned"] == ["first"]
@@ -0,0 +1,89 @@
+import pytest
+import domain.services.matching
+from config import settings
+from domain.models import Talent, Task
+from domain.models.indexes import AVAILABLE_KEY
+from domain.services.batch_matching import (
+    UNASSIGNED_QUEUE, UNASSIGNED_RETRY_KEY, BatchMatchingService, solve_greedy, solve_optimal
+)
+from tasks.assignment import assign_batch
+
+@pytest.fixture(autouse=True)
+def fresh_talent_matrix(monkeypatch):
+    # The matrix is loaded once per process; each test starts from its own Redis
+    monkeypatch.setattr(domain.services.matching, "_talent_matrix", None)
+
+def save_talent(redis_client, talent_id, available=True, skills=("python",)):
+    Talent(talent_id=talent_id, available=available, rating=4.0, skills=list(skills)).to_redis(redis_client)
+
+def save_task(redis_client, task_id, matches=None, required_skills=None, status="unassigned"):
+    Task(task_id=task_id, status=status, matches=matches or {},
+         required_skills=required_skills or []).to_redis(redis_client)
+
+def test_optimal_beats_greedy_on_contended_talent():
+    matches = {"a": {"x": 0.9, "y": 0.8}, "b": {"x": 0.85}}
+    assert solve_greedy(matches) == {"a": "x"}
+    assert solve_optimal(matches) == {"a": "y", "b": "x"}
+
+def test_assign_commits_claims_and_retries_losers(redis_client):
+    save_talent(redis_client, "x")
+    save_task(redis_client, "a", matches={"x": 0.9})
+    save_task(redis_client, "b", matches={"x": 0.5})
+
+    assigned, retry = BatchMatchingService.assign(redis_client, ["a", "b"])
+    assert assigned == {"a": "x"}
+    assert retry == ["b"]
+    assert Task.from_redis(redis_client, "a").assigned_to == "x"
+    assert not redis_client.sismember(AVAILABLE_KEY, "x")
+
+def test_skill_matched_task_waits_while_talents_are_busy(redis_client):
+    save_talent(redis_client, "busy", available=False, skills=["rust"])
+    save_task(redis_client, "skills", required_skills=["rust"])
+    save_task(redis_client, "nothing")
+
+    assigned, retry = BatchMatchingService.assign(redis_client, ["skills", "nothing"])
+    assert assigned == {}
+    # Requeued until a rust talent frees up; a task with nothing to match on is dropped
+    assert retry == ["skills"]
+
+def test_skill_matched_task_is_assigned_alongside_others(redis_client):
+    save_talent(redis_client, "busy", available=False, skills=["rust"])
+    save_talent(redis_client, "x")
+    save_task(redis_client, "skills", required_skills=["rust"])
+    save_task(redis_client, "a", matches={"x": 0.9})
+    save_task(redis_client, "done", matches={"x": 1.0}, status="completed")
+
+    assigned, retry = BatchMatchingService.assign(redis_client, ["skills", "a", "done"])
+    assert assigned == {"a": "x"}
+    assert retry == ["skills"]
+
+def test_task_that_moved_on_keeps_its_state_and_frees_no_talent(redis_client, monkeypatch):
+    save_talent(redis_client, "x")
+    save_task(redis_client, "a", matches={"x": 0.9})
+    solve = BatchMatchingService.solve
+
+    def complete_first(matches, optimal_max_size):
+        # Another worker finishes the task between the read and the commit
+        redis_client.hset("task:a", "status", "completed")
+        return solve(matches, optimal_max_size)
+
+    monkeypatch.setattr(BatchMatchingService, "solve", staticmethod(complete_first))
+    assigned, _ = BatchMatchingService.assign(redis_client, ["a"])
+    assert assigned == {}
+    assert not Task.from_redis(redis_client, "a").assigned_to
+    assert redis_client.sismember(AVAILABLE_KEY, "x")
+    assert Talent.from_redis(redis_client, "x").available
+
+def test_batch_defers_tasks_without_talent(redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "ASSIGN_BATCH_RETRY_DELAY", 30)
+    save_talent(redis_client, "busy", available=False, skills=["rust"])
+    save_task(redis_client, "skills", required_skills=["rust"])
+    BatchMatchingService.enqueue(redis_client, "skills")
+
+    assert assign_batch.run()["retrying"] == 1
+    assert redis_client.llen(UNASSIGNED_QUEUE) == 0
+    assert BatchMatchingService.release_due(redis_client) == 0
+
+    redis_client.zadd(UNASSIGNED_RETRY_KEY, {"skills": 0})
+    assert BatchMatchingService.release_due(redis_client) == 1
+    assert redis_client.lrange(UNASSIGNED_QUEUE, 0, -1) == ["skills"]
@@ -0,0 +1,106 @@
+import asyncio
+from config.redis import get_async_redis
+from integrations.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+def make_breaker(redis_client, **options):
+    defaults = {"window": 10, "min_calls": 4, "error_rate": 0.5, "slow_seconds": 2.0, "open_seconds": 30,
+                "refresh_seconds": 0}
+    return CircuitBreaker("test", redis_client, **{**defaults, **options})
+
+def end_open_period(redis_client, breaker):
+    redis_client.delete(breaker.open_key)
+    breaker._cached = (CLOSED, 0.0)
+
+def test_trips_on_error_rate_for_every_process(redis_client):
+    breaker, other = make_breaker(redis_client), make_breaker(redis_client)
+    for success in (True, False, True):
+        breaker.record(success, 0.1)
+    assert breaker.allow() and breaker.state() == CLOSED
+
+    breaker.record(False, 0.1)
+    assert breaker.counters["trips"] == 1
+    assert not breaker.allow()
+    assert other.state() == OPEN
+    assert not redis_client.exists(breaker.calls_key)
+
+def test_trips_on_slow_p95(redis_client):
+    breaker = make_breaker(redis_client)
+    for latency in (0.1, 0.1, 0.1, 2.5):
+        breaker.record(True, latency)
+    assert breaker.state() == OPEN
+
+def test_half_open_allows_one_probe_that_closes_on_success(redis_client):
+    breaker, other = make_breaker(redis_client), make_breaker(redis_client)
+    for _ in range(4):
+        breaker.record(False, 0.1)
+    end_open_period(redis_client, breaker)
+
+    assert breaker.state() == HALF_OPEN
+    assert breaker.allow() and not other.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state() == other.state() == CLOSED
+    assert not redis_client.exists(breaker.half_open_key, breaker.probe_key)
+
+def test_only_the_probe_holder_settles_a_half_open_circuit(redis_client):
+    breaker, other = make_breaker(redis_client), make_breaker(redis_client)
+    for _ in range(4):
+        breaker.record(False, 0.1)
+    end_open_period(redis_client, breaker)
+
+    assert breaker.allow()
+    # Calls of other processes that finish now are not the probe
+    other.record(True, 0.1)
+    other.record(False, 0.1)
+    assert breaker.state() == HALF_OPEN and other.state() == HALF_OPEN
+    assert redis_client.exists(breaker.probe_key)
+    breaker.record(False, 0.1)
+    assert breaker.state() == OPEN
+
+def test_async_probe_closes_the_circuit(redis_client):
+    breaker = make_breaker(redis_client, async_redis=get_async_redis())
+    for _ in range(4):
+        breaker.record(False, 0.1)
+    end_open_period(redis_client, breaker)
+
+    async def probe():
+        allowed = await breaker.aallow()
+        await breaker.arecord(True, 0.1)
+        return allowed, await breaker.astate()
+
+    assert asyncio.run(probe()) == (True, CLOSED)
+
+def test_failed_probe_opens_again(redis_client):
+    breaker = make_breaker(redis_client)
+    for _ in range(4):
+        breaker.record(False, 0.1)
+    end_open_period(redis_client, breaker)
+
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state() == OPEN
+    assert breaker.counters["trips"] == 2
+
+def test_async_api_shares_state_with_sync(redis_client):
+    breaker = make_breaker(redis_client, async_redis=get_async_redis())
+    threaded = make_breaker(redis_client)
+
+    async def fail_until_open():
+        allowed = []
+        for _ in range(5):
+            allowed.append(await breaker.aallow())
+            if allowed[-1]:
+                await breaker.arecord(False, 0.1)
+        return allowed, await threaded.astate()
+
+    assert asyncio.run(fail_until_open()) == ([True] * 4 + [False], OPEN)
+    assert make_breaker(redis_client).state() == OPEN
+
+def test_calls_finishing_while_open_are_not_taken_for_the_probe(redis_client):
+    breaker = make_breaker(redis_client)
+    for _ in range(4):
+        breaker.record(False, 0.1)
+    # A call sent before the trip fails afterwards
+    breaker.record(False, 0.1)
+    assert breaker.counters["trips"] == 1
+    end_open_period(redis_client, breaker)
+    assert breaker.allow()
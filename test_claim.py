@@ -0,0 +1,98 @@
+import redis
+import domain.models.indexes as indexes
+from domain.models import Talent
+from domain.models.indexes import AVAILABLE_BY_RATING_KEY, AVAILABLE_KEY, AvailabilityIndex, skill_key
+from domain.services.claim import ClaimEngine
+
+def save_talent(redis_client, talent_id, available=True, rating=4.0, skills=("python",)):
+    Talent(talent_id=talent_id, available=available, rating=rating, skills=list(skills)).to_redis(redis_client)
+
+def test_claim_first_takes_best_available_candidate(redis_client):
+    save_talent(redis_client, "busy", available=False)
+    save_talent(redis_client, "free")
+    save_talent(redis_client, "also_free")
+
+    assert ClaimEngine(redis_client).claim_first(["busy", "free", "also_free"]) == "free"
+    assert redis_client.hget("talent:free", "available") == "false"
+    assert not redis_client.sismember(AVAILABLE_KEY, "free")
+    assert not redis_client.sismember(skill_key("python"), "free")
+    assert redis_client.zscore(AVAILABLE_BY_RATING_KEY, "free") is None
+    assert redis_client.sismember(AVAILABLE_KEY, "also_free")
+
+def test_claim_first_returns_none_when_all_busy(redis_client):
+    save_talent(redis_client, "a", available=False)
+    assert ClaimEngine(redis_client).claim_first(["a", "missing"]) is None
+    assert ClaimEngine(redis_client).claim_first([]) is None
+
+def test_claim_first_drops_stale_index_entries(redis_client):
+    save_talent(redis_client, "stale")
+    # Hash changed behind the index's back
+    redis_client.hset("talent:stale", "available", "false")
+    assert ClaimEngine(redis_client).claim_first(["stale"]) is None
+    assert not redis_client.sismember(AVAILABLE_KEY, "stale")
+
+def test_availability_index_follows_talent_writes(redis_client):
+    save_talent(redis_client, "t1", rating=4.5, skills=["python", "sql"])
+    assert redis_client.smembers(skill_key("sql")) == {"t1"}
+    assert redis_client.zscore(AVAILABLE_BY_RATING_KEY, "t1") == 4.5
+
+    talent = Talent.from_redis(redis_client, "t1")
+    talent.skills = ["go"]
+    talent.to_redis(redis_client)
+    assert not redis_client.sismember(skill_key("sql"), "t1")
+    assert redis_client.smembers(skill_key("go")) == {"t1"}
+
+    with redis_client.pipeline() as pipe:
+        AvailabilityIndex.stage(pipe, "t1", False)
+        pipe.execute()
+    assert redis_client.hget("talent:t1", "available") == "false"
+    assert not redis_client.sismember(AVAILABLE_KEY, "t1")
+    assert not redis_client.sismember(skill_key("go"), "t1")
+
+def test_rebuild_matches_incremental_indexes(redis_client):
+    save_talent(redis_client, "a", skills=["python"])
+    save_talent(redis_client, "b", available=False, skills=["python"])
+    save_talent(redis_client, "c", rating=2.0, skills=["sql"])
+    redis_client.sadd(skill_key("stale"), "a")
+
+    assert AvailabilityIndex.rebuild(redis_client, batch_size=2) == 2
+    assert redis_client.smembers(AVAILABLE_KEY) == {"a", "c"}
+    assert redis_client.smembers(skill_key("python")) == {"a"}
+    assert not redis_client.exists(skill_key("stale"))
+    assert AvailabilityIndex.available_with_skills(redis_client, ["sql"]) == ["c"]
+
+def test_claim_during_rebuild_survives_the_swap(redis_client, monkeypatch):
+    save_talent(redis_client, "a")
+    save_talent(redis_client, "b")
+    flush = indexes._rebuild_batch
+
+    def claim_after_batch(keys, args, client):
+        result = flush(keys=keys, args=args, client=client)
+        # A worker claims a talent the rebuild has already indexed as available
+        ClaimEngine(client).claim_first(["a"])
+        return result
+    monkeypatch.setattr(indexes, "_rebuild_batch", claim_after_batch)
+
+    assert AvailabilityIndex.rebuild(redis_client) == 1
+    assert redis_client.smembers(AVAILABLE_KEY) == {"b"}
+    assert redis_client.smembers(skill_key("python")) == {"b"}
+    assert not redis_client.exists(indexes.AVAILABILITY_REBUILD_KEY)
+
+def test_rebuild_reads_a_bytes_client(redis_client):
+    save_talent(redis_client, "a")
+    save_talent(redis_client, "b", available=False)
+    raw = redis.Redis(connection_pool=redis.ConnectionPool(
+        connection_class=redis_client.connection_pool.connection_class,
+        server=redis_client.connection_pool.connection_kwargs["server"]
+    ))
+    assert AvailabilityIndex.rebuild(raw) == 1
+    assert redis_client.smembers(AVAILABLE_KEY) == {"a"}
+
+def test_indexes_are_built_once_for_talents_saved_before_them(redis_client):
+    # Written by a version without the availability indexes
+    redis_client.hset("talent:old", mapping={"available": "true", "rating": "4", "skills": '["python"]'})
+    assert ClaimEngine(redis_client).claim_first(["old"]) is None
+
+    assert AvailabilityIndex.ensure_built(redis_client) == 1
+    assert AvailabilityIndex.ensure_built(redis_client) is None
+    assert ClaimEngine(redis_client).claim_first(["old"]) == "old"
@@ -0,0 +1,30 @@
+from datetime import datetime
+from config import settings
+from domain.models import Task
+from domain.models.codec import SCHEMA_FIELD, SCHEMA_VERSION
+
+DUE = datetime(2024, 5, 1, 12, 30, 15, 250000)
+
+def test_codec_v2_round_trip(redis_client):
+    Task(task_id="task1", status="assigned", due_date=DUE, deadline=DUE, required_skills=["python"]).to_redis(redis_client)
+    stored = redis_client.hgetall("task:task1")
+    assert stored[SCHEMA_FIELD] == str(SCHEMA_VERSION)
+    assert stored["due_date"] == str(round(DUE.timestamp() * 1000))
+    assert stored["claimed_at"] == ""
+
+    task = Task.from_redis(redis_client, "task1")
+    assert task.due_date == task.deadline == DUE
+    assert (task.claimed_at, task.required_skills) == (None, ["python"])
+
+def test_records_from_the_previous_codec_are_read_and_upgraded(redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_SCHEMA_VERSION", 1)
+    Task(task_id="task1", due_date=DUE).to_redis(redis_client)
+    assert redis_client.hget("task:task1", "due_date") == DUE.isoformat()
+    assert redis_client.hget("task:task1", SCHEMA_FIELD) == "1"
+
+    monkeypatch.setattr(settings, "MODEL_SCHEMA_VERSION", SCHEMA_VERSION)
+    task = Task.from_redis(redis_client, "task1")
+    assert task.due_date == DUE
+    task.status = "assigned"
+    task.to_redis(redis_client)
+    assert redis_client.hget("task:task1", SCHEMA_FIELD) == str(SCHEMA_VERSION)
@@ -0,0 +1,156 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+import pytest
+import httpx
+from celery.exceptions import MaxRetriesExceededError
+import main
+import tasks.monitoring
+import tasks.reassignment
+from config.redis import get_async_redis
+from domain.models import Task
+from domain.models.indexes import DEADLINES_KEY, DeadlineIndex
+from integrations.redis_events import TASK_EVENTS_CHANNEL, stream_key
+from tasks.monitoring import process_expired_deadlines
+
+class RecordingGroup:
+    """Stands in for celery.group, recording the dispatched task ids instead of sending them."""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, signatures):
+        signatures = list(signatures)
+        self.calls.append((signatures[0].task, [signature.args[0] for signature in signatures]))
+        return self
+
+    def apply_async(self):
+        return None
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    recorder = RecordingGroup()
+    monkeypatch.setattr(tasks.monitoring, "group", recorder)
+    return recorder.calls
+
+def save_overdue_task(redis_client, task_id, minutes_ago=5, **fields):
+    due = datetime.now() - timedelta(minutes=minutes_ago)
+    Task(task_id=task_id, status="assigned", assigned_to="t1", due_date=due, deadline=due, **fields).to_redis(redis_client)
+    return due
+
+def test_overdue_task_is_set_reassigning_and_dispatched(redis_client, dispatched):
+    save_overdue_task(redis_client, "late")
+    save_overdue_task(redis_client, "asking", extension_status="pending")
+    Task(task_id="later", status="assigned", due_date=datetime.now() + timedelta(hours=1)).to_redis(redis_client)
+
+    assert process_expired_deadlines(redis_client, chunk_size=1) == {"evaluating": 1, "reassigning": 1}
+    assert Task.from_redis(redis_client, "late").status == "reassigning"
+    # Still tracked, at the retry delay, until a new talent is committed
+    assert redis_client.zrange(DEADLINES_KEY, 0, -1) == ["late", "later"]
+    assert sorted(task_ids for _, task_ids in dispatched) == [["asking"], ["late"]]
+    events = [json.loads(fields["data"]) for _, fields in redis_client.xrange(stream_key(TASK_EVENTS_CHANNEL))]
+    assert {"event": "reassigning", "task_id": "late"} in events
+
+def test_reassignment_without_talent_is_dispatched_again(redis_client, dispatched, monkeypatch):
+    save_overdue_task(redis_client, "late")
+    monkeypatch.setattr(tasks.reassignment.MatchingService, "get_next_available", lambda task_id: None)
+
+    for _ in range(2):
+        assert process_expired_deadlines(redis_client)["reassigning"] == 1
+        # The last retry of reassign_task finds no talent either and it gives up
+        with pytest.raises(MaxRetriesExceededError):
+            tasks.reassignment.reassign_task.apply(args=["late"], retries=3, throw=True)
+        assert Task.from_redis(redis_client, "late").status == "reassigning"
+        assert redis_client.zscore(DEADLINES_KEY, "late") > datetime.now().timestamp()
+        # The retry delay passes
+        redis_client.zadd(DEADLINES_KEY, {"late": 1.0})
+    assert dispatched == [(tasks.reassignment.reassign_task.name, ["late"])] * 2
+
+def test_task_popped_at_its_deadline_is_reassigned(redis_client, dispatched):
+    due = datetime.now() + timedelta(minutes=5)
+    Task(task_id="edge", status="assigned", assigned_to="t1", due_date=due, deadline=due).to_redis(redis_client)
+    # The index score says due even though due_date, read back, is not yet past
+    redis_client.zadd(DEADLINES_KEY, {"edge": datetime.now().timestamp() - 1})
+
+    assert process_expired_deadlines(redis_client)["reassigning"] == 1
+    assert Task.from_redis(redis_client, "edge").status == "reassigning"
+
+def test_task_rescheduled_during_the_check_keeps_its_deadline(redis_client, dispatched, monkeypatch):
+    save_overdue_task(redis_client, "late")
+    new_due = datetime.now() + timedelta(hours=24)
+    load = Task.from_redis_many
+
+    def load_then_race(client, task_ids):
+        loaded = load(client, task_ids)
+        # An approved extension lands between the read and the write
+        task = Task.from_redis(client, "late")
+        task.extension_status = "approved"
+        task.due_date = task.deadline = new_due
+        task.to_redis(client)
+        return loaded
+    monkeypatch.setattr(Task, "from_redis_many", load_then_race)
+
+    assert process_expired_deadlines(redis_client) == {"evaluating": 0, "reassigning": 0}
+    task = Task.from_redis(redis_client, "late")
+    assert (task.status, task.extension_status) == ("assigned", "approved")
+    assert redis_client.zscore(DEADLINES_KEY, "late") == pytest.approx(new_due.timestamp())
+    assert dispatched == []
+
+def test_task_changed_during_the_check_is_left_for_the_next_run(redis_client, dispatched, monkeypatch):
+    due = save_overdue_task(redis_client, "late")
+    load = Task.from_redis_many
+
+    def load_then_race(client, task_ids):
+        loaded = load(client, task_ids)
+        # A write that leaves the deadline alone but moves the version on
+        task = Task.from_redis(client, "late")
+        task.status = "completed_pending_review"
+        task.to_redis(client)
+        return loaded
+    monkeypatch.setattr(Task, "from_redis_many", load_then_race)
+
+    assert process_expired_deadlines(redis_client)["reassigning"] == 0
+    assert Task.from_redis(redis_client, "late").status == "completed_pending_review"
+    assert redis_client.zscore(DEADLINES_KEY, "late") == pytest.approx(due.timestamp())
+
+def test_stage_expire_only_removes_the_score_it_read(redis_client):
+    with redis_client.pipeline() as pipe:
+        DeadlineIndex.stage_track(pipe, "a", datetime(2024, 1, 1))
+        pipe.execute()
+    with redis_client.pipeline() as pipe:
+        DeadlineIndex.stage_expire(pipe, "a", datetime(2023, 1, 1).timestamp())
+        DeadlineIndex.stage_expire(pipe, "missing", 1.0)
+        assert pipe.execute() == [0, 0]
+    with redis_client.pipeline() as pipe:
+        DeadlineIndex.stage_expire(pipe, "a", datetime(2024, 1, 1).timestamp())
+        assert pipe.execute() == [1]
+    assert redis_client.zcard(DEADLINES_KEY) == 0
+
+def test_wakeup_is_published_only_for_a_new_earliest_deadline(redis_client):
+    with redis_client.pipeline() as pipe:
+        DeadlineIndex.stage_track(pipe, "a", datetime(2024, 1, 2))
+        DeadlineIndex.stage_track(pipe, "b", datetime(2024, 1, 3))
+        DeadlineIndex.stage_track(pipe, "c", datetime(2024, 1, 1))
+        DeadlineIndex.stage_track(pipe, "b", datetime(2024, 1, 4))
+        assert pipe.execute() == [1, 0, 1, 0]
+    assert redis_client.zrange(DEADLINES_KEY, 0, -1) == ["c", "a", "b"]
+
+def test_overdue_pages_share_a_timestamp_and_reject_bad_cursors(redis_client):
+    due = datetime.now() - timedelta(minutes=5)
+    with redis_client.pipeline() as pipe:
+        for task_id in ("a", "b", "c"):
+            DeadlineIndex.stage_track(pipe, task_id, due)
+        pipe.execute()
+
+    async def pages():
+        first = await DeadlineIndex.aoverdue_page(get_async_redis(), datetime.now(), None, 2)
+        second = await DeadlineIndex.aoverdue_page(get_async_redis(), datetime.now(), first[-1][1], 2)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            statuses = [
+                (await client.get("/tasks", params={"overdue": True, "cursor": cursor})).status_code
+                for cursor in ("nonsense", "1.5", "1.5:x", "inf:1", "1.5:-1", second[-1][1])
+            ]
+        return first, second, statuses
+
+    first, second, statuses = asyncio.run(pages())
+    assert [task_id for task_id, _ in first + second] == ["a", "b", "c"]
+    assert statuses == [400] * 5 + [200]
@@ -0,0 +1,40 @@
+import asyncio
+from config.redis import get_async_redis
+from integrations.redis_events import DEAD_LETTER_STREAM, EventConsumer, RedisEventStream, stream_key
+
+def publish(redis_client, *events):
+    with redis_client.pipeline() as pipe:
+        for event in events:
+            RedisEventStream.stage(pipe, "tasks", event)
+        pipe.execute()
+
+def test_failed_events_are_reclaimed_then_dead_lettered(redis_client):
+    attempts = []
+
+    def handler(event):
+        attempts.append(event["task_id"])
+        if event["task_id"] == "bad":
+            raise ValueError("cannot handle")
+
+    async def consume():
+        crashed = EventConsumer("workers", {"tasks": handler}, consumer="crashed",
+                                redis_client=get_async_redis(), block_ms=10, claim_idle_ms=1, max_deliveries=2)
+        survivor = EventConsumer("workers", {"tasks": handler}, consumer="survivor",
+                                 redis_client=get_async_redis(), block_ms=10, claim_idle_ms=1, max_deliveries=2)
+        await crashed.ensure_groups()
+        handled = [await crashed.read_once()]
+        for _ in range(3):
+            await asyncio.sleep(0.01)
+            handled.append(await survivor.reclaim())
+        return handled, crashed.counters, survivor.counters
+
+    publish(redis_client, {"task_id": "good"}, {"task_id": "bad"})
+    handled, crashed, survivor = asyncio.run(consume())
+
+    assert handled == [1, 0, 0, 0]
+    # Delivered to the first consumer, retried once by the survivor, then set aside
+    assert attempts == ["good", "bad", "bad"]
+    assert (crashed["failed"], survivor["failed"], survivor["dead"]) == (1, 1, 1)
+    dead = redis_client.xrange(DEAD_LETTER_STREAM)
+    assert len(dead) == 1 and dead[0][1]["stream"] == stream_key("tasks")
+    assert redis_client.xpending(stream_key("tasks"), "workers")["pending"] == 0
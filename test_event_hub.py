@@ -0,0 +1,29 @@
+import asyncio
+from config.redis import get_async_redis
+from integrations.redis_events import EventHub, RedisEventStream
+
+def test_reader_delivers_then_stops_with_the_last_listener(redis_client):
+    async def scenario():
+        hub = EventHub("tasks", get_async_redis(), block_ms=20)
+        everything = hub.subscribe()
+        only_a = hub.subscribe(["a"])
+        await asyncio.sleep(0.05)
+        await RedisEventStream.apublish(get_async_redis(), "tasks", {"event": "assigned", "task_id": "b"})
+        received = await asyncio.wait_for(everything.get(), 1)
+
+        hub.unsubscribe(everything)
+        hub.unsubscribe(only_a)
+        reader = hub._task
+        await asyncio.wait_for(reader, 1)
+
+        # A new listener starts a new reader
+        again = hub.subscribe()
+        restarted = hub._task is not reader and not hub._task.done()
+        hub.unsubscribe(again)
+        await hub.close()
+        return received, only_a.queue.qsize(), restarted
+
+    (_, data), filtered, restarted = asyncio.run(scenario())
+    assert data["task_id"] == "b"
+    assert filtered == 0
+    assert restarted
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import httpx
+import main
+from domain.models import Task
+from domain.models.task import extensions_key
+from domain.services.deadline import PENDING_EXTENSIONS_KEY, ExtensionService
+from integrations.gemini import ExtensionEvaluation
+from tasks.extensions import process_pending
+
+OLD_REQUEST = {"requested_at": "2024-01-01T00:00:00", "reason": "old", "approved": True}
+
+def save_legacy_task(redis_client, task_id):
+    # Layout written before extensions and matches moved out of the hash
+    redis_client.hset(f"task:{task_id}", mapping={
+        "status": "assigned",
+        "assigned_to": "t1",
+        "extensions": json.dumps([OLD_REQUEST]),
+        "matches": json.dumps({"t1": 0.5}),
+    })
+
+def test_request_on_legacy_task_survives_next_save(redis_client):
+    save_legacy_task(redis_client, "task1")
+    assert ExtensionService.request_extension("task1", "laptop broke")
+
+    assert not redis_client.hexists("task:task1", "extensions")
+    task = Task.from_redis(redis_client, "task1")
+    assert [request["reason"] for request in task.extensions] == ["old", "laptop broke"]
+    task.matches = {"t1": 0.7}
+    assert task.to_redis(redis_client)
+
+    pending = ExtensionService.load_pending_requests(redis_client, ["task1"])
+    assert pending["task1"][0] == 1
+    assert pending["task1"][1]["reason"] == "laptop broke"
+    assert redis_client.llen(extensions_key("task1")) == 2
+
+def test_async_request_on_legacy_task(redis_client):
+    save_legacy_task(redis_client, "task1")
+    assert asyncio.run(ExtensionService.arequest_extension("task1", "family emergency"))
+    reasons = [json.loads(raw)["reason"] for raw in redis_client.lrange(extensions_key("task1"), 0, -1)]
+    assert reasons == ["old", "family emergency"]
+    assert json.loads(redis_client.lindex(extensions_key("task1"), 0)) == OLD_REQUEST
+
+def test_evaluation_updates_latest_request(redis_client):
+    Task(task_id="task1", status="assigned", assigned_to="t1").to_redis(redis_client)
+    assert ExtensionService.request_extension("task1", "first")
+    assert ExtensionService.request_extension("task1", "second")
+
+    index, request = ExtensionService.load_pending_requests(redis_client, ["task1"])["task1"]
+    evaluation = ExtensionEvaluation(approved=False, reason="too late", confidence=0.9)
+    with redis_client.pipeline() as pipe:
+        ExtensionService.stage_evaluation(pipe, "task1", index, request, evaluation)
+        pipe.execute()
+
+    task = Task.from_redis(redis_client, "task1")
+    assert (task.status, task.extension_status) == ("reassigning", "rejected")
+    assert [request["approved"] for request in task.extensions] == [None, False]
+    assert not redis_client.sismember(PENDING_EXTENSIONS_KEY, "task1")
+
+def test_manual_decision_is_not_overwritten_by_the_drain(redis_client):
+    Task(task_id="task1", status="assigned", assigned_to="t1").to_redis(redis_client)
+    assert ExtensionService.request_extension("task1", "laptop broke")
+    index, request = ExtensionService.load_pending_requests(redis_client, ["task1"])["task1"]
+
+    async def decide():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            return await client.post("/tasks/task1/process-extension", json={"status": "approved"})
+
+    assert asyncio.run(decide()).status_code == 200
+    assert not redis_client.sismember(PENDING_EXTENSIONS_KEY, "task1")
+    assert process_pending.run() == {"evaluated": 0, "failed": 0}
+
+    # An evaluation already in flight when the manual decision landed is discarded
+    evaluation = ExtensionEvaluation(approved=False, reason="too late", confidence=0.9)
+    with redis_client.pipeline() as pipe:
+        ExtensionService.stage_evaluation(pipe, "task1", index, request, evaluation)
+        assert pipe.execute() == [0]
+    task = Task.from_redis(redis_client, "task1")
+    assert task.extension_status == "approved"
+    assert task.extensions[-1]["approved"] is None
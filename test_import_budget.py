@@ -0,0 +1,27 @@
+import os
+import pytest
+from benchmarks.bench_import_time import TARGETS, heavy_imported, measure, profile
+
+# Median cold import budgets in ms, about 1.7x what the API and worker take today.
+# Scale them with IMPORT_BUDGET_FACTOR on slow machines rather than editing them.
+IMPORT_BUDGET_MS = {"api": 1500, "worker": 1000}
+BUDGET_FACTOR = float(os.getenv("IMPORT_BUDGET_FACTOR", "1"))
+
+@pytest.mark.parametrize("target", sorted(TARGETS))
+def test_import_time_within_budget(target):
+    result = measure(TARGETS[target], runs=3)
+    budget = IMPORT_BUDGET_MS[target] * BUDGET_FACTOR
+    assert result["median_ms"] <= budget, (
+        f"{target} imports in {result['median_ms']:.0f} ms, over its {budget:.0f} ms budget; "
+        f"see benchmarks/bench_import_time.py for the slowest modules"
+    )
+
+@pytest.mark.parametrize("target", sorted(TARGETS))
+def test_heavy_dependencies_are_deferred(target):
+    assert heavy_imported(profile(TARGETS[target])) == []
+
+@pytest.mark.parametrize("target", sorted(TARGETS))
+def test_import_has_no_side_effects(target, tmp_path):
+    # Logging is configured by entry points, so importing creates no log files
+    profile(TARGETS[target], cwd=tmp_path)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,48 @@
+import pytest
+import redis
+import integrations.metrics
+from domain.utils.metrics import MetricsRegistry
+from integrations.metrics import collect, flush, render
+
+@pytest.fixture
+def scrape_ready(redis_client, monkeypatch):
+    # fakeredis has no INFO; the Celery broker is the same server here
+    monkeypatch.setattr(redis.Redis, "info", lambda self, *args, **kwargs: {"connected_clients": 3})
+    monkeypatch.setattr(integrations.metrics, "broker_client", lambda client: client)
+    return redis_client
+
+def make_registry():
+    metrics = MetricsRegistry()
+    metrics.counter("cache.lookups", "Lookups", {"result": "hit"}).inc(2)
+    latency = metrics.histogram("call_seconds", "Call latency", buckets=[0.1, 1.0])
+    latency.observe(0.05)
+    latency.observe(5.0)
+    return metrics
+
+def test_flush_adds_only_new_counts_across_processes(redis_client):
+    first, second = make_registry(), make_registry()
+    assert flush(redis_client, first) == 2
+    assert flush(redis_client, first) == 0
+    flush(redis_client, second)
+
+    totals = {meta["name"]: meta for meta in collect(redis_client)}
+    assert totals["cache_lookups"]["value"] == 4
+    assert totals["call_seconds"]["counts"] == [2, 0, 2]
+    assert totals["call_seconds"]["sum"] == pytest.approx(10.1)
+
+def test_render_exposes_totals_and_gauges(scrape_ready):
+    scrape_ready.rpush("celery", "message")
+    text = render(scrape_ready, make_registry())
+
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    assert "# TYPE cache_lookups counter" in lines
+    assert 'cache_lookups{result="hit"} 2.0' in lines
+    assert 'call_seconds_bucket{le="0.1"} 1' in lines
+    assert 'call_seconds_bucket{le="+Inf"} 2' in lines
+    assert "call_seconds_count 2" in lines
+    assert 'celery_queue_length{queue="celery"} 1.0' in lines
+    assert "redis_connected_clients 3.0" in lines
+    assert "gemini_circuit_open 0.0" in lines
+    # One header per metric name, however many series
+    assert sum(line == "# TYPE celery_queue_length gauge" for line in lines) == 1
@@ -0,0 +1,32 @@
+import pytest
+from domain.models import Talent, Task
+from domain.models.base import ConcurrentUpdateError
+from domain.models.codec import SCHEMA_FIELD
+
+def test_save_writes_only_changed_fields(redis_client):
+    Task(task_id="task1", status="assigned", assigned_to="t1", required_skills=["python"]).to_redis(redis_client)
+    task = Task.from_redis(redis_client, "task1")
+    assert task.changed_fields() == {}
+
+    # Another writer changes a field this instance doesn't touch
+    redis_client.hset("task:task1", "assigned_to", "t2")
+    task.status = "completed"
+    task.required_skills.append("sql")
+    assert set(task.changed_fields()) == {"status", "required_skills", SCHEMA_FIELD}
+    assert task.to_redis(redis_client)
+
+    stored = Task.from_redis(redis_client, "task1")
+    assert (stored.status, stored.assigned_to, stored.required_skills) == ("completed", "t2", ["python", "sql"])
+    assert stored.version == task.version == 2
+    assert task.changed_fields() == {}
+
+def test_version_check_refuses_a_stale_write(redis_client):
+    Talent(talent_id="t1", rating=4.0).to_redis(redis_client)
+    first, second = Talent.from_redis(redis_client, "t1"), Talent.from_redis(redis_client, "t1")
+    first.rating = 4.5
+    first.to_redis(redis_client, check_version=True)
+
+    second.rating = 3.0
+    with pytest.raises(ConcurrentUpdateError):
+        second.to_redis(redis_client, check_version=True)
+    assert Talent.from_redis(redis_client, "t1").rating == 4.5
@@ -0,0 +1,58 @@
+import io
+import json
+import sys
+import manage
+from domain.models import Talent
+from domain.models.codec import SCHEMA_FIELD, SCHEMA_VERSION, is_trusted
+from domain.models.indexes import AVAILABLE_BY_RATING_KEY, AVAILABLE_KEY, skill_key
+from domain.services.roster import RosterService
+
+ROSTER = """talent_id,available,rating,skills,last_assigned_at
+a,true,4.5,python;sql,
+b,false,3,python,
+"""
+
+def test_import_indexes_each_talent_and_replaces_old_skills(redis_client):
+    Talent(talent_id="a", rating=2.0, skills=["rust"]).to_redis(redis_client)
+
+    report = RosterService.import_roster(redis_client, io.StringIO(ROSTER))
+    assert (report["imported"], report["indexed"]) == (2, 1)
+    assert redis_client.smembers(AVAILABLE_KEY) == {"a"}
+    assert redis_client.zscore(AVAILABLE_BY_RATING_KEY, "a") == 4.5
+    assert redis_client.smembers(skill_key("python")) == {"a"}
+    assert not redis_client.exists(skill_key("rust"))
+    assert Talent.from_redis(redis_client, "b").available is False
+
+def test_trusted_import_round_trips_an_export(redis_client):
+    RosterService.import_roster(redis_client, io.StringIO(ROSTER))
+    exported = io.StringIO()
+    RosterService.export_roster(redis_client, exported, "ndjson")
+    redis_client.flushall()
+
+    report = RosterService.import_roster(redis_client, io.StringIO(exported.getvalue()), "ndjson", trusted=True)
+    assert report["failed"] == 0
+    assert redis_client.smembers(skill_key("sql")) == {"a"}
+    assert Talent.from_redis(redis_client, "a").skills == ["python", "sql"]
+
+def test_export_to_stdout_leaves_it_open(redis_client, monkeypatch, capsys):
+    monkeypatch.setattr(manage, "setup_logging", lambda **kwargs: None)
+    RosterService.import_roster(redis_client, io.StringIO(ROSTER))
+
+    assert manage.main(["export-roster", "-", "--format", "ndjson"]) == 0
+    assert not sys.stdout.closed
+    print("after")
+    lines = capsys.readouterr().out.splitlines()
+    assert sorted(json.loads(line)["talent_id"] for line in lines[:-1]) == ["a", "b"]
+    assert lines[-1] == "after"
+
+def test_trusted_rows_are_stored_like_validated_ones(redis_client):
+    row = "a,true,4.5,python,2024-05-01T12:00:00\n"
+    RosterService.import_roster(redis_client, io.StringIO(ROSTER.splitlines(True)[0] + row))
+    validated = redis_client.hgetall("talent:a")
+    redis_client.flushall()
+    RosterService.import_roster(redis_client, io.StringIO(ROSTER.splitlines(True)[0] + row), trusted=True)
+    trusted = redis_client.hgetall("talent:a")
+
+    assert trusted == validated
+    assert trusted[SCHEMA_FIELD] == str(SCHEMA_VERSION)
+    assert is_trusted(trusted)
@@ -0,0 +1,15 @@
+from domain.models import Task
+from domain.models.indexes import TASKS_KEY, TaskIndex, task_assignee_key, task_status_key
+
+def test_writes_keep_the_listing_indexes_in_line(redis_client):
+    Task(task_id="task1").to_redis(redis_client)
+    task = Task.from_redis(redis_client, "task1")
+    task.status, task.assigned_to = "assigned", "t1"
+    task.to_redis(redis_client)
+
+    assert redis_client.zrange(TASKS_KEY, 0, -1) == ["task1"]
+    assert not redis_client.exists(task_status_key("unassigned"))
+    assert redis_client.zrange(task_status_key("assigned"), 0, -1) == ["task1"]
+    assert redis_client.zrange(task_assignee_key("t1"), 0, -1) == ["task1"]
+    assert TaskIndex.rebuild(redis_client) == 1
+    assert redis_client.zrange(task_assignee_key("t1"), 0, -1) == ["task1"]